@@ -0,0 +1,174 @@
+import argparse
+import random
+from datetime import date, timedelta
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n"
+
+# Product names as they appear in data/sales_data.txt (including the
+# stray commas the parser has to clean up)
+BASE_PRODUCTS = [
+    "Laptop", "Mouse", "USB Cable", "Wireless Mouse", "Webcam", "Monitor",
+    "Headphones", "Laptop Charger", "Keyboard", "Laptop,Premium",
+    "Mouse,Wireless", "Monitor,LED",
+]
+REGIONS = ["North", "South", "East", "West"]
+
+# Kinds of dirty row, mirroring the problems found in the real data
+DIRTY_KINDS = [
+    "bad_transaction_id", "bad_customer_id", "missing_customer_id",
+    "zero_quantity", "bad_price", "missing_region", "malformed",
+]
+
+BATCH_ROWS = 10000
+
+_SUFFIXES = {"K": 10 ** 3, "M": 10 ** 6, "B": 10 ** 9}
+
+
+def parse_count(value):
+    """
+    Parses a row count such as "250000", "1M" or "10m".
+    """
+    value = str(value).strip().upper()
+    if value and value[-1] in _SUFFIXES:
+        return int(float(value[:-1]) * _SUFFIXES[value[-1]])
+    return int(value)
+
+
+def product_catalog(products):
+    """
+    Returns: list of (ProductID, ProductName) pairs, ProductIDs P101, P102, ...
+    """
+    catalog = []
+    for i in range(products):
+        name = BASE_PRODUCTS[i % len(BASE_PRODUCTS)]
+        if i >= len(BASE_PRODUCTS):
+            name = f"{name} {i // len(BASE_PRODUCTS) + 1}"
+        catalog.append((f"P{101 + i}", name))
+    return catalog
+
+
+def zipf_cum_weights(n, skew):
+    """
+    Cumulative weights where value k (0-based) has weight 1 / (k + 1) ** skew.
+    skew=0 gives a uniform distribution.
+    """
+    total = 0.0
+    cum = []
+    for k in range(n):
+        total += 1.0 / (k + 1) ** skew
+        cum.append(total)
+    return cum
+
+
+def _format_number(value, rng, comma_ratio):
+    text = str(value)
+    if value >= 1000 and rng.random() < comma_ratio:
+        text = f"{value:,}"
+    return text
+
+
+def _dirty(fields, kind, rng):
+    """
+    Breaks a clean row (list of 8 strings) the way `kind` describes.
+    """
+    if kind == "bad_transaction_id":
+        fields[0] = "X" + fields[0][1:]
+    elif kind == "bad_customer_id":
+        fields[6] = "U" + fields[6][1:]
+    elif kind == "missing_customer_id":
+        fields[6] = ""
+    elif kind == "zero_quantity":
+        fields[4] = rng.choice(["0", "-1", ""])
+    elif kind == "bad_price":
+        fields[5] = rng.choice(["0", "abc", ""])
+    elif kind == "missing_region":
+        fields[7] = ""
+    elif kind == "malformed":
+        return "|".join(fields[:rng.randint(1, 6)])
+    return "|".join(fields)
+
+
+def generate_sales_file(path, rows, products=50, customers=1000, days=365,
+                        regions=None, skew=1.1, dirty_ratio=0.05, comma_ratio=0.1,
+                        seed=42, start_date=date(2024, 1, 1)):
+    """
+    Writes a synthetic file in the data/sales_data.txt format.
+
+    Output is fully determined by the arguments (same seed, same bytes).
+      rows:        number of data lines (the header line is extra)
+      products, customers, days, regions: cardinalities of those columns
+      skew:        Zipf exponent for product and customer popularity
+                   (0 = uniform; larger = a few hot products/customers)
+      dirty_ratio: fraction of rows broken in one of DIRTY_KINDS
+      comma_ratio: fraction of large numbers written with thousands
+                   separators ("1,916"), which are valid input
+
+    Returns: number of lines written, including the header
+    """
+    rng = random.Random(seed)
+    regions = list(regions or REGIONS)
+    catalog = product_catalog(products)
+    prices = [rng.choice([49, 99, 173, 431, 775, 1056, 1916, 2826, 4259, 9997, 81896])
+              for _ in catalog]
+    product_weights = zipf_cum_weights(products, skew)
+    customer_weights = zipf_cum_weights(customers, skew)
+    dates = [(start_date + timedelta(days=d)).isoformat() for d in range(days)]
+    product_idx = range(products)
+    customer_idx = range(customers)
+
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(HEADER)
+        while written < rows:
+            batch = min(BATCH_ROWS, rows - written)
+            picked_products = rng.choices(product_idx, cum_weights=product_weights, k=batch)
+            picked_customers = rng.choices(customer_idx, cum_weights=customer_weights, k=batch)
+            lines = []
+            for i in range(batch):
+                p = picked_products[i]
+                product_id, name = catalog[p]
+                fields = [
+                    f"T{written + i + 1:06d}",
+                    rng.choice(dates),
+                    product_id,
+                    name,
+                    str(rng.randint(1, 10)),
+                    _format_number(prices[p], rng, comma_ratio),
+                    f"C{picked_customers[i] + 1:03d}",
+                    rng.choice(regions),
+                ]
+                if rng.random() < dirty_ratio:
+                    lines.append(_dirty(fields, rng.choice(DIRTY_KINDS), rng))
+                else:
+                    lines.append("|".join(fields))
+            f.write("\n".join(lines))
+            f.write("\n")
+            written += batch
+    return written + 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic sales data file")
+    parser.add_argument("output", help="file to write")
+    parser.add_argument("--rows", default="1M", help="number of rows, e.g. 1M, 10M, 100M (default: %(default)s)")
+    parser.add_argument("--products", type=int, default=50)
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--regions", type=int, default=len(REGIONS),
+                        help="number of distinct regions (default: %(default)s)")
+    parser.add_argument("--skew", type=float, default=1.1)
+    parser.add_argument("--dirty-ratio", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    regions = REGIONS[:args.regions] + [f"Region{i}" for i in range(len(REGIONS), args.regions)]
+    lines = generate_sales_file(
+        args.output, parse_count(args.rows), products=args.products,
+        customers=args.customers, days=args.days, regions=regions,
+        skew=args.skew, dirty_ratio=args.dirty_ratio, seed=args.seed,
+    )
+    print(f"Wrote {lines} lines to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
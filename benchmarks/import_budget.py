@@ -0,0 +1,210 @@
+import argparse
+import importlib.util
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.stub_api import start_stub_server
+
+# Import-time budget for each main.py subcommand, in milliseconds of
+# module import (as measured by `python -X importtime`, summed over the
+# top-level imports that a bare interpreter does not already make at
+# startup, e.g. through site and .pth files). Roughly 1.5x the measured
+# time, so slow CI machines pass; a command that starts importing
+# requests, NumPy or pandas eagerly blows it. enrich and report need
+# requests (~60-130 ms of it) for the catalog API.
+BUDGETS_MS = {
+    "analyze": 100,
+    "serve": 160,
+    "enrich": 300,
+    "report": 300,
+    "clean": 800,
+    "plot": 1500,
+}
+
+# Modules a command must not import at all
+FORBIDDEN = {
+    "analyze": ("requests", "numpy", "pandas", "matplotlib"),
+    "serve": ("requests", "numpy", "pandas", "matplotlib"),
+    "enrich": ("numpy", "pandas", "matplotlib"),
+    "report": ("numpy", "pandas", "matplotlib"),
+    # pandas needs NumPy itself
+    "clean": ("requests", "matplotlib"),
+    "plot": ("requests", "numpy", "pandas"),
+}
+
+# Optional modules a command needs; it is skipped when they are missing
+REQUIRES = {"clean": ("pandas",), "plot": ("matplotlib",)}
+
+# Runs per command (the best one counts)
+RUNS = 3
+
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def parse_importtime(stderr, startup=()):
+    """
+    Parses `-X importtime` output. Top-level imports named in `startup`
+    are not counted in the total.
+    Returns: tuple (total microseconds of the top-level imports, set of
+    every imported module name)
+    """
+    total = 0
+    modules = set()
+    for line in stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        modules.add(name)
+        # Top-level imports are indented by exactly one space
+        if indent == 1 and name not in startup:
+            total += cumulative
+    return total, modules
+
+
+def startup_modules(env):
+    """
+    Returns: set of the modules a bare interpreter imports before running
+    any code.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "pass"], env=env,
+                            stderr=subprocess.PIPE, text=True, check=True)
+    return parse_importtime(result.stderr)[1]
+
+
+def command_args(command, data_file, workdir):
+    """
+    Returns: the main.py arguments that run `command` against data_file,
+    writing everything under workdir.
+    """
+    if command == "clean":
+        return [command, data_file, os.path.join(workdir, "cleaned"), "--format", "csv"]
+    if command == "plot":
+        return [command, "--data", data_file, "--output", workdir]
+    if command == "serve":
+        return [command, "--data", data_file, "--port", "0"]
+    args = [command, "--data", data_file]
+    if command == "report":
+        args += ["--output", os.path.join(workdir, "sales_report.txt")]
+    return args
+
+
+def run_command(cmd, env, command):
+    """
+    Runs one main.py command line to completion. `serve` runs until it is
+    stopped, so it is stopped (SIGTERM, a clean shutdown) as soon as it
+    reports that it is serving.
+    Returns: tuple (exit status, stderr text)
+    """
+    if command != "serve":
+        result = subprocess.run(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                text=True)
+        return result.returncode, result.stderr
+    with tempfile.TemporaryFile("w+") as stderr:
+        proc = subprocess.Popen(cmd, env=dict(env, PYTHONUNBUFFERED="1"), stdout=subprocess.PIPE,
+                                stderr=stderr, text=True)
+        serving = proc.stdout.readline().startswith("Serving")
+        proc.terminate()
+        proc.communicate(timeout=60)
+        stderr.seek(0)
+        return 0 if serving else proc.returncode or 1, stderr.read()
+
+
+def measure(command, data_file, workdir, env, startup=(), runs=RUNS):
+    """
+    Runs one subcommand `runs` times, each in a fresh interpreter under
+    -X importtime. The first run also writes the bytecode caches, so the
+    best run is kept.
+    Returns: tuple (import milliseconds, set of imported modules)
+    """
+    cmd = [sys.executable, "-X", "importtime", "main.py"] + command_args(command, data_file, workdir)
+    best = None
+    for _ in range(runs):
+        returncode, stderr = run_command(cmd, env, command)
+        if returncode != 0:
+            raise RuntimeError(f"`{' '.join(cmd[3:])}` failed:\n{stderr[-2000:]}")
+        total, modules = parse_importtime(stderr, startup)
+        if best is None or total < best[0]:
+            best = (total, modules)
+    return best[0] / 1000, best[1]
+
+
+def check_budgets(commands, data_file, budgets=BUDGETS_MS):
+    """
+    Measures each command and compares it against its budget and its
+    forbidden modules.
+    Returns: tuple (list of result dicts, list of violation messages)
+    """
+    server, base_url = start_stub_server()
+    env = dict(os.environ, SALES_API_BASE_URL=base_url, SALES_CATALOG_CACHE="",
+               SALES_PARSE_CACHE="0")
+    env.pop("SALES_ANALYTICS_BACKEND", None)
+    startup = startup_modules(env)
+
+    results = []
+    violations = []
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for command in commands:
+                missing = [m for m in REQUIRES.get(command, ()) if importlib.util.find_spec(m) is None]
+                if missing:
+                    results.append({"command": command, "skipped": f"{', '.join(missing)} not installed"})
+                    continue
+                ms, modules = measure(command, data_file, workdir, env, startup)
+                loaded = [m for m in FORBIDDEN.get(command, ()) if m in modules]
+                results.append({"command": command, "ms": ms, "budget_ms": budgets[command],
+                                "forbidden": loaded})
+                if ms > budgets[command]:
+                    violations.append(f"{command}: imports took {ms:.1f} ms (budget {budgets[command]} ms)")
+                for name in loaded:
+                    violations.append(f"{command}: imported {name}")
+    finally:
+        server.shutdown()
+    return results, violations
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Check the import time of each main.py subcommand")
+    parser.add_argument("commands", nargs="*", metavar="COMMAND",
+                        help=f"subcommands to check: {', '.join(BUDGETS_MS)} (default: all)")
+    parser.add_argument("--data", default="data/sales_data.txt", metavar="FILE",
+                        help="sales data file to run the commands on (default: %(default)s)")
+    parser.add_argument("--budget", action="append", default=[], metavar="COMMAND=MS",
+                        help="override the budget of one command, e.g. analyze=40")
+    args = parser.parse_args(argv)
+    for command in args.commands:
+        if command not in BUDGETS_MS:
+            parser.error(f"unknown command '{command}'")
+    args.budgets = dict(BUDGETS_MS)
+    for item in args.budget:
+        command, _, ms = item.partition("=")
+        if command not in BUDGETS_MS or not ms.isdigit():
+            parser.error(f"invalid --budget '{item}' (expected COMMAND=MS)")
+        args.budgets[command] = int(ms)
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results, violations = check_budgets(args.commands or list(BUDGETS_MS), args.data, args.budgets)
+
+    print(f"{'command':<10} {'imports':>10} {'budget':>8}")
+    for r in results:
+        if "skipped" in r:
+            print(f"{r['command']:<10} {'skipped':>10}  ({r['skipped']})")
+        else:
+            print(f"{r['command']:<10} {r['ms']:>8.1f}ms {r['budget_ms']:>6}ms")
+
+    if violations:
+        print("\nImport budget exceeded:")
+        for message in violations:
+            print(f"  {message}")
+        sys.exit(1)
+    print("\nAll commands within their import budget.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from benchmarks.generate_data import generate_sales_file, parse_count
+from benchmarks.stub_api import build_catalog, start_stub_server
+from utils.file_handler import read_sales_data
+from utils.parser import parse_sales_file, parse_transactions
+from utils.validator import validate_and_filter
+from utils.data_processor import (
+    calculate_total_revenue,
+    region_wise_sales,
+    top_selling_products,
+    customer_analysis,
+    daily_sales_trend,
+    find_peak_sales_day,
+    low_performing_products,
+)
+from utils.api_handler import ProductAPIClient
+from utils.enrichment import CatalogIndex, enrich_transactions
+from utils.report_generator import generate_sales_report
+
+DATA_DIR = "benchmarks/.data"
+RESULTS_DIR = "benchmarks/results"
+
+# Filters used by main.py
+REGION = "South"
+MIN_AMOUNT = 500
+
+PROCESSORS = [
+    ("calculate_total_revenue", calculate_total_revenue, {}),
+    ("region_wise_sales", region_wise_sales, {}),
+    ("top_selling_products", top_selling_products, {"n": 5}),
+    ("customer_analysis", customer_analysis, {}),
+    ("daily_sales_trend", daily_sales_trend, {}),
+    ("find_peak_sales_day", find_peak_sales_day, {}),
+    ("low_performing_products", low_performing_products, {"threshold": 10}),
+]
+
+
+class StageTimer:
+    """
+    Runs pipeline stages one at a time and records, for each: wall time,
+    rows in/out, throughput (rows in per second) and peak traced Python
+    memory allocated during the stage.
+    """
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.stages = []
+
+    def run(self, name, func, rows_in, *args, **kwargs):
+        """
+        Calls func(*args, **kwargs) as stage `name`.
+        Returns: the function's result
+        """
+        gc.collect()
+        if self.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        seconds = time.perf_counter() - start
+        peak = None
+        if self.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        rows_out = len(result) if hasattr(result, "__len__") else None
+        self.stages.append({
+            "stage": name,
+            "seconds": round(seconds, 6),
+            "rows_in": rows_in,
+            "rows_out": rows_out,
+            "rows_per_sec": round(rows_in / seconds, 1) if seconds > 0 else None,
+            "peak_memory_bytes": peak,
+        })
+        print(f"  {name:<26} {seconds:10.4f}s  {self.stages[-1]['rows_per_sec'] or 0:>14,.0f} rows/s")
+        return result
+
+
+def dataset_path(rows, args):
+    """
+    Returns: path of the (cached) generated file for these parameters,
+    generating it first if needed.
+    """
+    name = (f"sales_{rows}_p{args.products}_c{args.customers}_s{args.skew}"
+            f"_d{args.dirty_ratio}_seed{args.seed}.txt")
+    path = os.path.join(args.data_dir, name)
+    if not os.path.exists(path):
+        os.makedirs(args.data_dir, exist_ok=True)
+        print(f"Generating {rows:,} rows -> {path}")
+        generate_sales_file(path + ".tmp", rows, products=args.products,
+                            customers=args.customers, skew=args.skew,
+                            dirty_ratio=args.dirty_ratio, seed=args.seed)
+        os.replace(path + ".tmp", path)
+    return path
+
+
+def benchmark_file(path, rows, client, args):
+    """
+    Times every pipeline stage on one data file.
+    Returns: list of stage result dicts
+    """
+    timer = StageTimer(trace_memory=not args.no_memory)
+
+    if args.parse_cache:
+        # Read and parse in one stage: a cache hit skips both
+        transactions = timer.run("parse_sales_file", parse_sales_file, rows, path,
+                                 columnar=args.columnar)
+    else:
+        raw_lines = timer.run("read_sales_data", read_sales_data, rows, path)
+        transactions = timer.run("parse_transactions", parse_transactions, len(raw_lines),
+                                 raw_lines, columnar=args.columnar)
+        del raw_lines
+    valid, _, _ = timer.run("validate_and_filter", validate_and_filter, len(transactions),
+                            transactions, region=args.region, min_amount=args.min_amount)
+    del transactions
+
+    for name, func, kwargs in PROCESSORS:
+        timer.run(name, func, len(valid), valid, **kwargs)
+
+    products, _ = timer.run("fetch_products", client.fetch_products, 1, limit=100)
+    enriched = timer.run("enrich_transactions", enrich_transactions, len(valid),
+                         valid, CatalogIndex(products))
+    report_file = os.path.join(args.results_dir, "sales_report.txt")
+    timer.run("generate_sales_report", generate_sales_report, len(valid),
+              valid, enriched, output_file=report_file)
+    return timer.stages
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(old, new, threshold=1.2):
+    """
+    Prints per-stage time ratios (new / old) for row counts present in
+    both result files, marking ratios above `threshold` as regressions.
+    Returns: number of regressions
+    """
+    old_runs = {run["rows"]: run for run in old["runs"]}
+    regressions = 0
+    for run in new["runs"]:
+        base = old_runs.get(run["rows"])
+        if base is None:
+            continue
+        base_stages = {s["stage"]: s for s in base["stages"]}
+        print(f"\nComparison at {run['rows']:,} rows (new / old):")
+        for stage in run["stages"]:
+            before = base_stages.get(stage["stage"])
+            if not before or not before["seconds"]:
+                continue
+            ratio = stage["seconds"] / before["seconds"]
+            flag = ""
+            if ratio > threshold:
+                flag = "  <-- REGRESSION"
+                regressions += 1
+            print(f"  {stage['stage']:<26} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Stage-by-stage pipeline benchmarks")
+    parser.add_argument("--rows", default="100K",
+                        help="comma-separated row counts, e.g. 1M,10M,100M (default: %(default)s)")
+    parser.add_argument("--products", type=int, default=50)
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--skew", type=float, default=1.1)
+    parser.add_argument("--dirty-ratio", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--region", default=REGION)
+    parser.add_argument("--min-amount", type=float, default=MIN_AMOUNT)
+    parser.add_argument("--columnar", action="store_true",
+                        help="parse into a TransactionTable instead of a list of dicts")
+    parser.add_argument("--parse-cache", action="store_true",
+                        help="allow the on-disk parse cache (off by default so parsing is measured)")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip tracemalloc (faster, no peak memory figures)")
+    parser.add_argument("--api-latency", type=float, default=0.0,
+                        help="seconds the stub API waits before each response")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    parser.add_argument("--output", help="results JSON file (default: timestamped in --results-dir)")
+    parser.add_argument("--compare", metavar="JSON", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="time ratio reported as a regression by --compare (default: %(default)s)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.parse_cache:
+        os.environ["SALES_PARSE_CACHE"] = "0"
+    os.makedirs(args.results_dir, exist_ok=True)
+
+    server, base_url = start_stub_server(build_catalog(args.products), latency=args.api_latency)
+    client = ProductAPIClient(base_url=base_url)
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "parameters": {key: value for key, value in vars(args).items()
+                       if key not in ("output", "compare", "data_dir", "results_dir")},
+        "runs": [],
+    }
+    try:
+        for rows in [parse_count(r) for r in args.rows.split(",")]:
+            path = dataset_path(rows, args)
+            print(f"\nBenchmarking {rows:,} rows ({path})")
+            stages = benchmark_file(path, rows, client, args)
+            results["runs"].append({
+                "rows": rows,
+                "file_bytes": os.path.getsize(path),
+                "total_seconds": round(sum(s["seconds"] for s in stages), 6),
+                "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None,
+                "stages": stages,
+            })
+    finally:
+        client.close()
+        server.shutdown()
+
+    output = args.output or os.path.join(
+        args.results_dir, f"bench_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare_results(json.load(f), results, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.generate_data import product_catalog
+
+
+def build_catalog(products=50, extra=100):
+    """
+    Returns: DummyJSON-style product dicts. The first `products` entries
+    carry the generator's product names (matched by title; like the real
+    API, catalog ids have nothing to do with the sales ProductIDs); `extra`
+    unrelated items pad the catalog.
+    """
+    catalog = []
+    for i, (_, name) in enumerate(product_catalog(products)):
+        catalog.append({
+            "id": i + 1,
+            "title": name.replace(",", " "),
+            "price": 9.99,
+            "category": "electronics",
+            "brand": "Generic",
+            "rating": 4.0,
+        })
+    for i in range(products + 1, products + extra + 1):
+        catalog.append({"id": i, "title": f"Catalog Item {i}", "price": 1.0,
+                        "category": "misc", "brand": "Other", "rating": 3.0})
+    return catalog
+
+
+class StubAPIHandler(BaseHTTPRequestHandler):
+    """
+    Serves the subset of the DummyJSON products API used by
+    utils/api_handler.py: /products, /products/<id> and /products/search.
+
+    Each request path is appended to `requests`. While `failures` is not
+    empty, requests are answered with its next status code instead (to
+    exercise retries).
+    """
+
+    protocol_version = "HTTP/1.1"
+    catalog = []
+    latency = 0.0
+    failures = []
+    requests = []
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        with self.lock:
+            self.requests.append(self.path)
+            failure = self.failures.pop(0) if self.failures else None
+        if self.latency:
+            time.sleep(self.latency)
+        if failure is not None:
+            return self._send(failure, {"message": "injected failure"})
+
+        if url.path == "/products":
+            limit = int(query.get("limit", ["30"])[0])
+            skip = int(query.get("skip", ["0"])[0])
+            return self._send(200, {"products": self.catalog[skip:skip + limit],
+                                    "total": len(self.catalog), "skip": skip, "limit": limit})
+        if url.path == "/products/search":
+            term = query.get("q", [""])[0].lower()
+            found = [p for p in self.catalog if term in p["title"].lower()]
+            return self._send(200, {"products": found, "total": len(found)})
+        if url.path.startswith("/products/") and url.path[10:].isdigit():
+            product_id = int(url.path[10:])
+            for product in self.catalog:
+                if product["id"] == product_id:
+                    return self._send(200, product)
+            return self._send(404, {"message": f"Product with id '{product_id}' not found"})
+        self._send(404, {"message": "not found"})
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StubAPIServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # A client that timed out has closed the connection mid-response
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_stub_server(catalog=None, latency=0.0, host="127.0.0.1", port=0, failures=()):
+    """
+    Starts the stub API in a daemon thread (port 0 picks a free port).
+    `failures` are status codes returned, in order, for the first requests.
+    The handler's request log is server.RequestHandlerClass.requests.
+    Returns: (server, base_url); call server.shutdown() when done.
+    """
+    handler = type("Handler", (StubAPIHandler,), {
+        "catalog": catalog if catalog is not None else build_catalog(),
+        "latency": latency,
+        "failures": list(failures),
+        "requests": [],
+        "lock": threading.Lock(),
+    })
+    server = StubAPIServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a local stub of the products API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--products", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to each response")
+    args = parser.parse_args(argv)
+
+    server, base_url = start_stub_server(build_catalog(args.products), args.latency, port=args.port)
+    print(f"Stub API listening on {base_url} (set SALES_API_BASE_URL to use it)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
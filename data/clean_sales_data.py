@@ -1,49 +1,240 @@
-import pandas as pd
+import argparse
+import csv
+import json
+import os
+import sys
+from array import array
 
-# Load raw TXT file (pipe-delimited)
-df = pd.read_csv("data/sales_data.txt", sep="|")
+from utils.transaction_table import COLUMNS, TransactionTable
 
-# Drop empty lines
-df.dropna(how="all", inplace=True)
+DEFAULT_INPUT = "data/sales_data.txt"
+DEFAULT_OUTPUT = "data/cleaned"
+CHUNKSIZE = 100000
+MANIFEST = "_manifest.json"
 
-# Track total records parsed
-total_records = len(df)
+# Output formats by preference; parquet and arrow need pyarrow
+FORMATS = ("parquet", "arrow", "csv")
+SUFFIXES = {"parquet": ".parquet", "arrow": ".arrow", "csv": ".csv"}
 
-# Clean ProductName (remove commas)
-df["ProductName"] = df["ProductName"].str.replace(",", " ", regex=False)
+STRING_COLUMNS = ["TransactionID", "Date", "ProductID", "ProductName", "CustomerID", "Region"]
 
-# Clean UnitPrice (remove commas, convert to numeric)
-df["UnitPrice"] = df["UnitPrice"].astype(str).str.replace(",", "", regex=False)
-df["UnitPrice"] = pd.to_numeric(df["UnitPrice"], errors="coerce")
 
-# Define validity rules
-valid_ids = df["TransactionID"].astype(str).str.startswith("T")
-valid_quantity = df["Quantity"] > 0
-valid_price = df["UnitPrice"] > 0
-valid_customer = df["CustomerID"].notna()
-valid_region = df["Region"].notna()
+def _pyarrow():
+    """
+    Returns: the pyarrow module, or None when it is not installed.
+    """
+    try:
+        import pyarrow
+    except ImportError:  # pyarrow is optional
+        return None
+    return pyarrow
 
-# Apply rules
-df_clean = df[valid_ids & valid_quantity & valid_price & valid_customer & valid_region]
 
-# Count invalid records
-invalid_records = total_records - len(df_clean)
+def choose_format(fmt=None):
+    """
+    Returns: fmt if it can be written here, else the best available format
+    (parquet with pyarrow, otherwise csv).
+    """
+    if fmt is None:
+        fmt = FORMATS[0]
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Choose from: {', '.join(FORMATS)}")
+    if fmt != "csv" and _pyarrow() is None:
+        return "csv"
+    return fmt
 
-# Save cleaned data
-df_clean.to_csv("cleaned_sales_data.csv", index=False)
 
-# Print summary
-print(f"Total records parsed: {total_records}")
-print(f"Invalid records removed: {invalid_records}")
-print(f"Valid records after cleaning: {len(df_clean)}")
+def clean_chunk(df):
+    """
+    Applies the cleaning and validity rules to one chunk (a DataFrame of
+    strings).
+    Returns: tuple (clean DataFrame with typed Quantity/UnitPrice, rows read)
+    """
+    import pandas as pd
 
-from utils.file_handler import read_sales_data
-from utils.parser import parse_transactions
+    # Drop empty lines
+    df = df.dropna(how="all")
+    total = len(df)
 
-raw_lines = read_sales_data("data/sales_data.txt")
-cleaned_records = parse_transactions(raw_lines)
+    # Clean ProductName (remove commas)
+    df = df.assign(
+        ProductName=df["ProductName"].str.replace(",", " ", regex=False),
+        # Clean Quantity/UnitPrice (remove commas, convert to numeric)
+        Quantity=pd.to_numeric(df["Quantity"].str.replace(",", "", regex=False), errors="coerce"),
+        UnitPrice=pd.to_numeric(df["UnitPrice"].str.replace(",", "", regex=False), errors="coerce"),
+    )
 
-print(f"Parsed {len(cleaned_records)} valid transactions")
-print("First 3 records:")
-for r in cleaned_records[:3]:
-    print(r)
\ No newline at end of file
+    # Validity rules
+    valid_ids = df["TransactionID"].fillna("").str.startswith("T")
+    valid_quantity = df["Quantity"] > 0
+    valid_price = df["UnitPrice"] > 0
+    valid_customer = df["CustomerID"].notna()
+    valid_region = df["Region"].notna()
+
+    clean = df[valid_ids & valid_quantity & valid_price & valid_customer & valid_region]
+    clean = clean.astype({"Quantity": "int64", "UnitPrice": "float64"})
+    return clean[COLUMNS], total
+
+
+def _write_part(df, path, fmt):
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+        return
+    pa = _pyarrow()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
+    else:
+        import pyarrow.feather as feather
+        feather.write_feather(table, path, compression="uncompressed")
+
+
+def _is_part_file(name):
+    return name.startswith("part-") and name.endswith(tuple(SUFFIXES.values()))
+
+
+def _prepare_output_dir(output_dir):
+    """
+    Creates output_dir, or empties the output of a previous run in it.
+    Only part files and the manifest are removed; a non-empty directory
+    without a manifest is refused rather than cleared.
+    """
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+        return
+    names = os.listdir(output_dir)
+    if names and MANIFEST not in names:
+        raise FileExistsError(
+            f"{output_dir} is not empty and holds no {MANIFEST}; "
+            "choose an empty or new output directory."
+        )
+    for name in names:
+        if _is_part_file(name) or name == MANIFEST:
+            os.remove(os.path.join(output_dir, name))
+
+
+def clean_sales_data(input_file=DEFAULT_INPUT, output_dir=DEFAULT_OUTPUT,
+                     chunksize=CHUNKSIZE, fmt=None):
+    """
+    Cleans a pipe-delimited sales file chunk by chunk and writes the valid
+    rows as columnar part files (output_dir/part-NNNNN.<fmt>, one per
+    chunk) plus a manifest. Only one chunk is in memory at a time, so
+    memory stays flat whatever the input size.
+
+    fmt: "parquet" or "arrow" (Arrow IPC) when pyarrow is installed,
+    otherwise "csv"; None picks the best available (see choose_format).
+    Part files and the manifest of a previous run in output_dir are
+    replaced; any other file is left alone, and a non-empty directory
+    that is not a previous output is refused (FileExistsError).
+
+    Returns: summary dict with total_records, invalid_records,
+    valid_records, format and parts
+    """
+    import pandas as pd
+
+    fmt = choose_format(fmt)
+    # Fail on a missing/unreadable input before touching the output
+    with open(input_file, "rb"):
+        pass
+    _prepare_output_dir(output_dir)
+
+    summary = {"total_records": 0, "invalid_records": 0, "valid_records": 0,
+               "format": fmt, "parts": []}
+    chunks = pd.read_csv(input_file, sep="|", dtype=str, chunksize=chunksize,
+                         skip_blank_lines=True, on_bad_lines="skip")
+    for i, chunk in enumerate(chunks):
+        clean, total = clean_chunk(chunk)
+        summary["total_records"] += total
+        summary["valid_records"] += len(clean)
+        if len(clean):
+            name = f"part-{i:05d}{SUFFIXES[fmt]}"
+            _write_part(clean, os.path.join(output_dir, name), fmt)
+            summary["parts"].append(name)
+    summary["invalid_records"] = summary["total_records"] - summary["valid_records"]
+
+    with open(os.path.join(output_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(dict(summary, columns=COLUMNS), f, indent=2)
+    return summary
+
+
+def _read_part(path, fmt):
+    """
+    Returns: dict column name -> list of values for one part file.
+    """
+    if fmt == "csv":
+        # CSV fallback: the only format that still needs text parsing
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            columns = [list(values) for values in zip(*reader)] or [[] for _ in header]
+        data = dict(zip(header, columns))
+        data["Quantity"] = [int(v) for v in data["Quantity"]]
+        data["UnitPrice"] = [float(v) for v in data["UnitPrice"]]
+        return data
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        table = pq.read_table(path, columns=COLUMNS)
+    else:
+        import pyarrow.feather as feather
+        table = feather.read_table(path, columns=COLUMNS)
+    return {name: table.column(name).to_pylist() for name in COLUMNS}
+
+
+def load_cleaned_sales(output_dir=DEFAULT_OUTPUT):
+    """
+    Loads the output of clean_sales_data into one TransactionTable, ready
+    for aggregate_transactions and the data_processor views. Parquet and
+    Arrow parts are read column by column, with no text parsing.
+    Returns: TransactionTable
+    """
+    with open(os.path.join(output_dir, MANIFEST), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    table = TransactionTable()
+    for name in manifest["parts"]:
+        data = _read_part(os.path.join(output_dir, name), manifest["format"])
+        table.transaction_id.extend(data["TransactionID"])
+        for column in STRING_COLUMNS[1:]:
+            table.column(column).extend(data[column])
+        table.quantity.extend(array("q", data["Quantity"]))
+        table.unit_price.extend(array("d", data["UnitPrice"]))
+    return table
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Clean a sales data file into columnar part files")
+    parser.add_argument("input", nargs="?", default=DEFAULT_INPUT,
+                        help="pipe-delimited sales file (default: %(default)s)")
+    parser.add_argument("output", nargs="?", default=DEFAULT_OUTPUT,
+                        help="output directory (default: %(default)s)")
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE,
+                        help="rows per chunk / part file (default: %(default)s)")
+    parser.add_argument("--format", choices=FORMATS, default=None, dest="fmt",
+                        help="output format (default: parquet if pyarrow is installed, else csv)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        summary = clean_sales_data(args.input, args.output, chunksize=args.chunksize, fmt=args.fmt)
+    except (FileNotFoundError, FileExistsError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    # Print summary
+    print(f"Total records parsed: {summary['total_records']}")
+    print(f"Invalid records removed: {summary['invalid_records']}")
+    print(f"Valid records after cleaning: {summary['valid_records']}")
+    print(f"Wrote {len(summary['parts'])} {summary['format']} part(s) to {args.output}")
+
+    cleaned_records = load_cleaned_sales(args.output)
+    print(f"Loaded {len(cleaned_records)} valid transactions")
+    print("First 3 records:")
+    for r in cleaned_records[:3]:
+        print(r)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,50 @@
-import matplotlib.pyplot as plt
-from utils.file_handler import read_sales_data
-from utils.parser import parse_transactions
-from data.sales_analytics import compute_revenue, summarize_sales
+import argparse
+import os
 
-def plot_revenue_by_product(summary):
+from utils.aggregator import aggregate_transactions
+from utils.data_processor import region_wise_sales
+from utils.parser import parse_sales_file
+
+DEFAULT_INPUT = "data/sales_data.txt"
+DEFAULT_OUTPUT = "output"
+
+
+def _pyplot(show):
+    """
+    Imports matplotlib only when something is plotted; without --show the
+    non-interactive Agg backend is used so no display is needed.
+    """
+    import matplotlib
+    if not show:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def summarize_sales(filepath=DEFAULT_INPUT):
+    """
+    Returns: dict with RevenueByProduct and RevenueByRegion for every row
+    of the file.
+    """
+    aggregate = aggregate_transactions(parse_sales_file(filepath, columnar=True))
+    return {
+        "RevenueByProduct": {name: stats[1] for name, stats in aggregate.product_stats.items()},
+        "RevenueByRegion": {region: stats["total_sales"]
+                            for region, stats in region_wise_sales(aggregate).items()},
+    }
+
+
+def _finish(plt, output_file, show):
+    plt.tight_layout()
+    if output_file:
+        plt.savefig(output_file)
+    if show:
+        plt.show()
+    plt.close()
+
+
+def plot_revenue_by_product(summary, output_file=None, show=True):
+    plt = _pyplot(show)
     products = list(summary["RevenueByProduct"].keys())
     revenues = list(summary["RevenueByProduct"].values())
 
@@ -13,24 +54,42 @@ def plot_revenue_by_product(summary):
     plt.title("Revenue by Product")
     plt.xlabel("Product")
     plt.ylabel("Revenue")
-    plt.tight_layout()
-    plt.show()
+    _finish(plt, output_file, show)
+
 
-def plot_revenue_by_region(summary):
+def plot_revenue_by_region(summary, output_file=None, show=True):
+    plt = _pyplot(show)
     regions = list(summary["RevenueByRegion"].keys())
     revenues = list(summary["RevenueByRegion"].values())
 
     plt.figure(figsize=(6, 6))
     plt.pie(revenues, labels=regions, autopct="%1.1f%%", startangle=140)
     plt.title("Revenue Distribution by Region")
-    plt.tight_layout()
-    plt.show()
+    _finish(plt, output_file, show)
 
-if __name__ == "__main__":
-    raw_lines = read_sales_data("data/sales_data.txt")
-    records = parse_transactions(raw_lines)
-    records = compute_revenue(records)
-    summary = summarize_sales(records)
 
-    plot_revenue_by_product(summary)
-    plot_revenue_by_region(summary)
\ No newline at end of file
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Plot revenue by product and by region")
+    parser.add_argument("--data", default=DEFAULT_INPUT, metavar="FILE",
+                        help="sales data file (default: %(default)s)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, metavar="DIR",
+                        help="directory for the PNG files (default: %(default)s)")
+    parser.add_argument("--show", action="store_true",
+                        help="also open the plots in a window")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    summary = summarize_sales(args.data)
+
+    os.makedirs(args.output, exist_ok=True)
+    product_file = os.path.join(args.output, "revenue_by_product.png")
+    region_file = os.path.join(args.output, "revenue_by_region.png")
+    plot_revenue_by_product(summary, product_file, show=args.show)
+    plot_revenue_by_region(summary, region_file, show=args.show)
+    print(f"Plots saved to {product_file} and {region_file}")
+
+
+if __name__ == "__main__":
+    main()
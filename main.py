@@ -1,47 +1,461 @@
-from utils.file_handler import read_sales_data
-from utils.parser import parse_transactions
-from utils.validator import validate_and_filter
-from utils.data_processor import (
-    calculate_total_revenue,
-    region_wise_sales,
-    top_selling_products,
-    customer_analysis,
-    daily_sales_trend,
-    find_peak_sales_day,
-    low_performing_products,
-)
-from utils.api_handler import fetch_products, fetch_product_by_id, search_products
-from utils.report_generator import generate_sales_report
-
-
-def main():
-    # === STEP 1: Load and parse local sales data ===
-    raw_lines = read_sales_data("data/sales_data.txt")
-    transactions = parse_transactions(raw_lines)
-
-    # === STEP 2: Validate and filter ===
-    valid_transactions, invalid_count, summary = validate_and_filter(
-        transactions, region="South", min_amount=500
-    )
-
-    # === STEP 3: Analytics ===
-    total_revenue = calculate_total_revenue(valid_transactions)
-    region_summary = region_wise_sales(valid_transactions)
-    top_products = top_selling_products(valid_transactions, n=5)
-    customer_summary = customer_analysis(valid_transactions)
-    daily_summary = daily_sales_trend(valid_transactions)
-    peak_day = find_peak_sales_day(valid_transactions)
-    low_products = low_performing_products(valid_transactions, threshold=10)
-
-    # === STEP 4: API Enrichment ===
-    products, total = fetch_products(limit=100)
-    enriched_transactions = [p['title'] for p in products]  # placeholder enrichment
+import argparse
+import importlib
+import sys
+
+DATA_FILE = "data/sales_data.txt"
+REPORT_FILE = "output/sales_report.txt"
+REGION = "South"
+MIN_AMOUNT = 500
+
+# Subcommands. Each one imports only what it uses, inside its run_*
+# function: `analyze` never loads requests, nothing loads NumPy unless
+# --backend numpy is used, and clean/plot hand their arguments straight
+# to their own scripts (and pandas/matplotlib) without building the
+# pipeline parser. Running without a subcommand is the same as `report`.
+COMMANDS = {
+    "analyze": "parse, validate and aggregate the sales data and print the key figures",
+    "report": "analyze, enrich from the product API and write the report (default)",
+    "enrich": "analyze and match the products against the product API",
+    "clean": "clean the raw file into columnar part files (see data/clean_sales_data.py)",
+    "plot": "plot revenue by product and region (see data/visualize_sales.py)",
+    "serve": "keep the aggregate in memory and answer JSON queries over HTTP (see utils/sales_service.py)",
+}
+SCRIPT_COMMANDS = {"clean": "data.clean_sales_data", "plot": "data.visualize_sales"}
+
+
+def _add_pipeline_options(parser):
+    from utils import instrumentation
+    from utils.aggregator import BACKENDS
+    from utils.incremental import DEFAULT_STATE_FILE
+
+    parser.add_argument(
+        "--data", default=DATA_FILE, metavar="FILE",
+        help="sales data file (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="process the file as a chain of generators (bounded memory)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, metavar="N",
+        help="split the file into chunks and aggregate them in N processes"
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="only process lines appended since the last --incremental run"
+    )
+    parser.add_argument(
+        "--state-file", default=DEFAULT_STATE_FILE,
+        help="checkpoint file used by --incremental (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--dataset", metavar="DIR",
+        help="read a partitioned dataset (DIR/date=YYYY-MM-DD/region=NAME/*.txt) "
+             "instead of the single data file; use --workers N to read partitions in parallel"
+    )
+    parser.add_argument(
+        "--dataset-cache", metavar="DIR",
+        help="with --dataset: cache parsed partitions in DIR, so unchanged partitions "
+             "are not parsed again (default: no cache)"
+    )
+    parser.add_argument(
+        "--date-from", metavar="YYYY-MM-DD",
+        help="with --dataset: first date to include (partitions before it are skipped)"
+    )
+    parser.add_argument(
+        "--date-to", metavar="YYYY-MM-DD",
+        help="with --dataset: last date to include (partitions after it are skipped)"
+    )
+    parser.add_argument(
+        "--backend", choices=BACKENDS, default=None,
+        help="analytics implementation (numpy falls back to python if NumPy is missing)"
+    )
+    parser.add_argument(
+        "--approx-top-k", type=int, default=None, metavar="COUNTERS",
+        help="track customers with a fixed-size Space-Saving sketch of COUNTERS "
+             "entries instead of exact per-customer stats"
+    )
+    parser.add_argument(
+        "--encoding-fallback", action="store_true",
+        help="accept non-UTF-8 data: detect the encoding (UTF-8, cp1252, latin-1) and decode "
+             "stray bad bytes instead of failing (also SALES_ENCODING_FALLBACK=1)"
+    )
+    parser.add_argument(
+        "--hll-precision", type=int, default=None, metavar="P",
+        help="count daily unique customers with HyperLogLog sketches of precision P "
+             "(4-18) instead of exact sets"
+    )
+    parser.add_argument(
+        "--save-cube", metavar="FILE",
+        help="also build the Date x Region x Product rollup cube and save it to FILE"
+    )
+    parser.add_argument(
+        "--instrument", nargs="?", const="table", choices=instrumentation.FORMATS,
+        help="record per-stage timings, rows and memory and print them as a table "
+             "or JSON lines at exit (also enabled by SALES_INSTRUMENT)"
+    )
+    parser.add_argument(
+        "--instrument-output", metavar="FILE",
+        help="write the instrumentation report to FILE instead of stderr"
+    )
+    parser.add_argument(
+        "--profile-stage", metavar="STAGE",
+        help="run one instrumented stage under cProfile (stats saved to output/profile_STAGE.prof)"
+    )
+
+
+def _add_report_options(parser):
+    from utils.report_generator import REPORT_FORMATS
+
+    parser.add_argument(
+        "--report-format", action="append", choices=REPORT_FORMATS, dest="report_formats",
+        help="report format to write; repeat for several (default: txt)"
+    )
+    parser.add_argument(
+        "--output", default=REPORT_FILE, metavar="FILE",
+        help="report file; other formats get the matching extension (default: %(default)s)"
+    )
+
+
+def _add_analyze_options(parser):
+    parser.add_argument(
+        "--customer", action="append", dest="customers", metavar="ID",
+        help="also print one customer's transactions after the filters (drill-down); "
+             "repeat for several"
+    )
+
+
+def _add_serve_options(parser):
+    from utils.sales_service import DEFAULT_HOST, DEFAULT_PORT, DEFAULT_POLL_INTERVAL
+
+    parser.add_argument(
+        "--data", default=DATA_FILE, metavar="FILE",
+        help="sales data file to load and watch (default: %(default)s)"
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST, help="address to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to listen on (default: %(default)s)")
+    parser.add_argument(
+        "--socket", metavar="PATH",
+        help="listen on a Unix socket at PATH instead of host:port"
+    )
+    parser.add_argument(
+        "--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL, metavar="SECONDS",
+        help="how often to check the data file for changes (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--all-regions", action="store_true",
+        help=f"serve every region instead of only {REGION}"
+    )
+    parser.add_argument(
+        "--approx-top-k", type=int, default=None, metavar="COUNTERS",
+        help="track customers with a fixed-size Space-Saving sketch of COUNTERS entries"
+    )
+    parser.add_argument(
+        "--hll-precision", type=int, default=None, metavar="P",
+        help="count daily unique customers with HyperLogLog sketches of precision P"
+    )
+    parser.add_argument(
+        "--encoding-fallback", action="store_true",
+        help="accept non-UTF-8 data: detect the encoding (UTF-8, cp1252, latin-1) and decode "
+             "stray bad bytes instead of failing (also SALES_ENCODING_FALLBACK=1)"
+    )
+
+
+def parse_args(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    parser = argparse.ArgumentParser(
+        description="Sales analytics pipeline",
+        epilog="Options go after the command, e.g. `main.py analyze --stream`."
+    )
+    # Only the options of the command being run are built, so their
+    # modules are the only ones imported. Without a subcommand, the
+    # options of `report` apply.
+    selected = argv[0] if argv and argv[0] in RUNNERS else None
+    if selected is None:
+        _add_pipeline_options(parser)
+        _add_report_options(parser)
+
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    for name, help_text in COMMANDS.items():
+        if name != selected:
+            # Listed for --help; clean/plot are dispatched by main() before parsing
+            commands.add_parser(name, help=help_text, add_help=False)
+            continue
+        command = commands.add_parser(name, help=help_text, description=help_text)
+        if name == "serve":
+            _add_serve_options(command)
+            continue
+        _add_pipeline_options(command)
+        if name == "analyze":
+            _add_analyze_options(command)
+        if name == "report":
+            _add_report_options(command)
+
+    args = parser.parse_args(argv)
+    if getattr(args, "save_cube", None) and args.dataset:
+        parser.error("--save-cube cannot be combined with --dataset")
+    if getattr(args, "customers", None) and (args.dataset or args.incremental or args.stream
+                                              or args.workers > 1):
+        parser.error("--customer needs the default mode (it keeps the validated transactions)")
+    return args
+
+
+def configure(args):
+    """
+    Applies the global options (decoding, backend, sketches, instrumentation).
+    """
+    from utils import instrumentation
+    from utils.aggregator import set_backend, set_top_k_capacity, set_unique_precision
+    from utils.file_handler import set_encoding_fallback
+
+    if args.encoding_fallback:
+        set_encoding_fallback(True)
+    if args.backend:
+        set_backend(args.backend)
+    if args.approx_top_k:
+        set_top_k_capacity(args.approx_top_k)
+    if args.hll_precision:
+        set_unique_precision(args.hll_precision)
+    if args.instrument or args.profile_stage:
+        instrumentation.enable(
+            fmt=args.instrument or "table", output=args.instrument_output,
+            profile_stage=args.profile_stage
+        )
+    else:
+        instrumentation.configure_from_env()
+
+
+def aggregate_sales(args):
+    """
+    STEPS 1-3: read, parse, validate and aggregate, in the mode chosen by
+    the options. Also saves the rollup cube when --save-cube is given.
+
+    Returns: tuple (SalesAggregate, valid transactions or None when the
+    mode does not keep them)
+    """
+    from utils.validator import log_filter_summary
+
+    valid_transactions = None
+    if args.dataset:
+        # === STEPS 1-3: Aggregate only the partitions the filters select ===
+        from utils.partitioned import PartitionedDataset
+
+        dataset = PartitionedDataset(args.dataset, cache_dir=args.dataset_cache)
+        aggregate, summary, info = dataset.aggregate(
+            region=REGION, min_amount=MIN_AMOUNT, date_from=args.date_from,
+            date_to=args.date_to, workers=args.workers
+        )
+        print(f"Partitioned dataset: {info['read']} files read, {info['skipped']} skipped")
+        log_filter_summary(summary, REGION, MIN_AMOUNT, log=print)
+    elif args.incremental:
+        # === STEPS 1-3: Aggregate only newly appended lines ===
+        from utils.incremental import incremental_sales_aggregate
+
+        aggregate, summary, info = incremental_sales_aggregate(
+            args.data, state_file=args.state_file, region=REGION, min_amount=MIN_AMOUNT
+        )
+        print(f"Incremental run ({info['mode']}): bytes {info['start_offset']}-{info['end_offset']}")
+        log_filter_summary(summary, REGION, MIN_AMOUNT, log=print)
+    elif args.workers > 1:
+        # === STEPS 1-3: Chunk the file and aggregate chunks in parallel ===
+        from utils.parallel import parallel_sales_aggregate
+
+        aggregate, summary = parallel_sales_aggregate(
+            args.data, workers=args.workers, region=REGION, min_amount=MIN_AMOUNT
+        )
+        log_filter_summary(summary, REGION, MIN_AMOUNT, log=print)
+    elif args.stream:
+        # === STEPS 1-3: Read, parse, validate and aggregate as one stream ===
+        from utils.pipeline import stream_sales_aggregate
+
+        aggregate, summary = stream_sales_aggregate(
+            args.data, region=REGION, min_amount=MIN_AMOUNT
+        )
+        log_filter_summary(summary, REGION, MIN_AMOUNT, log=print)
+    else:
+        from utils.aggregator import aggregate_transactions
+        from utils.parser import add_pushdown_counts, parse_sales_file
+        from utils.validator import validate_and_filter
+
+        # === STEP 1: Load and parse local sales data ===
+        # (the region and amount filters are pushed down into the parser)
+        pushdown = {}
+        transactions = parse_sales_file(
+            args.data, columnar=True, region=REGION, min_amount=MIN_AMOUNT, stats=pushdown
+        )
+
+        # === STEP 2: Validate and filter ===
+        # (logged once the pushdown counts are folded in)
+        valid_transactions, invalid_count, summary = validate_and_filter(
+            transactions, region=REGION, min_amount=MIN_AMOUNT, log=lambda message: None
+        )
+        add_pushdown_counts(summary, pushdown)
+        log_filter_summary(summary, REGION, MIN_AMOUNT, log=print)
+
+        # === STEP 3: Analytics (single pass, shared by every view) ===
+        aggregate = aggregate_transactions(valid_transactions)
+
+    if args.save_cube:
+        from utils.rollup_cube import RollupCube, build_rollup_cube
+
+        if valid_transactions is not None:
+            RollupCube().update(valid_transactions).save(args.save_cube)
+        else:
+            build_rollup_cube(args.data, region=REGION, min_amount=MIN_AMOUNT,
+                              cube_file=args.save_cube)
+        print(f"Rollup cube saved to {args.save_cube}")
+
+    return aggregate, valid_transactions
+
+
+def enrich_sales(aggregate, valid_transactions):
+    """
+    STEP 4: fetch the product catalog and match the sales against it.
+
+    When the catalog cannot be fetched (API unreachable, or offline with
+    nothing cached) the error is logged and every product is left
+    unmatched, so the report is still written, without enrichment.
+
+    Returns: EnrichmentResult
+    """
+    from utils import instrumentation
+    from utils.api_handler import fetch_products, requests
+    from utils.catalog_cache import CatalogCacheMiss
+    from utils.enrichment import CatalogIndex, enrich_transactions
+
+    with instrumentation.stage("fetch_products") as s:
+        try:
+            products, total = fetch_products(limit=100)
+        except CatalogCacheMiss as e:
+            print(f"Product catalog not cached (offline, {e}); continuing without enrichment")
+            products = []
+        except requests.RequestException as e:
+            print(f"Could not fetch the product catalog ({e}); continuing without enrichment")
+            products = []
+        s.rows_out = len(products)
+    catalog = CatalogIndex(products)
+    enrichment_source = valid_transactions if valid_transactions is not None else aggregate
+    return enrich_transactions(enrichment_source, catalog)
+
+
+def run_analyze(args):
+    from utils import instrumentation
+    from utils.data_processor import (
+        calculate_total_revenue,
+        region_wise_sales,
+        top_selling_products,
+        find_peak_sales_day,
+        low_performing_products,
+    )
+
+    aggregate, valid_transactions = aggregate_sales(args)
+    with instrumentation.stage("analytics_views", rows_in=aggregate.transaction_count):
+        total_revenue = calculate_total_revenue(aggregate)
+        region_summary = region_wise_sales(aggregate)
+        top_products = top_selling_products(aggregate, n=5)
+        peak_day = find_peak_sales_day(aggregate)
+        low_products = low_performing_products(aggregate, threshold=10)
+
+    print(f"\nTotal revenue: {total_revenue:,.2f} ({aggregate.transaction_count} transactions)")
+    print("\nRegion-wise sales:")
+    for region, stats in region_summary.items():
+        print(f"  {region}: {stats['total_sales']:,.2f} "
+              f"({stats['percentage']}%, {stats['transaction_count']} transactions)")
+    print("\nTop selling products:")
+    for product, qty, revenue in top_products:
+        print(f"  {product}: quantity={qty}, revenue={revenue:,.2f}")
+    if peak_day:
+        print(f"\nPeak sales day: {peak_day[0]} ({peak_day[1]:,.2f}, {peak_day[2]} transactions)")
+    if low_products:
+        print("\nLow performing products:")
+        for product, qty, revenue in low_products:
+            print(f"  {product}: quantity={qty}, revenue={revenue:,.2f}")
+    if args.customers:
+        print_customer_drill_downs(valid_transactions, args.customers)
+
+
+def print_customer_drill_downs(valid_transactions, customer_ids):
+    """
+    Prints the transactions of each customer. The table is indexed once,
+    so each drill-down costs time proportional to that customer's rows.
+    """
+    from utils.transaction_index import IndexedTransactions
+
+    index = IndexedTransactions(valid_transactions)
+    for customer_id in customer_ids:
+        rows = index.customer_transactions(customer_id)
+        if not len(rows):
+            print(f"\nCustomer {customer_id}: no transactions")
+            continue
+        spent = sum(row["Quantity"] * row["UnitPrice"] for row in rows)
+        print(f"\nCustomer {customer_id}: {len(rows)} transactions, {spent:,.2f} spent")
+        for row in rows:
+            print(f"  {row['Date']} {row['TransactionID']}: {row['ProductName']} "
+                  f"x{row['Quantity']} @ {row['UnitPrice']:,.2f}")
+
+
+def run_enrich(args):
+    aggregate, valid_transactions = aggregate_sales(args)
+    result = enrich_sales(aggregate, valid_transactions)
+
+    products = len(aggregate.product_stats)
+    print(f"\nProducts matched to the catalog: {len(result)} of {products}")
+    for method, count in result.match_counts.items():
+        print(f"  rows matched by {method}: {count}")
+    if result.unmatched:
+        print(f"Unmatched products: {', '.join(result.unmatched)}")
+
+
+def run_report(args):
+    from utils.report_generator import generate_sales_report
+
+    aggregate, valid_transactions = aggregate_sales(args)
+    enriched_transactions = enrich_sales(aggregate, valid_transactions)
 
     # === STEP 5: Generate Report ===
-    generate_sales_report(valid_transactions, enriched_transactions)
+    report_files = generate_sales_report(
+        aggregate, enriched_transactions, output_file=args.output,
+        formats=args.report_formats or ("txt",)
+    )
+    for path in report_files.values():
+        print(f"✅ Sales report generated at {path}")
+
+
+def run_serve(args):
+    from utils.aggregator import set_top_k_capacity, set_unique_precision
+    from utils.file_handler import set_encoding_fallback
+    from utils.sales_service import serve
+
+    if args.encoding_fallback:
+        set_encoding_fallback(True)
+    if args.approx_top_k:
+        set_top_k_capacity(args.approx_top_k)
+    if args.hll_precision:
+        set_unique_precision(args.hll_precision)
+    serve(args.data, host=args.host, port=args.port, socket_path=args.socket,
+          poll_interval=args.poll_interval, region=None if args.all_regions else REGION,
+          min_amount=MIN_AMOUNT)
+
+
+RUNNERS = {"analyze": run_analyze, "report": run_report, "enrich": run_enrich, "serve": run_serve}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in SCRIPT_COMMANDS:
+        script = importlib.import_module(SCRIPT_COMMANDS[argv[0]])
+        return script.main(argv[1:])
+
+    args = parse_args(argv)
+    if args.command == "serve":
+        # Runs until interrupted; the options of the other commands do not apply
+        return run_serve(args)
+    configure(args)
+    RUNNERS[args.command or "report"](args)
 
-    print("✅ Sales report generated at output/sales_report.txt")
+    from utils import instrumentation
+    instrumentation.report()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,89 @@
+import time
+
+import pytest
+import requests
+
+from benchmarks.stub_api import build_catalog, start_stub_server
+from utils.api_handler import ProductAPIClient
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**kwargs):
+        server, base_url = start_stub_server(build_catalog(products=5, extra=5), **kwargs)
+        servers.append(server)
+        return server.RequestHandlerClass.requests, base_url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _client(base_url, **kwargs):
+    kwargs.setdefault("backoff_factor", 0)
+    return ProductAPIClient(base_url, **kwargs)
+
+
+def test_429_and_5xx_are_retried(stub):
+    log, base_url = stub(failures=[429, 503])
+    with _client(base_url, max_retries=3) as client:
+        assert client.fetch_product_by_id(2)["id"] == 2
+    assert log == ["/products/2"] * 3
+
+
+def test_retries_give_up_with_the_last_error(stub):
+    log, base_url = stub(failures=[500] * 5)
+    with _client(base_url, max_retries=2) as client:
+        with pytest.raises(requests.HTTPError):
+            client.fetch_product_by_id(1)
+    assert len(log) == 3
+
+
+def test_other_errors_are_not_retried(stub):
+    log, base_url = stub(failures=[404])
+    with _client(base_url, max_retries=3) as client:
+        assert client.fetch_product_by_id(1) == {"message": "injected failure"}
+    assert len(log) == 1
+
+
+def test_backoff_is_capped_full_jitter():
+    client = ProductAPIClient("http://stub.invalid", backoff_factor=0.5, max_backoff=2.0)
+    for attempt in range(6):
+        delay = client._backoff(attempt)
+        assert 0 <= delay <= min(2.0, 0.5 * 2 ** attempt)
+    client.close()
+
+
+def test_read_timeout_is_retried_then_raised(stub):
+    log, base_url = stub(latency=0.5)
+    with _client(base_url, timeout=(1, 0.05), max_retries=1) as client:
+        with pytest.raises(requests.Timeout):
+            client.fetch_product_by_id(1)
+    assert len(log) == 2
+
+
+def test_batch_fetch_keeps_order_and_marks_missing_ids(stub):
+    _, base_url = stub()
+    with _client(base_url) as client:
+        products = client.fetch_products_by_ids([3, 999, 1, 10])
+    assert [p["id"] if p else None for p in products] == [3, None, 1, 10]
+    assert client.fetch_products_by_ids([]) == []
+
+
+def test_batch_fetch_runs_requests_concurrently(stub):
+    log, base_url = stub(latency=0.2)
+    with _client(base_url, max_workers=8) as client:
+        start = time.perf_counter()
+        products = client.fetch_products_by_ids(range(1, 9))
+        elapsed = time.perf_counter() - start
+    assert all(products) and len(log) == 8
+    assert elapsed < 8 * 0.2 / 2
+
+
+def test_batch_fetch_returns_none_after_failed_retries(stub):
+    _, base_url = stub(failures=[503] * 2)
+    with _client(base_url, max_retries=1, max_workers=1) as client:
+        assert client.fetch_products_by_ids([1, 2]) == [None, build_catalog(5, 5)[1]]
@@ -0,0 +1,133 @@
+import threading
+import time
+
+import pytest
+
+from benchmarks.stub_api import build_catalog, start_stub_server
+from utils import api_handler
+from utils.catalog_cache import FRESH, MISS, STALE, CatalogCache, CatalogCacheMiss
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def _fetcher(value, calls):
+    def fetch():
+        calls.append(value)
+        return value, True
+    return fetch
+
+
+def test_entries_expire_after_their_ttl(tmp_path):
+    cache = CatalogCache(str(tmp_path / "cache.sqlite"), stale_ttl=0)
+    cache.set("fresh", 1, ttl=60)
+    cache.set("expired", 2, ttl=-1)
+    assert cache.get("fresh") == (1, FRESH)
+    assert cache.get("expired") == (None, MISS)
+
+    calls = []
+    assert cache.get_or_fetch("expired", _fetcher(3, calls)) == 3
+    assert calls == [3]
+    assert cache.get("expired") == (3, FRESH)
+    assert cache.stats["misses"] == cache.stats["fetches"] == 1
+
+
+def test_stale_entries_are_served_while_refreshing_in_the_background(tmp_path):
+    cache = CatalogCache(str(tmp_path / "cache.sqlite"), stale_ttl=60)
+    cache.set("key", "old", ttl=-1)
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        return "new", True
+
+    assert cache.get_or_fetch("key", fetch) == "old"
+    # Only one refresh per key is in flight
+    assert cache.get_or_fetch("key", fetch) == "old"
+    release.set()
+    _wait_for(lambda: cache.stats["refreshes"] == 1)
+    assert cache.get("key") == ("new", FRESH)
+    assert cache.stats["stale_hits"] == 2
+
+
+def test_failed_refresh_keeps_the_stale_value(tmp_path):
+    cache = CatalogCache(str(tmp_path / "cache.sqlite"), stale_ttl=60)
+    cache.set("key", "old", ttl=-1)
+
+    def fetch():
+        raise OSError("network down")
+
+    assert cache.get_or_fetch("key", fetch) == "old"
+    _wait_for(lambda: cache.stats["refresh_errors"] == 1)
+    assert cache.get("key") == ("old", STALE)
+
+
+def test_offline_mode_serves_any_cached_entry_and_never_fetches(tmp_path):
+    cache = CatalogCache(str(tmp_path / "cache.sqlite"), stale_ttl=0, offline=True)
+    cache.set("key", "old", ttl=-1)
+    calls = []
+    assert cache.get_or_fetch("key", _fetcher("new", calls)) == "old"
+    with pytest.raises(CatalogCacheMiss):
+        cache.get_or_fetch("other", _fetcher("new", calls))
+    assert calls == []
+
+
+def test_sales_api_offline_uses_the_persistent_cache(tmp_path, monkeypatch):
+    server, base_url = start_stub_server(build_catalog(products=5, extra=0))
+    monkeypatch.setenv("SALES_API_BASE_URL", base_url)
+    monkeypatch.setenv("SALES_CATALOG_CACHE", str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(api_handler, "_default_client", None)
+    try:
+        assert api_handler.fetch_product_by_id(1)["id"] == 1
+        api_handler.get_default_client().close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    monkeypatch.setenv("SALES_API_OFFLINE", "1")
+    monkeypatch.setattr(api_handler, "_default_client", None)
+    try:
+        assert api_handler.fetch_product_by_id(1)["id"] == 1
+        with pytest.raises(CatalogCacheMiss):
+            api_handler.fetch_product_by_id(2)
+        assert api_handler.fetch_products_by_ids([1, 2])[1] is None
+    finally:
+        api_handler.get_default_client().close()
+
+
+def test_memory_tier_evicts_least_recently_used(tmp_path):
+    cache = CatalogCache(str(tmp_path / "cache.sqlite"), memory_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert list(cache._memory) == ["a", "c"]
+
+    # Evicted entries are still on disk
+    assert cache.get("b") == (2, FRESH)
+    assert cache.stats["disk_hits"] == 1
+    assert list(cache._memory) == ["c", "b"]
+
+
+def test_memory_only_cache_forgets_evicted_entries():
+    cache = CatalogCache(None, memory_size=1)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == (None, MISS)
+    assert cache.get("b") == (2, FRESH)
+
+
+def test_counters_are_exact_under_concurrent_access():
+    cache = CatalogCache(None)
+    cache.set("key", 1)
+    threads = [threading.Thread(target=lambda: [cache.get_or_fetch("key", None) for _ in range(2000)])
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.stats["hits"] == 8 * 2000
@@ -0,0 +1,122 @@
+import pytest
+
+from benchmarks.generate_data import generate_sales_file
+from utils import data_processor
+from utils.aggregator import aggregate_transactions
+from utils.file_handler import read_sales_data
+from utils.parser import parse_transactions
+
+# The per-function loops data_processor used before the views moved onto
+# SalesAggregate, kept as the reference outputs.
+
+
+def _rows(transactions):
+    for t in transactions:
+        try:
+            qty = int(t.get("Quantity", 0))
+            price = float(t.get("UnitPrice", 0.0))
+        except (ValueError, TypeError):
+            continue
+        yield t, qty, qty * price
+
+
+def _old_region_wise_sales(transactions):
+    stats, total = {}, 0.0
+    for t, _, revenue in _rows(transactions):
+        s = stats.setdefault(t.get("Region", "Unknown"), {"total_sales": 0.0, "transaction_count": 0})
+        s["total_sales"] += revenue
+        s["transaction_count"] += 1
+        total += revenue
+    for s in stats.values():
+        s["percentage"] = round((s["total_sales"] / total) * 100, 2) if total > 0 else 0.0
+    return dict(sorted(stats.items(), key=lambda x: x[1]["total_sales"], reverse=True))
+
+
+def _old_product_stats(transactions):
+    stats = {}
+    for t, qty, revenue in _rows(transactions):
+        s = stats.setdefault(t.get("ProductName", "Unknown"), [0, 0.0])
+        s[0] += qty
+        s[1] += revenue
+    return [(product, q, r) for product, (q, r) in stats.items()]
+
+
+def _old_top_selling_products(transactions, n=5):
+    return sorted(_old_product_stats(transactions), key=lambda x: x[1], reverse=True)[:n]
+
+
+def _old_low_performing_products(transactions, threshold=10):
+    return sorted([p for p in _old_product_stats(transactions) if p[1] < threshold], key=lambda x: x[1])
+
+
+def _old_customer_analysis(transactions):
+    stats = {}
+    for t, _, revenue in _rows(transactions):
+        s = stats.setdefault(t.get("CustomerID", "Unknown"),
+                             {"total_spent": 0.0, "purchase_count": 0, "products_bought": set()})
+        s["total_spent"] += revenue
+        s["purchase_count"] += 1
+        s["products_bought"].add(t.get("ProductName", "Unknown"))
+    for s in stats.values():
+        s["avg_order_value"] = round(s["total_spent"] / s["purchase_count"], 2)
+        s["products_bought"] = sorted(s["products_bought"])
+    return dict(sorted(stats.items(), key=lambda x: x[1]["total_spent"], reverse=True))
+
+
+def _old_daily_sales_trend(transactions):
+    stats = {}
+    for t, _, revenue in _rows(transactions):
+        s = stats.setdefault(t.get("Date", "Unknown"),
+                             {"revenue": 0.0, "transaction_count": 0, "unique_customers": set()})
+        s["revenue"] += revenue
+        s["transaction_count"] += 1
+        s["unique_customers"].add(t.get("CustomerID", "Unknown"))
+    for s in stats.values():
+        s["unique_customers"] = len(s["unique_customers"])
+    return dict(sorted(stats.items()))
+
+
+def _old_find_peak_sales_day(transactions):
+    daily = _old_daily_sales_trend(transactions)
+    if not daily:
+        return None
+    date, s = max(daily.items(), key=lambda x: x[1]["revenue"])
+    return (date, s["revenue"], s["transaction_count"])
+
+
+@pytest.fixture(scope="module")
+def transactions(tmp_path_factory):
+    path = tmp_path_factory.mktemp("data") / "sales.txt"
+    # Few products and small quantities, so top-N and threshold views have ties
+    generate_sales_file(str(path), 2000, products=12, customers=150, days=20, seed=11)
+    rows = parse_transactions(read_sales_data(str(path)))
+    rows.append(dict(rows[0], Quantity="n/a"))
+    return rows
+
+
+def _customers(result):
+    return {k: dict(v, products_bought=sorted(v["products_bought"])) for k, v in result.items()}
+
+
+@pytest.mark.parametrize("source", ["rows", "aggregate"])
+def test_views_match_the_original_loops(transactions, source):
+    data = transactions if source == "rows" else aggregate_transactions(transactions)
+    assert data_processor.calculate_total_revenue(data) == sum(r for _, _, r in _rows(transactions))
+    assert data_processor.region_wise_sales(data) == _old_region_wise_sales(transactions)
+    for n in (1, 5, 50):
+        assert data_processor.top_selling_products(data, n) == _old_top_selling_products(transactions, n)
+    for threshold in (0, 10, 10 ** 6):
+        assert (data_processor.low_performing_products(data, threshold)
+                == _old_low_performing_products(transactions, threshold))
+    customers = data_processor.customer_analysis(data)
+    assert list(customers) == list(_old_customer_analysis(transactions))
+    assert _customers(customers) == _old_customer_analysis(transactions)
+    assert data_processor.daily_sales_trend(data) == _old_daily_sales_trend(transactions)
+    assert data_processor.find_peak_sales_day(data) == _old_find_peak_sales_day(transactions)
+
+
+def test_views_of_no_transactions():
+    assert data_processor.calculate_total_revenue([]) == 0.0
+    assert data_processor.region_wise_sales([]) == {}
+    assert data_processor.top_selling_products([]) == []
+    assert data_processor.find_peak_sales_day([]) is None
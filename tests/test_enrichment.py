@@ -0,0 +1,46 @@
+from utils.aggregator import aggregate_transactions
+from utils.enrichment import CatalogIndex, enrich_transactions
+
+
+def test_accessory_does_not_match_its_base_product():
+    index = CatalogIndex([{"id": 1, "title": "Laptop"}])
+    assert index.match("Laptop Charger") == (None, None)
+
+
+def test_accessory_stays_in_unmatched_products():
+    index = CatalogIndex([{"id": 1, "title": "Laptop"}])
+    result = enrich_transactions([{"ProductID": "P999", "ProductName": "Laptop Charger"}], index)
+    assert result.unmatched == ["Laptop Charger"]
+    assert result.matched == {}
+
+
+def test_more_specific_catalog_title_still_matches():
+    index = CatalogIndex([{"id": 1, "title": "Wireless Mouse"}])
+    product, method = index.match("Mouse")
+    assert (product["id"], method) == (1, "fuzzy")
+
+
+def test_product_id_digits_are_not_a_catalog_id():
+    # DummyJSON ids are unrelated to the sales ProductIDs
+    index = CatalogIndex([{"id": 101, "title": "Garden Hose"}, {"id": 7, "title": "Monitor"}])
+    result = enrich_transactions([{"ProductID": "P101", "ProductName": "Monitor"}], index)
+    assert result.transactions[0]["API_ID"] == 7
+    assert result.transactions[0]["API_Match"] == "title"
+
+
+def test_aggregate_and_transactions_enrich_the_same_way():
+    index = CatalogIndex([{"id": 101, "title": "Webcam"}, {"id": 2, "title": "Wireless Mouse"},
+                          {"id": 3, "title": "Laptop"}])
+    transactions = [
+        {"TransactionID": "T1", "Date": "2024-12-01", "ProductID": "P101", "ProductName": "Mouse",
+         "Quantity": 1, "UnitPrice": 10.0, "CustomerID": "C1", "Region": "North"},
+        {"TransactionID": "T2", "Date": "2024-12-01", "ProductID": "P3", "ProductName": "Laptop Charger",
+         "Quantity": 2, "UnitPrice": 5.0, "CustomerID": "C2", "Region": "South"},
+        {"TransactionID": "T3", "Date": "2024-12-02", "ProductID": "P9", "ProductName": "Webcam",
+         "Quantity": 1, "UnitPrice": 30.0, "CustomerID": "C1", "Region": "North"},
+    ]
+    from_rows = enrich_transactions(transactions, index)
+    from_aggregate = enrich_transactions(aggregate_transactions(transactions), index)
+    assert from_rows.matched == from_aggregate.matched
+    assert from_rows.unmatched == from_aggregate.unmatched == ["Laptop Charger"]
+    assert {name: p["id"] for name, p in from_rows.matched.items()} == {"Mouse": 2, "Webcam": 101}
@@ -0,0 +1,60 @@
+import pytest
+
+from utils import file_handler
+from utils.file_handler import (detect_encoding, iter_sales_data, read_sales_data,
+                                read_sales_data_with_fallback, sniff_encoding)
+from utils.parallel import parallel_sales_aggregate
+from utils.pipeline import stream_sales_aggregate
+
+HEADER = b"TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n"
+
+
+def _rows(n, name=b"Mouse"):
+    return b"".join(b"T%03d|2024-12-01|P101|%s|2|600|C001|North\n" % (i, name) for i in range(n))
+
+
+@pytest.fixture
+def mixed_file(tmp_path):
+    # UTF-8 file with one stray latin-1 byte past the detection sample
+    path = tmp_path / "sales.txt"
+    path.write_bytes(HEADER + _rows(3000) + _rows(1, b"Caf\xe9") + _rows(10))
+    return str(path)
+
+
+def test_strict_utf8_is_the_default(mixed_file):
+    with pytest.raises(UnicodeDecodeError):
+        read_sales_data(mixed_file)
+    with pytest.raises(UnicodeDecodeError):
+        list(iter_sales_data(mixed_file))
+    assert sniff_encoding(mixed_file) == ("utf-8", "strict")
+
+
+def test_fallback_decodes_stray_bytes(mixed_file, monkeypatch):
+    lines = read_sales_data(mixed_file, fallback=True)
+    assert len(lines) == 3012 and "|Café|" in lines[3001]
+
+    monkeypatch.setattr(file_handler, "_fallback", True)
+    assert list(iter_sales_data(mixed_file)) == lines
+    assert sniff_encoding(mixed_file) == ("utf-8", file_handler.FALLBACK_ERRORS)
+
+
+def test_byte_range_readers_decode_like_the_streaming_reader(mixed_file, monkeypatch):
+    monkeypatch.setattr(file_handler, "_fallback", True)
+    expected, _ = stream_sales_aggregate(mixed_file)
+    aggregate, _ = parallel_sales_aggregate(mixed_file, workers=2)
+    assert list(aggregate.product_stats) == list(expected.product_stats) == ["Mouse", "Café"]
+
+
+def test_cp1252_is_detected_before_latin1():
+    assert detect_encoding(b"Price \x80 5") == "cp1252"
+    # 0x81 is undefined in cp1252
+    assert detect_encoding(b"Price \x81 5") == "latin-1"
+    assert detect_encoding("Café".encode("utf-8")) == "utf-8"
+
+
+def test_cp1252_file_is_read_with_fallback(tmp_path):
+    path = tmp_path / "sales.txt"
+    path.write_bytes(HEADER + _rows(2, "Café €".encode("cp1252")))
+    lines = read_sales_data(str(path), fallback=True)
+    assert "|Café €|" in lines[1]
+    assert read_sales_data_with_fallback(str(path))[0].split("|")[3] == "Café €"
@@ -0,0 +1,95 @@
+import random
+from collections import Counter
+
+import pytest
+
+from utils.aggregator import SalesAggregate, aggregate_transactions
+from utils.heavy_hitters import SpaceSaving, capacity_for_error
+
+
+def _stream(n, keys=2000, seed=1):
+    # Zipf-like weighted stream: a few heavy keys, a long tail
+    rng = random.Random(seed)
+    weights = [1 / (k + 1) ** 1.1 for k in range(keys)]
+    return [(f"C{k}", rng.randint(1, 100))
+            for k in rng.choices(range(keys), weights=weights, k=n)]
+
+
+def _totals(stream):
+    totals = Counter()
+    for key, weight in stream:
+        totals[key] += weight
+    return totals
+
+
+def _check_guarantees(sketch, totals):
+    total = sum(totals.values())
+    assert sketch.total == total
+    assert sketch.error_bound() <= total / sketch.capacity
+    for key, count, error, _ in sketch.top(len(sketch)):
+        assert count - error <= totals[key] <= count
+        assert count - totals[key] <= sketch.error_bound()
+    # Every key above the W / capacity threshold is tracked
+    heavy = {key for key, weight in totals.items() if weight > total / sketch.capacity}
+    assert heavy and heavy <= set(sketch.counters)
+
+
+@pytest.mark.parametrize("capacity", [10, 50, 200])
+def test_estimates_stay_within_the_error_bound(capacity):
+    stream = _stream(20000)
+    sketch = SpaceSaving(capacity)
+    for key, weight in stream:
+        sketch.update(key, weight)
+    assert len(sketch) == capacity
+    _check_guarantees(sketch, _totals(stream))
+
+
+def test_merged_sketches_keep_the_guarantees():
+    stream = _stream(20000)
+    parts = [stream[:7000], stream[7000:15000], stream[15000:]]
+    sketches = []
+    for part in parts:
+        sketch = SpaceSaving(50)
+        for key, weight in part:
+            sketch.update(key, weight)
+        sketches.append(sketch)
+    merged = sketches[0].copy().merge(sketches[1]).merge(sketches[2])
+    _check_guarantees(merged, _totals(stream))
+    # copy() left the first partial as it was
+    assert sketches[0].total == sum(w for _, w in parts[0])
+
+
+def test_guaranteed_top_is_the_exact_ranking():
+    stream = _stream(20000)
+    totals = _totals(stream)
+    sketch = SpaceSaving(capacity_for_error(0.01))
+    for key, weight in stream:
+        sketch.update(key, weight)
+    guaranteed = [key for key, _, _, _ in sketch.guaranteed_top(10)]
+    assert guaranteed
+    assert guaranteed == [key for key, _ in totals.most_common(len(guaranteed))]
+
+
+def test_small_streams_are_counted_exactly():
+    stream = _stream(500, keys=30)
+    sketch = SpaceSaving(30)
+    for key, weight in stream:
+        sketch.update(key, weight)
+    assert sketch.error_bound() == 0
+    assert {key: count for key, count, _, _ in sketch.top(30)} == _totals(stream)
+
+
+def test_approximate_top_customers_bound_the_exact_ones():
+    transactions = [
+        {"TransactionID": f"T{i}", "Date": "2024-12-01", "ProductID": "P101",
+         "ProductName": "Mouse", "Quantity": "1", "UnitPrice": str(weight),
+         "CustomerID": key, "Region": "North"}
+        for i, (key, weight) in enumerate(_stream(5000, keys=500))
+    ]
+    exact = aggregate_transactions(transactions)
+    approximate = SalesAggregate(top_k_capacity=40).update(transactions)
+    spent = {c: s for c, s, _ in exact.top_customers(len(exact.customer_stats))}
+    bound = approximate.top_customers_error_bound()
+    assert 0 < bound <= exact.total_revenue / 40
+    for customer_id, estimate, _ in approximate.top_customers(10):
+        assert spent[customer_id] <= estimate <= spent[customer_id] + bound
@@ -0,0 +1,57 @@
+import pytest
+
+from utils.aggregator import SalesAggregate
+from utils.hyperloglog import HyperLogLog
+
+
+def _ids(start, stop):
+    return [f"C{i:06d}" for i in range(start, stop)]
+
+
+@pytest.mark.parametrize("precision", [8, 12, 14])
+@pytest.mark.parametrize("distinct", [100, 5000, 50000])
+def test_estimate_is_within_the_relative_error(precision, distinct):
+    sketch = HyperLogLog(precision, _ids(0, distinct))
+    # Repeated values do not change the estimate
+    before = sketch.estimate()
+    sketch.update(_ids(0, distinct // 2))
+    assert sketch.estimate() == before
+    # Four standard errors: a fixed hash makes this deterministic, not flaky
+    assert abs(before - distinct) <= 4 * sketch.relative_error() * distinct
+
+
+def test_merge_is_the_sketch_of_the_union():
+    first, second = HyperLogLog(12, _ids(0, 6000)), HyperLogLog(12, _ids(4000, 10000))
+    union = HyperLogLog(12, _ids(0, 10000))
+    assert HyperLogLog.union([first, second]).registers == union.registers
+    assert first.copy().merge(second).registers == union.registers
+    assert abs(len(union) - 10000) <= 4 * union.relative_error() * 10000
+    # union() copied, so the inputs are unchanged
+    assert first.registers == HyperLogLog(12, _ids(0, 6000)).registers
+
+
+def test_round_trip_and_precision_checks():
+    sketch = HyperLogLog(10, _ids(0, 300))
+    assert HyperLogLog.from_dict(sketch.to_dict()).registers == sketch.registers
+    with pytest.raises(ValueError, match="different precision"):
+        sketch.merge(HyperLogLog(12))
+    with pytest.raises(ValueError, match="precision"):
+        HyperLogLog(3)
+
+
+def test_daily_unique_customers_are_estimated():
+    transactions = [
+        {"TransactionID": f"T{i}", "Date": f"2024-12-{i % 2 + 1:02d}", "ProductID": "P101",
+         "ProductName": "Mouse", "Quantity": "1", "UnitPrice": "100",
+         "CustomerID": f"C{i % 3000}", "Region": "North"}
+        for i in range(12000)
+    ]
+    exact = SalesAggregate(unique_precision=0).update(transactions)
+    approximate = SalesAggregate(unique_precision=12).update(transactions)
+    error = HyperLogLog(12).relative_error()
+    for date, stats in approximate.daily_summary().items():
+        expected = exact.daily_summary()[date]["unique_customers"]
+        assert expected == 1500
+        assert abs(stats["unique_customers"] - expected) <= 4 * error * expected
+    assert abs(approximate.unique_customers() - 3000) <= 4 * error * 3000
+    assert exact.unique_customers() == 3000
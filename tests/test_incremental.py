@@ -0,0 +1,77 @@
+import main
+from utils import incremental
+from utils.incremental import fingerprint_matches, incremental_sales_aggregate, prefix_fingerprint
+from utils.pipeline import stream_sales_aggregate
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n"
+
+
+def _row(i, quantity=2, region="South"):
+    return f"T{i:04d}|2024-12-{i % 28 + 1:02d}|P{100 + i % 7}|Item {i % 7}|{quantity}|{250 + i}|C{i % 13:03d}|{region}\n"
+
+
+def _write(path, lines):
+    path.write_text("".join(lines), encoding="utf-8")
+
+
+def _run(data, state):
+    return incremental_sales_aggregate(str(data), state_file=str(state), region="South", min_amount=500)
+
+
+def test_append_is_processed_incrementally(tmp_path):
+    data, state = tmp_path / "sales.txt", tmp_path / "state.json"
+    lines = [HEADER] + [_row(i) for i in range(50)]
+    _write(data, lines)
+    _run(data, state)
+
+    _write(data, lines + [_row(i) for i in range(50, 60)])
+    aggregate, summary, info = _run(data, state)
+    expected, expected_summary = stream_sales_aggregate(str(data), region="South", min_amount=500)
+    assert info["mode"] == "incremental"
+    assert aggregate.to_dict() == expected.to_dict()
+    assert summary["final_count"] == expected_summary["final_count"]
+
+
+def test_incremental_mode_matches_the_default_mode_after_each_append(tmp_path):
+    data, state = tmp_path / "sales.txt", tmp_path / "state.json"
+    lines = [HEADER] + [_row(i, region=("South", "North")[i % 2]) for i in range(90)]
+    common = ["analyze", "--data", str(data), "--state-file", str(state)]
+    checkpointed = []
+    # The last chunk leaves the final line unterminated
+    for end in (31, 60, 91):
+        text = "".join(lines[:end])
+        data.write_text(text if end < len(lines) else text.rstrip("\n"), encoding="utf-8")
+        aggregate, _ = main.aggregate_sales(main.parse_args(common + ["--incremental"]))
+        expected, _ = main.aggregate_sales(main.parse_args(common))
+        assert aggregate.to_dict() == expected.to_dict()
+        checkpointed.append(incremental.load_state(str(state))["offset"] == data.stat().st_size)
+    assert checkpointed == [True, True, False]
+
+
+def test_same_length_rewrite_in_the_middle_forces_a_rebuild(tmp_path, monkeypatch):
+    # Small blocks, so the rewritten row is neither in the first nor the last one
+    monkeypatch.setattr(incremental, "FINGERPRINT_BLOCK", 256)
+    data, state = tmp_path / "sales.txt", tmp_path / "state.json"
+    lines = [HEADER] + [_row(i) for i in range(200)]
+    _write(data, lines)
+    _run(data, state)
+
+    lines[100] = _row(99, quantity=9)
+    assert len(lines[100]) == len(_row(99))
+    _write(data, lines)
+    aggregate, _, info = _run(data, state)
+    expected, _ = stream_sales_aggregate(str(data), region="South", min_amount=500)
+    assert info["mode"] == "full"
+    assert aggregate.to_dict() == expected.to_dict()
+
+
+def test_extended_fingerprint_equals_a_fresh_one(tmp_path, monkeypatch):
+    monkeypatch.setattr(incremental, "FINGERPRINT_BLOCK", 100)
+    data = tmp_path / "sales.txt"
+    _write(data, [HEADER] + [_row(i) for i in range(30)])
+    size = data.stat().st_size
+    for offset in (0, 99, 100, 250, size):
+        for end in (offset, size):
+            previous = prefix_fingerprint(str(data), offset)
+            assert fingerprint_matches(str(data), offset, previous)
+            assert prefix_fingerprint(str(data), end, previous) == prefix_fingerprint(str(data), end)
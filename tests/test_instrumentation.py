@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+
+from utils import instrumentation
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_loads_no_profiling_modules_and_reads_no_environment():
+    code = (
+        "import sys, utils.instrumentation as i\n"
+        "# Lazy modules stay _LazyModule instances until first used\n"
+        "loaded = [m for m in ('cProfile', 'pstats', 'tracemalloc', 'json')\n"
+        "          if m in sys.modules and type(sys.modules[m]).__name__ != '_LazyModule']\n"
+        "print(loaded, i.enabled())\n"
+    )
+    env = dict(os.environ, SALES_INSTRUMENT="jsonl")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[] False"
+
+
+def test_enabled_stages_record_time_and_memory(tmp_path, monkeypatch):
+    monkeypatch.setenv("SALES_INSTRUMENT", "jsonl")
+    monkeypatch.setenv("SALES_PROFILE_STAGE", "build")
+    instrumentation.reset()
+    try:
+        instrumentation.configure_from_env()
+        instrumentation._state.profile_dir = str(tmp_path)
+        with instrumentation.stage("build", rows_in=3) as s:
+            s.rows_out = len([0] * 1000)
+        record, = instrumentation.records()
+        assert (record["stage"], record["rows_in"], record["rows_out"]) == ("build", 3, 1000)
+        assert record["tracemalloc_peak_bytes"] > 0
+        assert (tmp_path / "profile_build.prof").exists()
+    finally:
+        instrumentation.disable()
+        instrumentation.reset()
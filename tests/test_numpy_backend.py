@@ -0,0 +1,59 @@
+import pytest
+
+from benchmarks.generate_data import generate_sales_file
+from utils import aggregator
+from utils.aggregator import SalesAggregate
+from utils.file_handler import read_sales_data
+from utils.parser import parse_transactions
+
+np = pytest.importorskip("numpy")
+from utils import numpy_backend  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def lines(tmp_path_factory):
+    path = tmp_path_factory.mktemp("data") / "sales.txt"
+    generate_sales_file(str(path), 5000, products=30, customers=400, days=60, seed=7)
+    return read_sales_data(str(path))
+
+
+def _exact():
+    return SalesAggregate(top_k_capacity=0, unique_precision=0)
+
+
+@pytest.mark.parametrize("columnar", [False, True], ids=["dicts", "table"])
+def test_numpy_aggregate_matches_python(lines, columnar):
+    transactions = parse_transactions(lines, columnar=columnar)
+    expected = _exact().update(transactions)
+    result = numpy_backend.aggregate_into(_exact(), transactions)
+    assert result.to_dict() == expected.to_dict()
+
+
+def test_numpy_drops_non_numeric_rows_like_python(lines):
+    transactions = parse_transactions(lines[:200])
+    transactions[5] = dict(transactions[5], Quantity="many")
+    transactions[9] = dict(transactions[9], UnitPrice=None)
+    expected = _exact().update(transactions)
+    assert numpy_backend.aggregate_into(_exact(), transactions).to_dict() == expected.to_dict()
+
+
+def test_numpy_views_match_python(lines, monkeypatch):
+    aggregate = _exact().update(parse_transactions(lines, columnar=True))
+    views = [("top_products", (7,)), ("top_products", (100,)), ("low_products", (200,)),
+             ("top_customers", (10,)), ("top_customers", (1000,))]
+    monkeypatch.setattr(aggregator, "_backend", "python")
+    expected = [getattr(aggregate, name)(*args) for name, args in views]
+    monkeypatch.setattr(aggregator, "_backend", "numpy")
+    assert [getattr(aggregate, name)(*args) for name, args in views] == expected
+
+
+def test_group_sets_without_combined_pair_codes(lines, monkeypatch):
+    # Forces the stacked-pairs path taken when key * member could overflow int64
+    transactions = parse_transactions(lines, columnar=True)
+    expected = numpy_backend.aggregate_into(_exact(), transactions).to_dict()
+    monkeypatch.setattr(numpy_backend, "_MAX_PAIR_CODE", 0)
+    assert numpy_backend.aggregate_into(_exact(), transactions).to_dict() == expected
+
+    keys = np.array([0, 2, 0, 1, 2], dtype=np.int64)
+    codes = np.array([2, 1, 2, 0, 1], dtype=np.int64)
+    assert numpy_backend._group_sets(keys, codes, 3, 3, ["a", "b", "c"]) == [{"c"}, {"a"}, {"b"}]
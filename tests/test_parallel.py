@@ -0,0 +1,61 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pytest
+
+import main
+from benchmarks.generate_data import generate_sales_file
+from utils import aggregator, parallel
+from utils.hyperloglog import HyperLogLog
+from utils.parallel import parallel_sales_aggregate, split_file_ranges
+from utils.pipeline import stream_sales_aggregate
+
+
+@pytest.fixture(scope="module")
+def data(tmp_path_factory):
+    path = tmp_path_factory.mktemp("data") / "sales.txt"
+    generate_sales_file(str(path), 3000, products=20, customers=300, days=30, seed=3)
+    return str(path)
+
+
+def test_ranges_start_on_line_boundaries(data):
+    ranges = split_file_ranges(data, 7)
+    content = open(data, "rb").read()
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(content)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start and content[start - 1:start] == b"\n"
+
+
+@pytest.mark.parametrize("workers", [2, 3, 8])
+def test_workers_mode_matches_the_single_process_modes(data, workers):
+    args = main.parse_args(["analyze", "--data", data, "--workers", str(workers)])
+    aggregate, _ = main.aggregate_sales(args)
+    expected, _ = main.aggregate_sales(main.parse_args(["analyze", "--data", data]))
+    assert aggregate.to_dict() == expected.to_dict()
+
+    aggregate, summary = parallel_sales_aggregate(data, workers=workers, min_amount=100)
+    expected, expected_summary = stream_sales_aggregate(data, min_amount=100)
+    assert aggregate.to_dict() == expected.to_dict()
+    assert summary == expected_summary
+
+
+def test_spawned_workers_use_the_callers_approximation_settings(data, monkeypatch):
+    monkeypatch.setattr(aggregator, "_top_k_capacity", 25)
+    monkeypatch.setattr(aggregator, "_unique_precision", 10)
+    # Spawned workers import utils.aggregator afresh, with the default settings
+    spawn = multiprocessing.get_context("spawn")
+    monkeypatch.setattr(parallel, "ProcessPoolExecutor", partial(ProcessPoolExecutor, mp_context=spawn))
+    partials = []
+    merge = aggregator.SalesAggregate.merge
+    monkeypatch.setattr(aggregator.SalesAggregate, "merge",
+                        lambda self, other: partials.append(other) or merge(self, other))
+
+    aggregate, summary = parallel_sales_aggregate(data, workers=2, min_amount=100)
+    assert partials
+    for partial_aggregate in [aggregate] + partials:
+        assert partial_aggregate.approximate and partial_aggregate.customer_sketch.capacity == 25
+        assert not partial_aggregate.customer_stats
+        assert all(isinstance(stats[2], HyperLogLog) and stats[2].precision == 10
+                   for stats in partial_aggregate.daily_stats.values())
+    assert aggregate.transaction_count == summary["final_count"]
@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+from utils import parse_cache, parser
+from utils.file_handler import read_sales_data
+from utils.parser import parse_sales_file, parse_transactions
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n"
+ROWS = [
+    "T001|2024-12-01|P101|Laptop|2|45000|C001|South\n",
+    "T002|2024-12-01|P102|Mouse|1|300|C002|North\n",
+    "T003|2024-12-02|P103|Monitor|1|12000|C003|South\n",
+]
+
+
+@pytest.fixture
+def sales_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("SALES_PARSE_CACHE", "1")
+    path = tmp_path / "sales.txt"
+    path.write_text(HEADER + "".join(ROWS), encoding="utf-8")
+    return str(path)
+
+
+def _ids(table):
+    return [row["TransactionID"] for row in table]
+
+
+def test_hit_skips_reading_the_file(sales_file, monkeypatch):
+    first = parse_sales_file(sales_file, columnar=True)
+    assert os.path.exists(parse_cache.cache_path_for(sales_file))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("file read on a cache hit")
+
+    monkeypatch.setattr(parser, "read_sales_data", fail)
+    cached = parse_sales_file(sales_file, columnar=True)
+    assert cached.to_dicts() == first.to_dicts()
+    assert cached.to_dicts() == parse_transactions(read_sales_data(sales_file))
+
+
+def test_filters_apply_to_cached_tables(sales_file):
+    parse_sales_file(sales_file)
+    stats = {}
+    rows = parse_sales_file(sales_file, region="South", min_amount=20000, stats=stats)
+    assert _ids(rows) == ["T001"]
+    assert stats == {"skipped_by_region": 2, "skipped_by_amount": 1}
+
+
+def test_appended_file_is_parsed_again(sales_file):
+    parse_sales_file(sales_file)
+    with open(sales_file, "a", encoding="utf-8") as f:
+        f.write("T004|2024-12-03|P104|Webcam|1|2500|C004|East\n")
+    assert _ids(parse_sales_file(sales_file))[-1] == "T004"
+
+
+def test_touched_file_hits_through_the_content_hash(sales_file, monkeypatch):
+    parse_sales_file(sales_file)
+    st = os.stat(sales_file)
+    os.utime(sales_file, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    monkeypatch.setattr(parser, "read_sales_data", None)
+    assert len(parse_sales_file(sales_file)) == 4  # header row included, as in parse_transactions
+
+
+def test_file_changed_while_read_is_not_cached(sales_file):
+    def read_and_parse(digest):
+        table = parser._parse_table(read_sales_data(sales_file, digest=digest))
+        with open(sales_file, "a", encoding="utf-8") as f:
+            f.write("T004|2024-12-03|P104|Webcam|1|2500|C004|East\n")
+        return table
+
+    table = parse_cache.cached_parse(sales_file, read_and_parse)
+    assert len(table) == 4
+    assert not os.path.exists(parse_cache.cache_path_for(sales_file))
+
+
+def test_cache_dir_keeps_the_source_directory_clean(sales_file, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    parse_sales_file(sales_file, cache_dir=cache_dir)
+    assert os.listdir(cache_dir)
+    assert not os.path.exists(os.path.join(os.path.dirname(sales_file), parse_cache.CACHE_DIRNAME))
@@ -0,0 +1,61 @@
+from utils.parser import add_pushdown_counts, iter_transactions, parse_transactions
+from utils.validator import validate_and_filter
+
+LINES = [
+    "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n",
+    "T001|2024-12-01|P101|Laptop|2|45000|C001|South\n",
+    "T002|2024-12-01|P102|Mouse|1|300|C002|South\n",
+    "T003|2024-12-02|P103|Monitor|1|12000|C003|North\n",
+    "X004|2024-12-02|P104|Webcam|3|2500|C004|South\n",
+    "T005|2024-12-03|P105|Laptop,Charger|0|1200|C005|South\n",
+    "T006|2024-12-03|P106|USB Cable|40|1,000|C006|South\n",
+    "T007|2024-12-03|P107|Keyboard|1|800|C007|SouthEast\n",
+    "broken|line\n",
+]
+
+FILTERS = {"region": "South", "min_amount": 500, "max_amount": 50000}
+
+
+def _pushed_down(columnar):
+    stats = {}
+    parsed = parse_transactions(LINES, columnar=columnar, stats=stats, **FILTERS)
+    valid, _, summary = validate_and_filter(parsed, log=lambda message: None, **FILTERS)
+    return valid, add_pushdown_counts(summary, stats)
+
+
+def _rows(transactions):
+    return [dict(t.items()) for t in transactions]
+
+
+def test_pushdown_keeps_the_same_rows_as_validation():
+    expected, _, summary = validate_and_filter(parse_transactions(LINES), log=lambda message: None,
+                                               **FILTERS)
+    assert [t["TransactionID"] for t in expected] == ["T006"]
+    for columnar in (False, True):
+        valid, pushed = _pushed_down(columnar)
+        assert _rows(valid) == _rows(expected)
+        assert pushed["total_input"] == summary["total_input"]
+        assert pushed["final_count"] == summary["final_count"]
+
+
+def test_pushdown_counts_skipped_rows_separately():
+    _, summary = _pushed_down(columnar=True)
+    # The header, T003 and T007 (other regions); T001, T002 and T005 (amount)
+    assert summary["skipped_by_region_pushdown"] == 3
+    assert summary["skipped_by_amount_pushdown"] == 3
+    # Only X004 reached validation and failed
+    assert summary["invalid"] == 1
+    assert summary["filtered_by_region"] == summary["filtered_by_amount"] == 0
+
+
+def test_streaming_parser_pushes_down_the_same_filters():
+    stats = {}
+    rows = list(iter_transactions(LINES, stats=stats, **FILTERS))
+    assert [t["TransactionID"] for t in rows] == ["X004", "T006"]
+    assert stats == {"skipped_by_region": 3, "skipped_by_amount": 3}
+
+
+def test_amount_bounds_are_inclusive_like_the_validator():
+    stats = {}
+    rows = list(iter_transactions(LINES, min_amount=300, max_amount=300, stats=stats))
+    assert [t["TransactionID"] for t in rows] == ["T002"]
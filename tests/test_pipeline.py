@@ -0,0 +1,21 @@
+import main
+from benchmarks.generate_data import generate_sales_file
+from utils.pipeline import stream_sales_aggregate
+
+
+def _aggregate(*argv):
+    aggregate, _ = main.aggregate_sales(main.parse_args(["analyze", *argv]))
+    return aggregate
+
+
+def test_stream_mode_matches_the_default_mode(tmp_path):
+    data = str(tmp_path / "sales.txt")
+    generate_sales_file(data, 3000, products=20, customers=300, days=30, seed=5)
+
+    expected = _aggregate("--data", data)
+    assert expected.transaction_count > 0
+    assert _aggregate("--data", data, "--stream").to_dict() == expected.to_dict()
+
+    aggregate, summary = stream_sales_aggregate(data, region=main.REGION, min_amount=main.MIN_AMOUNT)
+    assert aggregate.to_dict() == expected.to_dict()
+    assert summary["final_count"] == expected.transaction_count
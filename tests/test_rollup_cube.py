@@ -0,0 +1,92 @@
+import pytest
+
+from benchmarks.generate_data import generate_sales_file
+from utils import data_processor
+from utils.aggregator import aggregate_transactions
+from utils.file_handler import read_sales_data
+from utils.parser import parse_transactions
+from utils.rollup_cube import DIMENSIONS, RollupCube, build_rollup_cube
+from utils.validator import validate_and_filter
+
+
+@pytest.fixture(scope="module")
+def data(tmp_path_factory):
+    path = tmp_path_factory.mktemp("data") / "sales.txt"
+    generate_sales_file(str(path), 3000, products=15, customers=200, days=20, seed=7)
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def valid(data):
+    transactions, _, _ = validate_and_filter(parse_transactions(read_sales_data(data)),
+                                             min_amount=100, log=lambda message: None)
+    return transactions
+
+
+def _brute_force(transactions, group_by, keep):
+    groups = {}
+    for t in transactions:
+        if not keep(t):
+            continue
+        totals = groups.setdefault(tuple(t[dim] for dim in group_by), [0.0, 0, 0])
+        totals[0] += int(t["Quantity"]) * float(t["UnitPrice"])
+        totals[1] += int(t["Quantity"])
+        totals[2] += 1
+    return {key: dict(zip(("revenue", "quantity", "transactions"), v)) for key, v in groups.items()}
+
+
+def test_build_keeps_the_validated_rows(data, valid):
+    cube, summary = build_rollup_cube(data, min_amount=100)
+    assert summary["final_count"] == len(valid)
+    assert sum(cell[2] for cell in cube.cells.values()) == len(valid)
+    assert cube.to_dict() == RollupCube().update(valid).to_dict()
+
+
+@pytest.mark.parametrize("group_by", [(), ("Region",), ("ProductID", "Date"), DIMENSIONS])
+def test_queries_match_brute_force_sums(valid, group_by):
+    cube = RollupCube().update(valid)
+    assert cube.query(group_by) == _brute_force(valid, group_by, lambda t: True)
+
+    regions = {"North", "East"}
+    result = cube.query(group_by, where={"Region": regions, "ProductName": lambda p: p != "Mouse"},
+                        date_from="2024-01-05", date_to="2024-01-12")
+    expected = _brute_force(valid, group_by, lambda t: t["Region"] in regions
+                            and t["ProductName"] != "Mouse"
+                            and "2024-01-05" <= t["Date"] <= "2024-01-12")
+    assert result and result == expected
+
+
+def test_slice_and_rollup_compose(valid):
+    cube = RollupCube().update(valid)
+    south = cube.slice(where={"Region": "South"})
+    assert south.rollup("ProductID") == cube.query(["ProductID"], where={"Region": "South"})
+    assert set(south.customers_by_date) <= set(cube.customers_by_date)
+    with pytest.raises(ValueError, match="Unknown dimension"):
+        cube.query(["CustomerID"])
+
+
+def test_views_from_the_cube_match_the_aggregate(valid):
+    expected = aggregate_transactions(valid)
+    aggregate = RollupCube().update(valid).to_aggregate()
+    assert data_processor.region_wise_sales(aggregate) == data_processor.region_wise_sales(expected)
+    assert (data_processor.top_selling_products(aggregate, 10)
+            == data_processor.top_selling_products(expected, 10))
+    assert data_processor.daily_sales_trend(aggregate) == data_processor.daily_sales_trend(expected)
+    assert data_processor.find_peak_sales_day(aggregate) == data_processor.find_peak_sales_day(expected)
+
+
+@pytest.mark.parametrize("precision", [0, 10])
+def test_saved_cube_answers_the_same_queries(valid, tmp_path, precision):
+    cube = RollupCube(unique_precision=precision).update(valid)
+    cube.save(str(tmp_path / "cube.json"))
+    loaded = RollupCube.load(str(tmp_path / "cube.json"))
+    assert loaded.query(["Date", "Region"]) == cube.query(["Date", "Region"])
+    assert (data_processor.daily_sales_trend(loaded.to_aggregate())
+            == data_processor.daily_sales_trend(cube.to_aggregate()))
+    assert RollupCube.load(str(tmp_path / "missing.json")) is None
+
+
+def test_merged_halves_equal_the_whole(valid):
+    half = len(valid) // 2
+    merged = RollupCube().update(valid[:half]).merge(RollupCube().update(valid[half:]))
+    assert merged.query(DIMENSIONS) == RollupCube().update(valid).query(DIMENSIONS)
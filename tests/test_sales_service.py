@@ -0,0 +1,63 @@
+import json
+
+from utils.pipeline import stream_sales_aggregate
+from utils.sales_service import SalesService
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n"
+
+
+def _row(i, region="South"):
+    return f"T{i:04d}|2024-12-{i % 28 + 1:02d}|P{100 + i % 7}|Item {i % 7}|2|{250 + i}|C{i % 13:03d}|{region}\n"
+
+
+def _append(path, text):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _expected(path):
+    aggregate, summary = stream_sales_aggregate(str(path), min_amount=500)
+    return aggregate.to_dict(), summary["final_count"]
+
+
+def test_reload_merges_appended_lines_without_touching_the_old_snapshot(tmp_path):
+    data = tmp_path / "sales.txt"
+    data.write_text(HEADER + "".join(_row(i) for i in range(40)), encoding="utf-8")
+    service = SalesService(str(data), min_amount=500)
+    old = service.aggregate
+    old_state = old.to_dict()
+
+    _append(data, "".join(_row(i, region="East") for i in range(40, 60)))
+    assert service.reload() == "incremental"
+    assert old.to_dict() == old_state
+    assert (service.aggregate.to_dict(), service.summary["final_count"]) == _expected(data)
+
+
+def test_unterminated_last_line_is_served_then_committed_once(tmp_path):
+    data = tmp_path / "sales.txt"
+    data.write_text(HEADER + "".join(_row(i) for i in range(10)), encoding="utf-8")
+    service = SalesService(str(data), min_amount=500)
+
+    _append(data, _row(10).rstrip("\n"))
+    assert service.reload() == "incremental"
+    assert (service.aggregate.to_dict(), service.summary["final_count"]) == _expected(data)
+
+    _append(data, "\n" + _row(11))
+    assert service.reload() == "incremental"
+    assert (service.aggregate.to_dict(), service.summary["final_count"]) == _expected(data)
+
+
+def test_responses_are_cached_per_data_version(tmp_path):
+    data = tmp_path / "sales.txt"
+    data.write_text(HEADER + "".join(_row(i) for i in range(10)), encoding="utf-8")
+    service = SalesService(str(data), min_amount=500)
+    stale = service._snapshot
+    before = json.loads(service.respond("/summary")[1])
+
+    _append(data, _row(10))
+    service.reload()
+    # A query still running against the old snapshot caches into that version only
+    service.query("/regions", {}, stale)
+    assert "region_summary" not in service._snapshot[2]
+    after = json.loads(service.respond("/summary")[1])
+    assert after["transaction_count"] == before["transaction_count"] + 1
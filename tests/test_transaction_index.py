@@ -0,0 +1,77 @@
+import pytest
+
+from benchmarks.generate_data import generate_sales_file
+from utils import data_processor
+from utils.aggregator import aggregate_transactions
+from utils.parser import parse_sales_file
+from utils.transaction_index import IndexedTransactions
+from utils.validator import validate_and_filter
+
+QUERIES = [
+    {},
+    {"region": "South"},
+    {"customer_id": "C007"},
+    {"product_id": "P102", "date_from": "2024-01-03"},
+    {"region": "North", "date_from": "2024-01-05", "date_to": "2024-01-09"},
+    {"min_amount": 500, "max_amount": 2000},
+    {"region": "East", "product_id": "P101", "min_amount": 1000},
+    {"region": "Atlantis"},
+    {"date_from": "2024-01-09", "date_to": "2024-01-02"},
+]
+
+
+@pytest.fixture(scope="module")
+def valid(tmp_path_factory):
+    path = tmp_path_factory.mktemp("data") / "sales.txt"
+    generate_sales_file(str(path), 3000, products=10, customers=50, days=15, seed=9)
+    transactions, _, _ = validate_and_filter(parse_sales_file(str(path), columnar=True),
+                                             log=lambda message: None)
+    return transactions
+
+
+@pytest.fixture(scope="module")
+def index(valid):
+    return IndexedTransactions(valid)
+
+
+def _matches(t, region=None, customer_id=None, product_id=None,
+             date_from=None, date_to=None, min_amount=None, max_amount=None):
+    amount = t["Quantity"] * t["UnitPrice"]
+    return ((region is None or t["Region"] == region)
+            and (customer_id is None or t["CustomerID"] == customer_id)
+            and (product_id is None or t["ProductID"] == product_id)
+            and (date_from is None or t["Date"] >= date_from)
+            and (date_to is None or t["Date"] <= date_to)
+            and (min_amount is None or amount >= min_amount)
+            and (max_amount is None or amount <= max_amount))
+
+
+@pytest.mark.parametrize("filters", QUERIES)
+def test_select_matches_a_full_scan(valid, index, filters):
+    expected = [row for row, t in enumerate(valid) if _matches(t, **filters)]
+    assert list(index.select(**filters)) == expected
+    assert [t["TransactionID"] for t in index.filter(**filters)] == \
+        [valid[row]["TransactionID"] for row in expected]
+
+
+@pytest.mark.parametrize("filters", QUERIES[:7])
+def test_filtered_aggregates_match_aggregating_the_scan(valid, index, filters):
+    expected = aggregate_transactions([t for t in valid if _matches(t, **filters)])
+    assert index.aggregate(**filters).to_dict() == expected.to_dict()
+
+
+def test_filter_matches_validate_and_filter(valid, index):
+    expected, _, _ = validate_and_filter(valid, region="South", min_amount=500, max_amount=5000,
+                                         log=lambda message: None)
+    result = index.filter(region="South", min_amount=500, max_amount=5000)
+    assert result.to_dicts() == expected.to_dicts()
+
+
+def test_customer_drill_down(valid, index):
+    customer_id = index.values("CustomerID")[0]
+    rows = index.customer_transactions(customer_id, date_to="2024-01-10")
+    assert len(rows) and all(t["CustomerID"] == customer_id and t["Date"] <= "2024-01-10"
+                             for t in rows)
+    summary = data_processor.customer_analysis(index.aggregate(customer_id=customer_id))
+    assert list(summary) == [customer_id]
+    assert summary[customer_id]["purchase_count"] == len(index.lookup("CustomerID", customer_id))
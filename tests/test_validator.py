@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from utils.parser import parse_transactions
+from utils.validator import (compile_rules, iter_valid_transactions, merge_filter_summaries,
+                             validate_and_filter)
+
+LINES = [
+    "T001|2024-12-01|P101|Mouse|2|600|C001|North\n",
+    "T002|2024-12-01|P102|Laptop|1|90000|C002|South\n",
+    "X003|2024-12-02|P101|Mouse|2|600|C001|North\n",
+    "T004|2024-12-02|P103|Cable|0|100|C003|East\n",
+    "T005|2024-12-03|P101|Mouse|1|300|C004|North\n",
+    "T006|2024-12-03|P104|Monitor|1|12000|C005|West\n",
+]
+ONLY_MOUSE = {"name": "only_mouse", "kind": "predicate", "func": lambda t: t["ProductName"] == "Mouse"}
+
+
+def _validate(transactions, **kwargs):
+    return validate_and_filter(transactions, log=lambda message: None, **kwargs)
+
+
+@pytest.mark.parametrize("columnar", [False, True], ids=["dicts", "table"])
+def test_rules_count_the_first_failure_and_filters_separately(columnar):
+    transactions = parse_transactions(LINES, columnar=columnar)
+    valid, invalid, summary = _validate(transactions, region="North", min_amount=500,
+                                        extra_rules=[ONLY_MOUSE])
+    assert [t["TransactionID"] for t in valid] == ["T001"]
+    assert invalid == 4
+    assert summary["rejected_by_rule"] == {
+        "required_fields": 0, "transaction_id_prefix": 1, "product_id_prefix": 0,
+        "customer_id_prefix": 0, "positive_quantity": 1, "positive_price": 0,
+        "only_mouse": 2, "region": 0, "amount": 1,
+    }
+    assert summary["filtered_by_region"] == 0 and summary["filtered_by_amount"] == 1
+    # Regions and amounts describe the valid rows, before the filters
+    assert summary["regions"] == ["North"]
+    assert (summary["min_amount"], summary["max_amount"]) == (300, 1200)
+
+
+def test_missing_fields_fail_the_required_rule():
+    transactions = parse_transactions(LINES)
+    del transactions[0]["Region"]
+    _, invalid, summary = _validate(transactions)
+    assert invalid == 3 and summary["rejected_by_rule"]["required_fields"] == 1
+
+
+def test_summary_is_json_serializable_and_merges_sorted():
+    _, _, first = _validate(parse_transactions(LINES[:2]))
+    second = {}
+    list(iter_valid_transactions(parse_transactions(LINES[4:]), summary=second))
+    assert first["regions"] == ["North", "South"] and second["regions"] == ["North", "West"]
+
+    merged = merge_filter_summaries(merge_filter_summaries({}, first), second)
+    assert merged["regions"] == ["North", "South", "West"]
+    assert merged["final_count"] == 4
+    assert json.loads(json.dumps(merged)) == merged
+
+
+def test_unknown_rule_kind_is_rejected():
+    with pytest.raises(ValueError, match="between"):
+        compile_rules([{"name": "between", "kind": "between", "field": "Quantity"}])
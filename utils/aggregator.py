@@ -0,0 +1,590 @@
+import heapq
+import os
+from datetime import date as _date
+
+from utils import numpy_backend
+from utils.heavy_hitters import SpaceSaving
+from utils.hyperloglog import HyperLogLog
+from utils.instrumentation import instrumented
+from utils.transaction_table import TransactionTable
+
+BACKENDS = ("python", "numpy")
+_backend = os.environ.get("SALES_ANALYTICS_BACKEND", "python")
+_top_k_capacity = int(os.environ.get("SALES_TOP_K_CAPACITY", "0")) or None
+_unique_precision = int(os.environ.get("SALES_HLL_PRECISION", "0")) or None
+
+
+def set_backend(name):
+    """
+    Selects the implementation used by aggregate_transactions and the
+    top-N / threshold views: "python" (default) or "numpy".
+    """
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+    _backend = name
+
+
+def get_backend():
+    """
+    Returns: the backend actually in use ("numpy" falls back to "python"
+    when NumPy is not installed).
+    """
+    if _backend == "numpy" and numpy_backend.is_available():
+        return "numpy"
+    return "python"
+
+
+def set_top_k_capacity(capacity):
+    """
+    Sets the default for new SalesAggregates: None/0 keeps exact
+    per-customer stats, a positive number tracks customers with a
+    SpaceSaving sketch of that many counters instead (see SalesAggregate).
+    """
+    global _top_k_capacity
+    if capacity is not None and capacity < 0:
+        raise ValueError("top-k capacity must be positive")
+    _top_k_capacity = capacity or None
+
+
+def set_unique_precision(precision):
+    """
+    Sets the default for new SalesAggregates: None/0 counts unique
+    customers per day exactly (with sets), a precision (4-18) uses
+    HyperLogLog sketches instead (see SalesAggregate).
+    """
+    global _unique_precision
+    if precision:
+        HyperLogLog(precision)  # validates the precision
+    _unique_precision = precision or None
+
+
+def get_unique_precision():
+    """
+    Returns: the default HyperLogLog precision for unique-customer
+    counts, or None when they are exact.
+    """
+    return _unique_precision
+
+
+class SalesAggregate:
+    """
+    Holds every analytics result for a set of transactions, built in a
+    single pass over the data.
+
+    The functions in utils/data_processor.py and the report generator are
+    thin views over this object, so the transactions only need to be
+    scanned once per run.
+
+    Internal running totals (kept as small lists for speed):
+        region_stats:   region   -> [total_sales, transaction_count]
+        product_stats:  product  -> [total_qty, total_revenue]
+        customer_stats: customer -> [total_spent, purchase_count, set(products)]
+        daily_stats:    date     -> [revenue, transaction_count, set(customers)]
+
+    All dictionaries keep first-seen order, which is what the original
+    per-function loops relied on for tie-breaking.
+
+    With top_k_capacity (default: set_top_k_capacity / SALES_TOP_K_CAPACITY)
+    customers are not kept in customer_stats. Spend per customer goes into
+    customer_sketch, a fixed-size SpaceSaving sketch. Memory then no longer
+    grows with the number of customers, and the customer views become
+    approximate; top_customers_error_bound() gives their guaranteed error.
+    Pass top_k_capacity=0 to force exact stats.
+
+    Likewise with unique_precision (default: set_unique_precision /
+    SALES_HLL_PRECISION) each day's customers are counted with a
+    HyperLogLog sketch of that precision instead of a set. The sketches
+    merge across chunks and workers, and unique_customers_by_period()
+    unions them into weekly or monthly counts.
+    """
+
+    def __init__(self, top_k_capacity=None, unique_precision=None):
+        if top_k_capacity is None:
+            top_k_capacity = _top_k_capacity
+        if unique_precision is None:
+            unique_precision = _unique_precision
+        self.unique_precision = unique_precision or None
+        self.total_revenue = 0.0
+        self.transaction_count = 0
+        self.region_stats = {}
+        self.product_stats = {}
+        self.customer_stats = {}
+        self.daily_stats = {}
+        self.customer_sketch = SpaceSaving(top_k_capacity) if top_k_capacity else None
+
+    @property
+    def approximate(self):
+        return self.customer_sketch is not None
+
+    def _new_unique(self, customer_id):
+        """
+        Returns: the unique-customer container for a new day.
+        """
+        if self.unique_precision:
+            return HyperLogLog(self.unique_precision, (customer_id,))
+        return {customer_id}
+
+    def add(self, t):
+        """
+        Add a single transaction dictionary to the running totals.
+        Rows with non-numeric Quantity/UnitPrice are skipped.
+        """
+        self.update((t,))
+
+    def update(self, transactions):
+        """
+        Add an iterable of transactions to the running totals in one pass.
+        Returns: self (so calls can be chained)
+        """
+        if isinstance(transactions, TransactionTable):
+            return self._update_table(transactions)
+
+        region_stats = self.region_stats
+        product_stats = self.product_stats
+        customer_stats = self.customer_stats
+        customer_sketch = self.customer_sketch
+        daily_stats = self.daily_stats
+        new_unique = self._new_unique
+        total_revenue = self.total_revenue
+        count = self.transaction_count
+
+        for t in transactions:
+            try:
+                qty = int(t.get("Quantity", 0))
+                price = float(t.get("UnitPrice", 0.0))
+            except (ValueError, TypeError):
+                continue
+            revenue = qty * price
+            product = t.get("ProductName", "Unknown")
+            customer_id = t.get("CustomerID", "Unknown")
+
+            total_revenue += revenue
+            count += 1
+
+            # Region totals
+            region = t.get("Region", "Unknown")
+            stats = region_stats.get(region)
+            if stats is None:
+                region_stats[region] = [revenue, 1]
+            else:
+                stats[0] += revenue
+                stats[1] += 1
+
+            # Product totals
+            stats = product_stats.get(product)
+            if stats is None:
+                product_stats[product] = [qty, revenue]
+            else:
+                stats[0] += qty
+                stats[1] += revenue
+
+            # Customer totals
+            if customer_sketch is not None:
+                customer_sketch.update(customer_id, revenue)
+            else:
+                stats = customer_stats.get(customer_id)
+                if stats is None:
+                    customer_stats[customer_id] = [revenue, 1, {product}]
+                else:
+                    stats[0] += revenue
+                    stats[1] += 1
+                    stats[2].add(product)
+
+            # Daily totals
+            date = t.get("Date", "Unknown")
+            stats = daily_stats.get(date)
+            if stats is None:
+                daily_stats[date] = [revenue, 1, new_unique(customer_id)]
+            else:
+                stats[0] += revenue
+                stats[1] += 1
+                stats[2].add(customer_id)
+
+        self.total_revenue = total_revenue
+        self.transaction_count = count
+        return self
+
+    def _update_table(self, table):
+        """
+        Column-wise update for a TransactionTable. Quantity and UnitPrice are
+        already typed, and the categorical columns are grouped on their
+        integer codes: each code's stats entry is looked up (by decoded
+        value) once, then reached through a code-indexed list, so strings
+        are only hashed once per distinct value.
+        """
+        region_stats = self.region_stats
+        product_stats = self.product_stats
+        customer_stats = self.customer_stats
+        customer_sketch = self.customer_sketch
+        daily_stats = self.daily_stats
+        new_unique = self._new_unique
+        total_revenue = self.total_revenue
+
+        regions = table.dictionary("Region").by_code
+        products = table.dictionary("ProductName").by_code
+        customers = table.dictionary("CustomerID").by_code
+        dates = table.dictionary("Date").by_code
+        # Stats entries by code, filled on first sight (in row order, so
+        # dictionary order matches the row-at-a-time path)
+        region_slots = [None] * len(regions)
+        product_slots = [None] * len(products)
+        customer_slots = [None] * len(customers)
+        daily_slots = [None] * len(dates)
+
+        for qty, price, product, customer, region, date in zip(
+                table.quantity, table.unit_price, table.codes("ProductName"),
+                table.codes("CustomerID"), table.codes("Region"), table.codes("Date")):
+            revenue = qty * price
+            total_revenue += revenue
+
+            stats = region_slots[region]
+            if stats is None:
+                key = regions[region]
+                stats = region_stats.get(key)
+                if stats is None:
+                    stats = region_stats[key] = [0.0, 0]
+                region_slots[region] = stats
+            stats[0] += revenue
+            stats[1] += 1
+
+            stats = product_slots[product]
+            if stats is None:
+                key = products[product]
+                stats = product_stats.get(key)
+                if stats is None:
+                    stats = product_stats[key] = [0, 0.0]
+                product_slots[product] = stats
+            stats[0] += qty
+            stats[1] += revenue
+
+            if customer_sketch is not None:
+                customer_sketch.update(customers[customer], revenue)
+            else:
+                stats = customer_slots[customer]
+                if stats is None:
+                    key = customers[customer]
+                    stats = customer_stats.get(key)
+                    if stats is None:
+                        stats = customer_stats[key] = [0.0, 0, set()]
+                    customer_slots[customer] = stats
+                stats[0] += revenue
+                stats[1] += 1
+                stats[2].add(products[product])
+
+            stats = daily_slots[date]
+            if stats is None:
+                key = dates[date]
+                stats = daily_stats.get(key)
+                if stats is None:
+                    stats = daily_stats[key] = [0.0, 0, new_unique(customers[customer])]
+                daily_slots[date] = stats
+            stats[0] += revenue
+            stats[1] += 1
+            stats[2].add(customers[customer])
+
+        self.total_revenue = total_revenue
+        self.transaction_count += len(table)
+        return self
+
+    def merge(self, other):
+        """
+        Merge another SalesAggregate into this one (e.g. a partial result
+        computed over a different chunk of the same data).
+        Returns: self
+        """
+        self.total_revenue += other.total_revenue
+        self.transaction_count += other.transaction_count
+
+        for region, (sales, n) in other.region_stats.items():
+            stats = self.region_stats.get(region)
+            if stats is None:
+                self.region_stats[region] = [sales, n]
+            else:
+                stats[0] += sales
+                stats[1] += n
+
+        for product, (qty, revenue) in other.product_stats.items():
+            stats = self.product_stats.get(product)
+            if stats is None:
+                self.product_stats[product] = [qty, revenue]
+            else:
+                stats[0] += qty
+                stats[1] += revenue
+
+        if other.customer_sketch is not None:
+            if self.customer_sketch is None:
+                raise ValueError("cannot merge an approximate SalesAggregate into an exact one")
+            self.customer_sketch.merge(other.customer_sketch)
+        for customer_id, (spent, n, products) in other.customer_stats.items():
+            if self.customer_sketch is not None:
+                self.customer_sketch.update(customer_id, spent, n)
+                continue
+            stats = self.customer_stats.get(customer_id)
+            if stats is None:
+                self.customer_stats[customer_id] = [spent, n, set(products)]
+            else:
+                stats[0] += spent
+                stats[1] += n
+                stats[2].update(products)
+
+        if other.unique_precision and not self.unique_precision:
+            raise ValueError("cannot merge HyperLogLog unique counts into an exact SalesAggregate")
+        for date, (revenue, n, customers) in other.daily_stats.items():
+            stats = self.daily_stats.get(date)
+            if stats is None:
+                if self.unique_precision:
+                    unique = HyperLogLog(self.unique_precision)
+                    unique.update(customers)
+                else:
+                    unique = set(customers)
+                self.daily_stats[date] = [revenue, n, unique]
+            else:
+                stats[0] += revenue
+                stats[1] += n
+                stats[2].update(customers)
+
+        return self
+
+    def merged_copy(self, other):
+        """
+        Merges `other` into a copy of this aggregate, leaving this one
+        unchanged. The copy shares every stats entry `other` does not touch
+        (copy-on-write): the cost is a shallow copy of each dictionary plus
+        the size of `other`, with no per-entry copies or sorting.
+        Returns: the new SalesAggregate
+        """
+        agg = SalesAggregate(top_k_capacity=0, unique_precision=self.unique_precision or 0)
+        agg.customer_sketch = self.customer_sketch.copy() if self.customer_sketch else None
+        agg.total_revenue = self.total_revenue
+        agg.transaction_count = self.transaction_count
+        agg.region_stats = dict(self.region_stats)
+        agg.product_stats = dict(self.product_stats)
+        agg.customer_stats = dict(self.customer_stats)
+        agg.daily_stats = dict(self.daily_stats)
+
+        for key in other.region_stats.keys() & agg.region_stats.keys():
+            agg.region_stats[key] = list(agg.region_stats[key])
+        for key in other.product_stats.keys() & agg.product_stats.keys():
+            agg.product_stats[key] = list(agg.product_stats[key])
+        for key in other.customer_stats.keys() & agg.customer_stats.keys():
+            spent, n, products = agg.customer_stats[key]
+            agg.customer_stats[key] = [spent, n, set(products)]
+        for key in other.daily_stats.keys() & agg.daily_stats.keys():
+            revenue, n, customers = agg.daily_stats[key]
+            agg.daily_stats[key] = [revenue, n, customers.copy()]
+        return agg.merge(other)
+
+    def to_dict(self):
+        """
+        Returns: a JSON-serializable snapshot of the running totals
+        (sets are stored as sorted lists).
+        """
+        return {
+            "total_revenue": self.total_revenue,
+            "transaction_count": self.transaction_count,
+            "region_stats": [[k, s, n] for k, (s, n) in self.region_stats.items()],
+            "product_stats": [[k, q, r] for k, (q, r) in self.product_stats.items()],
+            "customer_stats": [[k, s, n, sorted(p)] for k, (s, n, p) in self.customer_stats.items()],
+            "daily_stats": [[k, r, n, c.to_dict() if isinstance(c, HyperLogLog) else sorted(c)]
+                            for k, (r, n, c) in self.daily_stats.items()],
+            "unique_precision": self.unique_precision,
+            "customer_sketch": self.customer_sketch.to_dict() if self.customer_sketch else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuilds a SalesAggregate from a to_dict() snapshot. Key order is
+        preserved, so views give the same results as before saving.
+        """
+        agg = cls(top_k_capacity=0, unique_precision=data.get("unique_precision") or 0)
+        if data.get("customer_sketch"):
+            agg.customer_sketch = SpaceSaving.from_dict(data["customer_sketch"])
+        agg.total_revenue = data["total_revenue"]
+        agg.transaction_count = data["transaction_count"]
+        agg.region_stats = {k: [s, n] for k, s, n in data["region_stats"]}
+        agg.product_stats = {k: [q, r] for k, q, r in data["product_stats"]}
+        agg.customer_stats = {k: [s, n, set(p)] for k, s, n, p in data["customer_stats"]}
+        agg.daily_stats = {
+            k: [r, n, HyperLogLog.from_dict(c) if isinstance(c, dict) else set(c)]
+            for k, r, n, c in data["daily_stats"]
+        }
+        return agg
+
+    # ------------------------------------------------------------------
+    # Views (same return formats as utils/data_processor.py)
+    # ------------------------------------------------------------------
+
+    def region_summary(self):
+        """
+        Returns: dictionary {region: {total_sales, transaction_count, percentage}}
+        sorted by total_sales descending.
+        """
+        total = self.total_revenue
+        result = {}
+        for region, (sales, n) in self.region_stats.items():
+            result[region] = {
+                "total_sales": sales,
+                "transaction_count": n,
+                "percentage": round((sales / total) * 100, 2) if total > 0 else 0.0,
+            }
+        return dict(sorted(result.items(), key=lambda x: x[1]["total_sales"], reverse=True))
+
+    def product_summary(self):
+        """
+        Returns: list of (ProductName, TotalQuantity, TotalRevenue) tuples
+        in first-seen order.
+        """
+        return [(product, qty, revenue) for product, (qty, revenue) in self.product_stats.items()]
+
+    def top_products(self, n=5):
+        """
+        Returns: top n (ProductName, TotalQuantity, TotalRevenue) by quantity.
+        """
+        products = self.product_summary()
+        if get_backend() == "numpy" and n > 0:
+            return [products[i] for i in numpy_backend.top_n_indices([p[1] for p in products], n)]
+        return heapq.nlargest(n, products, key=lambda x: x[1])
+
+    def low_products(self, threshold=10):
+        """
+        Returns: (ProductName, TotalQuantity, TotalRevenue) with quantity
+        below threshold, sorted by quantity ascending.
+        """
+        products = self.product_summary()
+        if get_backend() == "numpy":
+            return [products[i] for i in numpy_backend.below_threshold_indices([p[1] for p in products], threshold)]
+        low = [p for p in products if p[1] < threshold]
+        return sorted(low, key=lambda x: x[1])
+
+    def customer_summary(self):
+        """
+        Returns: dictionary of customer statistics sorted by total_spent descending.
+
+        For an approximate aggregate only the customers tracked by the
+        sketch are listed, with estimated spend, purchase counts since they
+        were tracked and no products_bought.
+        """
+        if self.customer_sketch is not None:
+            result = {}
+            for customer_id, spent, _, hits in self.customer_sketch.top(len(self.customer_sketch)):
+                result[customer_id] = {
+                    "total_spent": spent,
+                    "purchase_count": hits,
+                    "products_bought": [],
+                    "avg_order_value": round(spent / hits, 2) if hits > 0 else 0.0,
+                }
+            return result
+        result = {}
+        for customer_id, (spent, n, products) in self.customer_stats.items():
+            result[customer_id] = {
+                "total_spent": spent,
+                "purchase_count": n,
+                "products_bought": list(products),
+                "avg_order_value": round(spent / n, 2) if n > 0 else 0.0,
+            }
+        return dict(sorted(result.items(), key=lambda x: x[1]["total_spent"], reverse=True))
+
+    def top_customers(self, n=5):
+        """
+        Returns: top n (CustomerID, TotalSpent, Orders) by total spent.
+        Approximate aggregates return sketch estimates (see
+        top_customers_error_bound).
+        """
+        if self.customer_sketch is not None:
+            return [(c, spent, hits) for c, spent, _, hits in self.customer_sketch.top(n)]
+        customers = [(c, spent, orders) for c, (spent, orders, _) in self.customer_stats.items()]
+        if get_backend() == "numpy" and n > 0:
+            return [customers[i] for i in numpy_backend.top_n_indices([c[1] for c in customers], n)]
+        return heapq.nlargest(n, customers, key=lambda x: x[1])
+
+    def top_customers_error_bound(self):
+        """
+        Returns: the most by which any top_customers() spend can exceed the
+        true value (0 for exact aggregates).
+        """
+        if self.customer_sketch is None:
+            return 0.0
+        return self.customer_sketch.error_bound()
+
+    def daily_summary(self):
+        """
+        Returns: dictionary {date: {revenue, transaction_count, unique_customers}}
+        sorted by date.
+        """
+        result = {}
+        for date, (revenue, n, customers) in sorted(self.daily_stats.items(), key=lambda x: x[0]):
+            result[date] = {
+                "revenue": revenue,
+                "transaction_count": n,
+                "unique_customers": len(customers),
+            }
+        return result
+
+    def unique_customers(self, dates=None):
+        """
+        Returns: number of distinct customers over `dates` (default: all
+        days), from the union of the per-day sets or sketches. Estimated
+        when HyperLogLog mode is on.
+        """
+        days = [self.daily_stats[d][2] for d in (self.daily_stats if dates is None else dates)
+                if d in self.daily_stats]
+        if self.unique_precision:
+            return len(HyperLogLog.union(days, self.unique_precision))
+        return len(set().union(*days))
+
+    def unique_customers_by_period(self, period="week"):
+        """
+        Returns: dictionary {period: distinct customers} sorted by period,
+        where period is "week" (ISO week, e.g. "2024-W50") or "month"
+        ("2024-12"). Dates that do not parse are kept as their own period.
+        Built by unioning the daily sets or sketches; no rescan needed.
+        """
+        if period not in ("week", "month"):
+            raise ValueError("period must be 'week' or 'month'")
+        groups = {}
+        for day in self.daily_stats:
+            try:
+                parsed = _date.fromisoformat(day)
+            except (TypeError, ValueError):
+                key = day
+            else:
+                if period == "week":
+                    year, week, _ = parsed.isocalendar()
+                    key = f"{year}-W{week:02d}"
+                else:
+                    key = f"{parsed.year}-{parsed.month:02d}"
+            groups.setdefault(key, []).append(day)
+        return {key: self.unique_customers(days) for key, days in sorted(groups.items())}
+
+    def peak_day(self):
+        """
+        Returns: tuple (date, revenue, transaction_count) for the highest
+        revenue date, or None when there is no data.
+        """
+        if not self.daily_stats:
+            return None
+        date, (revenue, n, _) = max(self.daily_stats.items(), key=lambda x: x[1][0])
+        return (date, revenue, n)
+
+
+def aggregate_transactions(transactions):
+    """
+    Builds a SalesAggregate from transactions in a single pass.
+    If a SalesAggregate is passed in, it is returned unchanged; a
+    RollupCube is converted with its to_aggregate().
+    Uses the NumPy backend when it has been selected (see set_backend).
+    """
+    if isinstance(transactions, SalesAggregate):
+        return transactions
+    if hasattr(transactions, "to_aggregate"):
+        return transactions.to_aggregate()
+    return _build_aggregate(transactions)
+
+
+@instrumented("aggregate_transactions")
+def _build_aggregate(transactions):
+    if get_backend() == "numpy" and not _top_k_capacity and not _unique_precision:
+        return numpy_backend.aggregate_into(SalesAggregate(), transactions)
+    return SalesAggregate().update(transactions)
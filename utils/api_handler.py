@@ -1,40 +1,194 @@
-import requests
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-def fetch_products(limit=30, skip=0):
+from utils import instrumentation
+from utils.catalog_cache import DEFAULT_CACHE_FILE, CatalogCache, CatalogCacheMiss
+from utils.lazy import lazy_import
+
+# Imported on first use (the first request), not when this module loads
+requests = lazy_import("requests")
+
+BASE_URL = os.environ.get("SALES_API_BASE_URL", "https://dummyjson.com")
+
+# Status codes worth retrying; anything else is returned to the caller as-is.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ProductAPIClient:
     """
-    Fetch products from DummyJSON API.
+    Client for the DummyJSON products API.
 
-    Args:
-        limit (int): number of products to fetch (default 30).
-        skip (int): number of products to skip (for pagination).
+    - One pooled requests.Session, so connections (and TLS handshakes) are
+      reused across calls.
+    - Every request has a (connect, read) timeout.
+    - Connection errors, timeouts and 429/5xx responses are retried with
+      exponential backoff and full jitter.
+    - fetch_products_by_ids fetches many products concurrently with a
+      bounded thread pool.
+    - With a CatalogCache, successful responses are cached and reused
+      (see utils/catalog_cache.py for TTL and offline behaviour).
+    - Each HTTP attempt's latency goes to the "api" histogram of
+      utils/instrumentation.py when instrumentation is enabled.
 
-    Returns:
-        tuple: (products list, total count)
+    Point base_url at a local stub server for testing.
     """
-    url = f"https://dummyjson.com/products?limit={limit}&skip={skip}"
-    response = requests.get(url)
-    data = response.json()
-    return data['products'], data['total']
 
-import requests
+    def __init__(self, base_url=BASE_URL, timeout=(3.05, 10), max_retries=3,
+                 backoff_factor=0.5, max_backoff=8.0, max_workers=10, session=None,
+                 cache=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.max_workers = max_workers
+        self.cache = cache
 
-def fetch_products(limit=30, skip=0):
-    url = f"https://dummyjson.com/products?limit={limit}&skip={skip}"
-    response = requests.get(url)
-    data = response.json()
-    return data['products'], data['total']
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
 
-def fetch_product_by_id(product_id):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def _backoff(self, attempt):
+        """
+        Seconds to wait before retry number `attempt` (0-based):
+        a random value in [0, min(max_backoff, backoff_factor * 2**attempt)].
+        """
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * (2 ** attempt)))
+
+    def _get(self, path, params=None):
+        """
+        GET base_url + path with retries.
+        Returns: requests.Response (raises after the last failed retry).
+        """
+        url = f"{self.base_url}{path}"
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                instrumentation.record_latency("api", time.perf_counter() - start)
+                if last_attempt:
+                    raise
+            else:
+                instrumentation.record_latency("api", time.perf_counter() - start)
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+                if last_attempt:
+                    response.raise_for_status()
+            time.sleep(self._backoff(attempt))
+
+    def _get_json(self, path, params=None):
+        """
+        GET and decode JSON, going through the cache when one is set.
+        Only successful responses are cached.
+        """
+        def fetch():
+            response = self._get(path, params=params)
+            return response.json(), response.ok
+
+        if self.cache is None:
+            return fetch()[0]
+        key = self.base_url + path
+        if params:
+            key += "?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+        return self.cache.get_or_fetch(key, fetch)
+
+    def fetch_products(self, limit=30, skip=0):
+        """
+        Fetch products from DummyJSON API.
+
+        Args:
+            limit (int): number of products to fetch (default 30).
+            skip (int): number of products to skip (for pagination).
+
+        Returns:
+            tuple: (products list, total count)
+        """
+        data = self._get_json("/products", params={"limit": limit, "skip": skip})
+        return data['products'], data['total']
+
+    def fetch_product_by_id(self, product_id):
+        """
+        Fetch a single product by ID from DummyJSON API.
+        Returns: dict with product details
+        """
+        return self._get_json(f"/products/{product_id}")
+
+    def search_products(self, query):
+        """
+        Search products from DummyJSON API by keyword.
+
+        Args:
+            query (str): search term (e.g., 'phone', 'laptop', 'shoes')
+
+        Returns:
+            list: matching products
+        """
+        data = self._get_json("/products/search", params={"q": query})
+        return data['products']
+
+    def fetch_products_by_ids(self, ids, max_workers=None):
+        """
+        Fetch many products concurrently (at most max_workers requests in
+        flight at once).
+
+        Returns: list of product dicts in the same order as ids; None for
+        IDs that could not be fetched (not found or failed after retries).
+        """
+        def fetch_one(product_id):
+            try:
+                product = self._get_json(f"/products/{product_id}")
+            except (requests.RequestException, CatalogCacheMiss):
+                return None
+            return product if "id" in product else None
+
+        ids = list(ids)
+        if not ids:
+            return []
+        workers = min(max_workers or self.max_workers, len(ids))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(fetch_one, ids))
+
+
+_default_client = None
+
+
+def get_default_client():
     """
-    Fetch a single product by ID from DummyJSON API.
-    Returns: dict with product details
+    Returns: the shared module-level ProductAPIClient (created on first use,
+    from the environment at that time).
+
+    It caches responses in a persistent CatalogCache unless
+    SALES_CATALOG_CACHE is set to an empty string; SALES_API_OFFLINE=1
+    serves everything from the cache without network calls.
     """
-    url = f"https://dummyjson.com/products/{product_id}"
-    response = requests.get(url)
-    product = response.json()
-    return product
+    global _default_client
+    if _default_client is None:
+        cache = None
+        cache_file = os.environ.get("SALES_CATALOG_CACHE", None)
+        if cache_file != "":
+            offline = os.environ.get("SALES_API_OFFLINE", "0").lower() in ("1", "true", "on")
+            cache = CatalogCache(cache_file or DEFAULT_CACHE_FILE, offline=offline)
+        _default_client = ProductAPIClient(os.environ.get("SALES_API_BASE_URL", BASE_URL), cache=cache)
+    return _default_client
 
-import requests
 
 def fetch_products(limit=30, skip=0):
     """
@@ -47,12 +201,16 @@ def fetch_products(limit=30, skip=0):
     Returns:
         tuple: (products list, total count)
     """
-    url = f"https://dummyjson.com/products?limit={limit}&skip={skip}"
-    response = requests.get(url)
-    data = response.json()
-    return data['products'], data['total']
+    return get_default_client().fetch_products(limit=limit, skip=skip)
+
+
+def fetch_product_by_id(product_id):
+    """
+    Fetch a single product by ID from DummyJSON API.
+    Returns: dict with product details
+    """
+    return get_default_client().fetch_product_by_id(product_id)
 
-import requests
 
 def search_products(query):
     """
@@ -64,7 +222,12 @@ def search_products(query):
     Returns:
         list: matching products
     """
-    url = f"https://dummyjson.com/products/search?q={query}"
-    response = requests.get(url)
-    data = response.json()
-    return data['products']
\ No newline at end of file
+    return get_default_client().search_products(query)
+
+
+def fetch_products_by_ids(ids, max_workers=None):
+    """
+    Fetch many products concurrently by ID.
+    Returns: list of product dicts (None where a fetch failed), in ids order.
+    """
+    return get_default_client().fetch_products_by_ids(ids, max_workers=max_workers)
@@ -0,0 +1,209 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_FILE = os.environ.get("SALES_CATALOG_CACHE", "output/.catalog_cache.sqlite")
+DEFAULT_TTL = 6 * 60 * 60          # entries are fresh for 6 hours
+DEFAULT_STALE_TTL = 7 * 24 * 60 * 60  # and may be served stale for 7 more days
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+
+class CatalogCacheMiss(LookupError):
+    """
+    Raised in offline mode when a requested entry is not cached.
+    """
+
+
+class CatalogCache:
+    """
+    Two-tier cache for product catalog API responses.
+
+    Tier 1 is an in-process LRU (OrderedDict) of at most memory_size
+    entries; tier 2 is a SQLite file shared across runs. Every entry has
+    its own TTL. Once expired, an entry is still served for stale_ttl
+    seconds while a background thread refreshes it (stale-while-revalidate).
+
+    In offline mode nothing is fetched: any cached entry is served
+    regardless of age and misses raise CatalogCacheMiss.
+
+    Counters in `stats`: hits, stale_hits, misses, memory_hits, disk_hits,
+    fetches, refreshes, refresh_errors.
+
+    Cached values are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_FILE, memory_size=1024, default_ttl=DEFAULT_TTL,
+                 stale_ttl=DEFAULT_STALE_TTL, offline=False):
+        self.path = path
+        self.memory_size = memory_size
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.offline = offline
+        self.stats = dict.fromkeys(
+            ["hits", "stale_hits", "misses", "memory_hits", "disk_hits",
+             "fetches", "refreshes", "refresh_errors"], 0)
+
+        self._memory = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.RLock()
+        self._refreshing = set()
+        self._db = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS catalog ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "stored_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def _count(self, name):
+        # The background refresh threads update the counters too
+        with self._lock:
+            self.stats[name] += 1
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # ------------------------------------------------------------------
+    # Storage tiers
+    # ------------------------------------------------------------------
+
+    def _remember(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, key):
+        """
+        Returns: (value, expires_at) from memory or disk, or None.
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return entry
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                "SELECT value, expires_at FROM catalog WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            entry = (json.loads(row[0]), row[1])
+            self._remember(key, *entry)
+            self.stats["disk_hits"] += 1
+            return entry
+
+    def get(self, key):
+        """
+        Returns: tuple (value, state) where state is FRESH, STALE or MISS.
+        Entries past their stale window are reported as MISS (except in
+        offline mode, where any cached entry is served as STALE).
+        """
+        entry = self._lookup(key)
+        if entry is None:
+            return None, MISS
+        value, expires_at = entry
+        now = time.time()
+        if now < expires_at:
+            return value, FRESH
+        if self.offline or now < expires_at + self.stale_ttl:
+            return value, STALE
+        return None, MISS
+
+    def set(self, key, value, ttl=None):
+        """
+        Stores a JSON-serializable value in both tiers.
+        """
+        now = time.time()
+        expires_at = now + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO catalog (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), now, expires_at),
+                )
+                self._db.commit()
+
+    def invalidate(self, key=None):
+        """
+        Removes one entry, or every entry when key is None.
+        """
+        with self._lock:
+            if key is None:
+                self._memory.clear()
+                if self._db is not None:
+                    self._db.execute("DELETE FROM catalog")
+            else:
+                self._memory.pop(key, None)
+                if self._db is not None:
+                    self._db.execute("DELETE FROM catalog WHERE key = ?", (key,))
+            if self._db is not None:
+                self._db.commit()
+
+    # ------------------------------------------------------------------
+    # Read-through access
+    # ------------------------------------------------------------------
+
+    def get_or_fetch(self, key, fetch, ttl=None):
+        """
+        Returns the cached value for key, calling fetch() on a miss.
+
+        fetch() must return (value, cacheable); uncacheable values (e.g. an
+        error response) are returned but not stored. Stale entries are
+        returned immediately and refreshed in a background thread.
+        """
+        value, state = self.get(key)
+        if state == FRESH:
+            self._count("hits")
+            return value
+        if state == STALE:
+            self._count("stale_hits")
+            if not self.offline:
+                self._refresh_in_background(key, fetch, ttl)
+            return value
+
+        self._count("misses")
+        if self.offline:
+            raise CatalogCacheMiss(key)
+        self._count("fetches")
+        value, cacheable = fetch()
+        if cacheable:
+            self.set(key, value, ttl)
+        return value
+
+    def _refresh_in_background(self, key, fetch, ttl):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                value, cacheable = fetch()
+                if cacheable:
+                    self.set(key, value, ttl)
+                self._count("refreshes")
+            except Exception:
+                # Keep serving the stale value; the next access retries
+                self._count("refresh_errors")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
@@ -1,16 +1,15 @@
+from utils.aggregator import aggregate_transactions
+
+# Every function below accepts either a list of transactions or a
+# SalesAggregate. Passing the aggregate (see aggregate_transactions) lets
+# all analytics share one pass over the data instead of rescanning it.
+
+
 def calculate_total_revenue(transactions):
     """
     Calculate total revenue from a list of transactions.
     """
-    total_revenue = 0.0
-    for t in transactions:
-        try:
-            qty = int(t.get("Quantity", 0))
-            price = float(t.get("UnitPrice", 0.0))
-            total_revenue += qty * price
-        except (ValueError, TypeError):
-            continue
-    return total_revenue
+    return aggregate_transactions(transactions).total_revenue
 
 
 def region_wise_sales(transactions):
@@ -18,39 +17,7 @@ def region_wise_sales(transactions):
     Analyzes sales by region.
     Returns: dictionary with region statistics.
     """
-    region_stats = {}
-    total_sales_all = 0.0
-
-    # Step 1: Aggregate sales and counts per region
-    for t in transactions:
-        try:
-            qty = int(t.get("Quantity", 0))
-            price = float(t.get("UnitPrice", 0.0))
-            revenue = qty * price
-            region = t.get("Region", "Unknown")
-
-            if region not in region_stats:
-                region_stats[region] = {"total_sales": 0.0, "transaction_count": 0}
-
-            region_stats[region]["total_sales"] += revenue
-            region_stats[region]["transaction_count"] += 1
-            total_sales_all += revenue
-        except (ValueError, TypeError):
-            continue
-
-    # Step 2: Calculate percentages
-    for region, stats in region_stats.items():
-        if total_sales_all > 0:
-            stats["percentage"] = round((stats["total_sales"] / total_sales_all) * 100, 2)
-        else:
-            stats["percentage"] = 0.0
-
-    # Step 3: Sort by total_sales in descending order
-    sorted_stats = dict(
-        sorted(region_stats.items(), key=lambda x: x[1]["total_sales"], reverse=True)
-    )
-
-    return sorted_stats
+    return aggregate_transactions(transactions).region_summary()
 
 
 def top_selling_products(transactions, n=5):
@@ -66,38 +33,7 @@ def top_selling_products(transactions, n=5):
         ...
     ]
     """
-    product_stats = {}
-
-    # Step 1: Aggregate by product
-    for t in transactions:
-        try:
-            qty = int(t.get("Quantity", 0))
-            price = float(t.get("UnitPrice", 0.0))
-            revenue = qty * price
-            product = t.get("ProductName", "Unknown")
-
-            if product not in product_stats:
-                product_stats[product] = {"total_qty": 0, "total_revenue": 0.0}
-
-            product_stats[product]["total_qty"] += qty
-            product_stats[product]["total_revenue"] += revenue
-        except (ValueError, TypeError):
-            continue
-
-    # Step 2: Sort by total quantity sold (descending)
-    sorted_products = sorted(
-        product_stats.items(),
-        key=lambda x: x[1]["total_qty"],
-        reverse=True
-    )
-
-    # Step 3: Build result list of tuples
-    top_products = [
-        (product, stats["total_qty"], stats["total_revenue"])
-        for product, stats in sorted_products[:n]
-    ]
-
-    return top_products   # ✅ fixed return
+    return aggregate_transactions(transactions).top_products(n)
 
 
 def customer_analysis(transactions):
@@ -106,46 +42,8 @@ def customer_analysis(transactions):
 
     Returns: dictionary of customer statistics
     """
-    customer_stats = {}
-
-    # Step 1: Aggregate stats per customer
-    for t in transactions:
-        try:
-            customer_id = t.get("CustomerID", "Unknown")
-            qty = int(t.get("Quantity", 0))
-            price = float(t.get("UnitPrice", 0.0))
-            revenue = qty * price
-            product = t.get("ProductName", "Unknown")
-
-            if customer_id not in customer_stats:
-                customer_stats[customer_id] = {
-                    "total_spent": 0.0,
-                    "purchase_count": 0,
-                    "products_bought": set()
-                }
-
-            customer_stats[customer_id]["total_spent"] += revenue
-            customer_stats[customer_id]["purchase_count"] += 1
-            customer_stats[customer_id]["products_bought"].add(product)
-        except (ValueError, TypeError):
-            continue
+    return aggregate_transactions(transactions).customer_summary()
 
-    # Step 2: Calculate average order value and convert products_bought to list
-    for customer, stats in customer_stats.items():
-        if stats["purchase_count"] > 0:
-            stats["avg_order_value"] = round(
-                stats["total_spent"] / stats["purchase_count"], 2
-            )
-        else:
-            stats["avg_order_value"] = 0.0
-        stats["products_bought"] = list(stats["products_bought"])
-
-    # Step 3: Sort by total_spent descending
-    sorted_customers = dict(
-        sorted(customer_stats.items(), key=lambda x: x[1]["total_spent"], reverse=True)
-    )
-
-    return sorted_customers
 
 def daily_sales_trend(transactions):
     """
@@ -164,38 +62,8 @@ def daily_sales_trend(transactions):
         ...
     }
     """
-    daily_stats = {}
-
-    # Step 1: Aggregate stats per date
-    for t in transactions:
-        try:
-            date = t.get("Date", "Unknown")
-            qty = int(t.get("Quantity", 0))
-            price = float(t.get("UnitPrice", 0.0))
-            revenue = qty * price
-            customer_id = t.get("CustomerID", "Unknown")
-
-            if date not in daily_stats:
-                daily_stats[date] = {
-                    "revenue": 0.0,
-                    "transaction_count": 0,
-                    "unique_customers": set()
-                }
-
-            daily_stats[date]["revenue"] += revenue
-            daily_stats[date]["transaction_count"] += 1
-            daily_stats[date]["unique_customers"].add(customer_id)
-        except (ValueError, TypeError):
-            continue
+    return aggregate_transactions(transactions).daily_summary()
 
-    # Step 2: Convert unique_customers set to count
-    for date, stats in daily_stats.items():
-        stats["unique_customers"] = len(stats["unique_customers"])
-
-    # Step 3: Sort chronologically by date
-    sorted_daily_stats = dict(sorted(daily_stats.items(), key=lambda x: x[0]))
-
-    return sorted_daily_stats
 
 def find_peak_sales_day(transactions):
     """
@@ -206,33 +74,8 @@ def find_peak_sales_day(transactions):
     Expected Output Format:
     ('2024-12-15', 185000.0, 12)
     """
-    daily_stats = {}
-
-    # Step 1: Aggregate revenue and transaction count per date
-    for t in transactions:
-        try:
-            date = t.get("Date", "Unknown")
-            qty = int(t.get("Quantity", 0))
-            price = float(t.get("UnitPrice", 0.0))
-            revenue = qty * price
-
-            if date not in daily_stats:
-                daily_stats[date] = {"revenue": 0.0, "transaction_count": 0}
-
-            daily_stats[date]["revenue"] += revenue
-            daily_stats[date]["transaction_count"] += 1
-        except (ValueError, TypeError):
-            continue
+    return aggregate_transactions(transactions).peak_day()
 
-    # Step 2: Find the date with maximum revenue
-    if not daily_stats:
-        return None  # handle case when no transactions
-
-    peak_date, peak_stats = max(
-        daily_stats.items(), key=lambda x: x[1]["revenue"]
-    )
-
-    return (peak_date, peak_stats["revenue"], peak_stats["transaction_count"])
 
 def low_performing_products(transactions, threshold=10):
     """
@@ -252,33 +95,4 @@ def low_performing_products(transactions, threshold=10):
     - Include total quantity and revenue
     - Sort by TotalQuantity ascending
     """
-    product_stats = {}
-
-    # Step 1: Aggregate stats per product
-    for t in transactions:
-        try:
-            qty = int(t.get("Quantity", 0))
-            price = float(t.get("UnitPrice", 0.0))
-            revenue = qty * price
-            product = t.get("ProductName", "Unknown")
-
-            if product not in product_stats:
-                product_stats[product] = {"total_qty": 0, "total_revenue": 0.0}
-
-            product_stats[product]["total_qty"] += qty
-            product_stats[product]["total_revenue"] += revenue
-        except (ValueError, TypeError):
-            continue
-
-    # Step 2: Filter products below threshold
-    low_products = [
-        (product, stats["total_qty"], stats["total_revenue"])
-        for product, stats in product_stats.items()
-        if stats["total_qty"] < threshold
-    ]
-
-    # Step 3: Sort by total quantity ascending
-    low_products_sorted = sorted(low_products, key=lambda x: x[1])
-
-    return low_products_sorted
-    
\ No newline at end of file
+    return aggregate_transactions(transactions).low_products(threshold)
@@ -0,0 +1,180 @@
+import re
+
+from utils.aggregator import SalesAggregate
+from utils.instrumentation import instrumented
+
+# Catalog attributes copied onto each enriched transaction
+ENRICHED_FIELDS = {
+    "API_ID": "id",
+    "API_Title": "title",
+    "API_Category": "category",
+    "API_Brand": "brand",
+    "API_Rating": "rating",
+}
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_title(title):
+    """
+    Lowercases a product title and collapses punctuation/whitespace, so
+    "Laptop,Premium" and "laptop premium" compare equal.
+    """
+    return _NON_ALNUM.sub(" ", str(title).lower()).strip()
+
+
+def tokenize(title):
+    """
+    Returns: set of normalized words in a product title.
+    """
+    return set(normalize_title(title).split())
+
+
+class CatalogIndex:
+    """
+    Hash indexes over a fetched product catalog:
+        by_id:    catalog id -> product
+        by_title: normalized title -> product
+        tokens:   word -> list of catalog ids containing it (for fuzzy matching)
+
+    Building the index is linear in catalog size; each lookup only touches
+    the products sharing a word with the name being matched.
+    """
+
+    def __init__(self, products, min_score=0.5):
+        self.min_score = min_score
+        self.by_id = {}
+        self.by_title = {}
+        self.tokens = {}
+        self._product_tokens = {}
+        for product in products:
+            pid = product.get("id")
+            self.by_id[pid] = product
+            self.by_title.setdefault(normalize_title(product.get("title", "")), product)
+            words = tokenize(product.get("title", ""))
+            self._product_tokens[pid] = words
+            for word in words:
+                self.tokens.setdefault(word, []).append(pid)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def match_title(self, product_name):
+        return self.by_title.get(normalize_title(product_name))
+
+    def match_fuzzy(self, product_name):
+        """
+        Best catalog product by word overlap (Jaccard similarity), or None
+        if nothing reaches min_score. Ties go to the earliest catalog entry.
+
+        Every word of the sales name must appear in the catalog title: the
+        catalog may be more specific ("Mouse" -> "Wireless Mouse"), but a
+        sales name with extra words is a different product ("Laptop
+        Charger" is not a "Laptop").
+        """
+        words = tokenize(product_name)
+        if not words:
+            return None
+        overlap = {}
+        for word in words:
+            for pid in self.tokens.get(word, ()):
+                overlap[pid] = overlap.get(pid, 0) + 1
+
+        best, best_score = None, 0.0
+        for pid, shared in overlap.items():
+            if shared < len(words):
+                continue
+            score = shared / len(words | self._product_tokens[pid])
+            if score > best_score:
+                best, best_score = pid, score
+        if best is None or best_score < self.min_score:
+            return None
+        return self.by_id[best]
+
+    def match(self, product_name):
+        """
+        Matches a sales product to the catalog by exact normalized title,
+        then by fuzzy title. Sales ProductIDs ("P101") are not catalog ids,
+        so they are never used.
+
+        Returns: tuple (catalog product or None, method or None)
+        """
+        product = self.match_title(product_name)
+        if product is not None:
+            return product, "title"
+        product = self.match_fuzzy(product_name)
+        if product is not None:
+            return product, "fuzzy"
+        return None, None
+
+
+class EnrichmentResult:
+    """
+    Output of enrich_transactions:
+        transactions: enriched transaction dicts (None when only product
+                      names were enriched, e.g. from a SalesAggregate)
+        matched:      ProductName -> matched catalog product
+        unmatched:    ProductNames with no catalog match (first-seen order)
+        match_counts: method ("title"/"fuzzy") -> rows matched by it
+    """
+
+    def __init__(self):
+        self.transactions = None
+        self.matched = {}
+        self.unmatched = []
+        self.match_counts = {}
+
+    def __len__(self):
+        return len(self.matched)
+
+
+@instrumented("enrich_transactions")
+def enrich_transactions(transactions, index):
+    """
+    Joins each transaction to the catalog in a single pass.
+
+    Matching runs once per distinct ProductName and is memoized, so the cost stays linear in the number of transactions no
+    matter how large the catalog grows. Each enriched transaction is a copy
+    of the original with the ENRICHED_FIELDS added (None when unmatched).
+
+    A SalesAggregate can be passed instead of transactions: its product
+    names are matched the same way, so matched/unmatched are identical to
+    those of the transactions it was built from, and result.transactions
+    stays None.
+
+    Returns: EnrichmentResult
+    """
+    result = EnrichmentResult()
+    unmatched = {}
+
+    def record(name, product, method):
+        if product is None:
+            unmatched.setdefault(name, None)
+        else:
+            result.matched.setdefault(name, product)
+            result.match_counts[method] = result.match_counts.get(method, 0) + 1
+
+    if isinstance(transactions, SalesAggregate):
+        for name in transactions.product_stats:
+            product, method = index.match(name)
+            record(name, product, method)
+    else:
+        memo = {}
+        enriched = []
+        for t in transactions:
+            name = t.get("ProductName")
+            hit = memo.get(name)
+            if hit is None:
+                hit = memo[name] = index.match(name)
+            product, method = hit
+            record(name, product, method)
+
+            row = dict(t.items())
+            for field, source in ENRICHED_FIELDS.items():
+                row[field] = product.get(source) if product is not None else None
+            row["API_Match"] = method
+            enriched.append(row)
+        result.transactions = enriched
+
+    result.unmatched = [name for name in unmatched if name not in result.matched]
+    return result
@@ -1,13 +1,177 @@
+import codecs
 import csv
+import io
 import os
 
-def read_sales_data(filepath):
+from utils.instrumentation import instrumented
+
+# Tried in order for the whole file (on a sample), then for any bytes the
+# chosen encoding rejects. latin-1 accepts any byte, so it goes last.
+ENCODINGS = ("utf-8", "cp1252", "latin-1")
+SAMPLE_BYTES = 64 * 1024
+FALLBACK_ERRORS = "sales_fallback"
+_fallback = os.environ.get("SALES_ENCODING_FALLBACK", "0").lower() in ("1", "true", "on")
+
+
+def set_encoding_fallback(enabled):
+    """
+    Sets how read_sales_data, iter_sales_data and the byte-level readers
+    (sniff_encoding) decode files by default: False (the default) as
+    strict UTF-8, raising UnicodeDecodeError on a bad byte; True with
+    encoding detection and fallback decoding (see iter_decoded_lines).
+    """
+    global _fallback
+    _fallback = bool(enabled)
+
+
+def get_encoding_fallback():
+    return _fallback
+
+
+class _HashingReader(io.RawIOBase):
+    """
+    Raw binary stream that feeds every byte read through it to `digest`.
+    """
+
+    def __init__(self, raw, digest):
+        self._raw = raw
+        self._digest = digest
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = self._raw.readinto(buffer)
+        if n:
+            self._digest.update(memoryview(buffer)[:n])
+        return n
+
+
+def detect_encoding(sample, encodings=ENCODINGS):
+    """
+    Picks the first encoding that decodes a sample of the file. The sample
+    may end mid-character, so it is fed to an incremental decoder.
+    Returns: encoding name, or None if none of them fits
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    for enc in encodings:
+        try:
+            codecs.getincrementaldecoder(enc)().decode(sample, final=False)
+        except UnicodeDecodeError:
+            continue
+        return enc
+    return None
+
+
+def _decode_fallback(error):
+    """
+    Codec error handler: decodes the bytes the file's encoding rejected
+    with the next of ENCODINGS that accepts them, and carries on.
+    """
+    bad = error.object[error.start:error.end]
+    for enc in ENCODINGS:
+        if codecs.lookup(enc).name == codecs.lookup(error.encoding).name:
+            continue
+        try:
+            return bad.decode(enc), error.end
+        except UnicodeDecodeError:
+            continue
+    raise error
+
+
+codecs.register_error(FALLBACK_ERRORS, _decode_fallback)
+
+
+def sniff_encoding(filepath, fallback=None, encodings=ENCODINGS):
+    """
+    Picks how to decode a file the way read_sales_data does (fallback:
+    see set_encoding_fallback), for readers that decode raw byte lines
+    themselves (byte ranges, appended lines) with decode_line. With
+    fallback the encoding is detected from the first SAMPLE_BYTES.
+    Returns: tuple (encoding, errors) for decode_line
+    """
+    if not (_fallback if fallback is None else fallback):
+        return "utf-8", "strict"
+    with open(filepath, "rb") as f:
+        return detect_encoding(f.read(SAMPLE_BYTES), encodings) or encodings[0], FALLBACK_ERRORS
+
+
+def decode_line(line, encoding, errors=FALLBACK_ERRORS):
+    """
+    Decodes one raw line like iter_decoded_lines would: with the fallback
+    error handler, bytes the encoding rejects are decoded with another of
+    ENCODINGS.
     """
-    Load sales data from a pipe-delimited text file.
+    return line.decode(encoding, errors)
+
+
+def iter_decoded_lines(filepath, encodings=ENCODINGS, digest=None, fallback=True):
+    """
+    Lazily yields the lines of a text file in unknown or mixed encoding,
+    reading it once.
+
+    The encoding is picked from the first SAMPLE_BYTES (see detect_encoding,
+    the sample is peeked, not consumed). The rest goes through the same
+    buffered stream and incremental decoder; bytes it cannot decode (e.g.
+    a stray latin-1 byte deep into a UTF-8 file) are decoded on the spot
+    by the fallback error handler instead of rereading the file. Lines keep
+    their ending and newlines are translated as in text mode.
+
+    With fallback=False nothing is detected: the file is decoded as strict
+    UTF-8 and a bad byte raises UnicodeDecodeError.
+
+    With a hashlib `digest`, the raw bytes are fed to it as they are read,
+    so the file can be hashed (e.g. for the parse cache) in the same pass.
+    """
+    with open(filepath, "rb", buffering=0) as raw:
+        f = io.BufferedReader(_HashingReader(raw, digest) if digest is not None else raw,
+                              SAMPLE_BYTES)
+        if fallback:
+            encoding = detect_encoding(f.peek(SAMPLE_BYTES)[:SAMPLE_BYTES], encodings) or encodings[0]
+            errors = FALLBACK_ERRORS
+        else:
+            encoding, errors = "utf-8", "strict"
+        with io.TextIOWrapper(f, encoding=encoding, errors=errors, newline=None) as text:
+            yield from text
+
+
+def iter_clean_lines(filepath, encodings=ENCODINGS):
+    """
+    Lazily yields stripped, non-empty lines of a sales file, skipping the
+    header row if present (see iter_decoded_lines for decoding).
+    """
+    lines = iter_decoded_lines(filepath, encodings)
+    for i, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            continue
+        # Skip header row if present
+        if i == 0 and "TransactionID" in line:
+            continue
+        yield line
+
+
+@instrumented("read_sales_data", count_input=False)
+def read_sales_data(filepath, digest=None, fallback=None):
+    """
+    Load sales data from a pipe-delimited text file, as strict UTF-8
+    unless `fallback` (default: set_encoding_fallback) is enabled.
+    `digest` is passed on to iter_decoded_lines.
     Returns a list of raw lines (strings).
     """
-    with open(filepath, "r", encoding="utf-8") as f:
-        return f.readlines()
+    return list(iter_sales_data(filepath, digest, fallback))
+
+
+def iter_sales_data(filepath, digest=None, fallback=None):
+    """
+    Lazily yield raw lines from a pipe-delimited sales file.
+    Streaming counterpart of read_sales_data: only one line is held in
+    memory at a time.
+    """
+    if fallback is None:
+        fallback = _fallback
+    return iter_decoded_lines(filepath, digest=digest, fallback=fallback)
 
 
 def load_sales_data(filepath):
@@ -36,35 +200,14 @@ def read_sales_data_with_fallback(filename):
     """
     Reads sales data from file, trying multiple encodings.
     Cleans out empty lines and header row if present.
+    The file is read once; see iter_clean_lines for a lazy version.
     Returns: list of raw lines (strings).
     """
-    encodings_to_try = ["utf-8", "latin-1", "cp1252"]
-
-    lines = []
-    for enc in encodings_to_try:
-        try:
-            with open(filename, "r", encoding=enc) as f:
-                lines = f.readlines()
-                break
-        except UnicodeDecodeError:
-            continue
-        except FileNotFoundError:
-            print(f"Error: File '{filename}' not found.")
-            return []
-
-    else:
+    try:
+        return list(iter_clean_lines(filename))
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found.")
+        return []
+    except UnicodeDecodeError:
         print(f"Error: Could not decode file '{filename}' with supported encodings.")
         return []
-
-    cleaned_lines = []
-    for i, line in enumerate(lines):
-        line = line.strip()
-        if not line:
-            continue
-        # Skip header row if present
-        if i == 0 and "TransactionID" in line:
-            continue
-        cleaned_lines.append(line)
-
-    return cleaned_lines
-           
\ No newline at end of file
@@ -0,0 +1,160 @@
+import heapq
+import itertools
+import math
+
+
+def capacity_for_error(epsilon):
+    """
+    Returns: the SpaceSaving capacity whose error bound is at most
+    epsilon * total weight (e.g. epsilon=0.001 -> 1000 counters).
+    """
+    if not 0 < epsilon <= 1:
+        raise ValueError("epsilon must be in (0, 1]")
+    return math.ceil(1 / epsilon)
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitters sketch (Metwally, Agrawal & El Abbadi) for
+    weighted counts, using a fixed number of counters.
+
+    Each tracked key has counters [count, error, hits]:
+        count: estimated total weight (never below the true total)
+        error: how much of count may come from keys it replaced, so the
+               true total lies in [count - error, count]
+        hits:  updates seen since the key was (last) tracked
+    When all `capacity` counters are in use, a new key takes over the
+    counter with the smallest count, inheriting it as its error.
+
+    Guarantees, with W the total weight seen:
+      - every estimate overestimates by at most error_bound() <= W / capacity;
+      - every key whose true total exceeds W / capacity is tracked.
+    Memory is O(capacity) however many distinct keys are seen.
+    """
+
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.total = 0
+        self.counters = {}
+        # Min-heap of (count, seq, key), one entry per tracked key. Counts
+        # only grow, so an entry may be stale (lower than the real count);
+        # stale entries are refreshed lazily when they reach the top.
+        self._heap = []
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self.counters)
+
+    def update(self, key, weight=1, hits=1):
+        """
+        Adds `weight` (>= 0) to `key`, as `hits` updates (e.g. the
+        transaction count of a pre-aggregated customer).
+        """
+        self.total += weight
+        counter = self.counters.get(key)
+        if counter is not None:
+            counter[0] += weight
+            counter[2] += hits
+            return
+        if len(self.counters) < self.capacity:
+            self.counters[key] = [weight, 0, hits]
+            heapq.heappush(self._heap, (weight, next(self._seq), key))
+            return
+
+        heap = self._heap
+        while True:
+            count, _, victim = heap[0]
+            current = self.counters[victim][0]
+            if current == count:
+                break
+            heapq.heapreplace(heap, (current, next(self._seq), victim))
+        del self.counters[victim]
+        self.counters[key] = [count + weight, count, hits]
+        heapq.heapreplace(heap, (count + weight, next(self._seq), key))
+
+    def min_count(self):
+        """
+        Returns: the smallest tracked count once every counter is in use
+        (an upper bound on the total of any untracked key), otherwise 0.
+        """
+        if len(self.counters) < self.capacity:
+            return 0
+        return min(c[0] for c in self.counters.values())
+
+    def error_bound(self):
+        """
+        Returns: the largest possible overestimate of any reported count.
+        Always <= total / capacity.
+        """
+        return max((c[1] for c in self.counters.values()), default=0)
+
+    def top(self, n):
+        """
+        Returns: up to n (key, count, error, hits) tuples, largest count
+        first (ties in tracking order).
+        """
+        return [(key, c[0], c[1], c[2])
+                for key, c in heapq.nlargest(n, self.counters.items(), key=lambda x: x[1][0])]
+
+    def guaranteed_top(self, n):
+        """
+        Returns: the leading entries of top(n) whose rank is certain, i.e.
+        whose lower bound (count - error) is at least the next count.
+        """
+        entries = self.top(n + 1)
+        result = []
+        for i, entry in enumerate(entries[:n]):
+            following = entries[i + 1][1] if i + 1 < len(entries) else self.min_count()
+            if entry[1] - entry[2] < following:
+                break
+            result.append(entry)
+        return result
+
+    def merge(self, other):
+        """
+        Merges another sketch into this one (mergeable summaries: keys
+        missing from one side are charged that side's min_count as extra
+        error). The result keeps this sketch's capacity.
+        Returns: self
+        """
+        own_min = self.min_count()
+        other_min = other.min_count()
+        merged = {}
+        for key, (count, error, hits) in self.counters.items():
+            theirs = other.counters.get(key)
+            if theirs is None:
+                merged[key] = [count + other_min, error + other_min, hits]
+            else:
+                merged[key] = [count + theirs[0], error + theirs[1], hits + theirs[2]]
+        for key, (count, error, hits) in other.counters.items():
+            if key not in merged:
+                merged[key] = [count + own_min, error + own_min, hits]
+
+        if len(merged) > self.capacity:
+            merged = dict(heapq.nlargest(self.capacity, merged.items(), key=lambda x: x[1][0]))
+        self.total += other.total
+        self.counters = merged
+        self._heap = [(c[0], next(self._seq), key) for key, c in merged.items()]
+        heapq.heapify(self._heap)
+        return self
+
+    def copy(self):
+        return SpaceSaving.from_dict(self.to_dict())
+
+    def to_dict(self):
+        return {
+            "capacity": self.capacity,
+            "total": self.total,
+            "counters": [[key, c[0], c[1], c[2]] for key, c in self.counters.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["capacity"])
+        sketch.total = data["total"]
+        sketch.counters = {key: [count, error, hits] for key, count, error, hits in data["counters"]}
+        sketch._heap = [(c[0], next(sketch._seq), key) for key, c in sketch.counters.items()]
+        heapq.heapify(sketch._heap)
+        return sketch
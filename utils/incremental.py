@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+
+from utils.aggregator import SalesAggregate
+from utils.file_handler import decode_line, sniff_encoding
+from utils.instrumentation import instrumented
+from utils.parser import add_pushdown_counts, iter_transactions
+from utils.validator import iter_valid_transactions, merge_filter_summaries
+
+STATE_VERSION = 2
+DEFAULT_STATE_FILE = "output/.sales_state.json"
+
+# The processed prefix is fingerprinted as a list of blake2b digests, one
+# per FINGERPRINT_BLOCK bytes (the last block may be shorter). Every byte
+# is hashed, so a rewrite anywhere in the prefix is noticed, and after an
+# append only the last partial block and the new bytes are hashed again.
+FINGERPRINT_BLOCK = 1024 * 1024
+
+
+def _hash_blocks(f, start, end):
+    f.seek(start)
+    digests = []
+    while start < end:
+        data = f.read(min(FINGERPRINT_BLOCK, end - start))
+        if not data:
+            break
+        digests.append(hashlib.blake2b(data, digest_size=16).hexdigest())
+        start += len(data)
+    return digests
+
+
+def prefix_fingerprint(filepath, offset, previous=None):
+    """
+    Fingerprints the first `offset` bytes of a file.
+
+    `previous` may be the fingerprint of a shorter prefix of the same file
+    that was just checked with fingerprint_matches; its complete blocks
+    are reused instead of being hashed again.
+
+    Returns: list of hex block digests
+    """
+    # The last previous block may have been partial, so it is hashed again
+    reused = list(previous or ())[:-1][:offset // FINGERPRINT_BLOCK]
+    with open(filepath, "rb") as f:
+        return reused + _hash_blocks(f, len(reused) * FINGERPRINT_BLOCK, offset)
+
+
+def fingerprint_matches(filepath, offset, fingerprint):
+    """
+    Returns: True if the first `offset` bytes of the file still have this
+    fingerprint. Reading stops at the first block that differs.
+    """
+    if not isinstance(fingerprint, list) or len(fingerprint) != -(-offset // FINGERPRINT_BLOCK):
+        return False
+    with open(filepath, "rb") as f:
+        for i, expected in enumerate(fingerprint):
+            start = i * FINGERPRINT_BLOCK
+            if _hash_blocks(f, start, min(start + FINGERPRINT_BLOCK, offset)) != [expected]:
+                return False
+    return True
+
+
+def load_state(state_file):
+    """
+    Loads saved incremental state, or returns None if missing or unreadable.
+    """
+    try:
+        with open(state_file, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if state.get("version") != STATE_VERSION:
+        return None
+    return state
+
+
+def save_state(state_file, state):
+    """
+    Writes state atomically (temp file + rename) so a crash mid-write never
+    leaves a half-written checkpoint behind.
+    """
+    directory = os.path.dirname(state_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_file = state_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_file, state_file)
+
+
+def _iter_complete_lines(f, progress, encoding, errors):
+    """
+    Yields decoded newline-terminated lines from the current file position,
+    advancing progress["offset"]. An unterminated last line (a write still
+    in progress) is stored, decoded, in progress["tail"] instead.
+    """
+    for line in f:
+        if not line.endswith(b"\n"):
+            progress["tail"] = decode_line(line, encoding, errors)
+            break
+        progress["offset"] += len(line)
+        yield decode_line(line, encoding, errors)
+
+
+def _aggregate_lines(aggregate, summary, lines, filters):
+    new_summary = {}
+    pushdown = {}
+    transactions = iter_transactions(lines, stats=pushdown, **filters)
+    aggregate.update(iter_valid_transactions(transactions, summary=new_summary, **filters))
+    merge_filter_summaries(summary, add_pushdown_counts(new_summary, pushdown))
+
+
+def aggregate_appended_lines(filepath, start, aggregate, summary,
+                             region=None, min_amount=None, max_amount=None):
+    """
+    Adds the newline-terminated lines of `filepath` from byte offset
+    `start` on to `aggregate` and `summary` (a filter summary), in place.
+
+    Lines are decoded like read_sales_data would decode the whole file
+    (see sniff_encoding).
+
+    Returns: tuple (offset just past the last complete line, the decoded
+    unterminated last line or "")
+    """
+    filters = {"region": region, "min_amount": min_amount, "max_amount": max_amount}
+    progress = {"offset": start, "tail": ""}
+    encoding, errors = sniff_encoding(filepath)
+    with open(filepath, "rb") as f:
+        f.seek(start)
+        _aggregate_lines(aggregate, summary, _iter_complete_lines(f, progress, encoding, errors), filters)
+    return progress["offset"], progress["tail"]
+
+
+def aggregate_tail(tail, aggregate, summary, region=None, min_amount=None, max_amount=None):
+    """
+    Adds an unterminated last line returned by aggregate_appended_lines.
+    """
+    filters = {"region": region, "min_amount": min_amount, "max_amount": max_amount}
+    _aggregate_lines(aggregate, summary, [tail], filters)
+
+
+@instrumented("incremental_sales_aggregate", count_input=False)
+def incremental_sales_aggregate(filepath, state_file=DEFAULT_STATE_FILE,
+                                region=None, min_amount=None, max_amount=None):
+    """
+    Aggregates only the lines appended to `filepath` since the last run.
+
+    The saved state holds the processed byte offset, a fingerprint of the
+    processed prefix, the filters and approximation settings used and the
+    serialized SalesAggregate and filter summary. If the source, filters,
+    settings or prefix fingerprint no longer match (file rewritten,
+    truncated or replaced), everything is rebuilt from byte zero.
+
+    Only newline-terminated lines are checkpointed. A trailing unterminated
+    line is included in the returned results but re-read on the next run.
+
+    Returns: tuple (SalesAggregate, filter_summary, info) where info has
+    keys mode ("incremental" or "full"), start_offset and end_offset.
+    """
+    filters = {"region": region, "min_amount": min_amount, "max_amount": max_amount}
+    # Approximation settings are part of the saved aggregate, so changing
+    # them forces a rebuild as well
+    fresh = SalesAggregate()
+    aggregate_mode = {
+        "top_k_capacity": fresh.customer_sketch.capacity if fresh.approximate else None,
+        "unique_precision": fresh.unique_precision,
+    }
+    source = os.path.abspath(filepath)
+    size = os.path.getsize(filepath)
+    state = load_state(state_file)
+
+    if (state is not None
+            and state["source"] == source
+            and state["filters"] == filters
+            and state.get("aggregate_mode") == aggregate_mode
+            and state["offset"] <= size
+            and fingerprint_matches(filepath, state["offset"], state["fingerprint"])):
+        mode = "incremental"
+        aggregate = SalesAggregate.from_dict(state["aggregate"])
+        summary = state["summary"]
+        start = state["offset"]
+        previous = state["fingerprint"]
+    else:
+        mode = "full"
+        aggregate = fresh
+        summary = merge_filter_summaries({}, {})
+        start = 0
+        previous = None
+
+    end, tail = aggregate_appended_lines(filepath, start, aggregate, summary, **filters)
+
+    save_state(state_file, {
+        "version": STATE_VERSION,
+        "source": source,
+        "filters": filters,
+        "aggregate_mode": aggregate_mode,
+        "offset": end,
+        "fingerprint": prefix_fingerprint(filepath, end, previous),
+        "aggregate": aggregate.to_dict(),
+        "summary": summary,
+    })
+
+    if tail:
+        aggregate_tail(tail, aggregate, summary, **filters)
+
+    info = {"mode": mode, "start_offset": start, "end_offset": end}
+    return aggregate, summary, info
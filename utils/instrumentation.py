@@ -0,0 +1,360 @@
+import atexit
+import bisect
+import functools
+import os
+import sys
+import time
+
+from utils.lazy import lazy_import
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Only needed once instrumentation is enabled: imported on first use, so
+# every module that imports this one does not pay for them at startup
+cProfile = lazy_import("cProfile")
+json = lazy_import("json")
+tracemalloc = lazy_import("tracemalloc")
+
+FORMATS = ("table", "jsonl")
+
+# Upper bounds (milliseconds) of the API latency histogram buckets; the
+# last bucket holds everything slower.
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class _State:
+    enabled = False
+    fmt = "table"
+    output = None
+    trace_memory = True
+    profile_stage = None
+    profile_dir = "output"
+    records = []
+    stack = []
+    latencies = {}
+    reported = False
+    atexit_registered = False
+
+
+_state = _State()
+
+
+def enabled():
+    return _state.enabled
+
+
+def enable(fmt="table", output=None, trace_memory=True, profile_stage=None, profile_dir="output"):
+    """
+    Turns instrumentation on for the rest of the process.
+
+    fmt:           "table" (summary table) or "jsonl" (one JSON object per
+                   stage / histogram)
+    output:        file to write to (default: stderr)
+    trace_memory:  record tracemalloc deltas (slows Python allocations)
+    profile_stage: name of one stage to run under cProfile; stats are
+                   dumped to <profile_dir>/profile_<stage>.prof
+
+    The report is written automatically at exit unless report() was
+    already called.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown instrumentation format '{fmt}' (expected one of {FORMATS})")
+    _state.enabled = True
+    _state.fmt = fmt
+    _state.output = output
+    _state.trace_memory = trace_memory
+    _state.profile_stage = profile_stage
+    _state.profile_dir = profile_dir
+    _state.reported = False
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if not _state.atexit_registered:
+        atexit.register(report)
+        _state.atexit_registered = True
+
+
+def disable():
+    _state.enabled = False
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def reset():
+    """
+    Discards recorded stages and latencies.
+    """
+    _state.records = []
+    _state.stack = []
+    _state.latencies = {}
+    _state.reported = False
+
+
+def configure_from_env():
+    """
+    Enables instrumentation when SALES_INSTRUMENT is set to 1/table/jsonl
+    (called by main.py; importing this module has no side effects).
+    Also reads SALES_INSTRUMENT_OUTPUT, SALES_INSTRUMENT_TRACEMALLOC (0 to
+    skip memory tracing) and SALES_PROFILE_STAGE.
+    """
+    value = os.environ.get("SALES_INSTRUMENT", "").lower()
+    if value in ("", "0", "false", "off"):
+        return
+    enable(
+        fmt=value if value in FORMATS else "table",
+        output=os.environ.get("SALES_INSTRUMENT_OUTPUT") or None,
+        trace_memory=os.environ.get("SALES_INSTRUMENT_TRACEMALLOC", "1").lower()
+        not in ("0", "false", "off"),
+        profile_stage=os.environ.get("SALES_PROFILE_STAGE") or None,
+    )
+
+
+def _peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def count_rows(obj):
+    """
+    Best-effort row count of a stage input or output: len() of sized
+    objects, the first item of a (rows, ...) tuple, or a SalesAggregate's
+    transaction_count. None when unknown.
+    """
+    if isinstance(obj, tuple) and obj:
+        obj = obj[0]
+    count = getattr(obj, "transaction_count", None)
+    if count is not None:
+        return count
+    try:
+        return len(obj)
+    except TypeError:
+        return None
+
+
+class _NullStage:
+    """
+    Stand-in returned by stage() when instrumentation is off.
+    """
+
+    rows_in = None
+    rows_out = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Stage:
+    """
+    Measures one pipeline stage. Set rows_in / rows_out inside the block
+    if they were not known when it started.
+    """
+
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self._profiler = None
+        self._child_peak = 0
+
+    def __enter__(self):
+        self.parent = _state.stack[-1].name if _state.stack else None
+        _state.stack.append(self)
+        if _state.trace_memory and tracemalloc.is_tracing():
+            self._mem_start = tracemalloc.get_traced_memory()[0]
+            # Resetting also hides earlier allocations from an enclosing
+            # stage's peak; nested stages pass their peak up in __exit__
+            tracemalloc.reset_peak()
+        else:
+            self._mem_start = None
+        if _state.profile_stage == self.name:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._start
+        if self._profiler is not None:
+            self._profiler.disable()
+            os.makedirs(_state.profile_dir, exist_ok=True)
+            self._profiler.dump_stats(os.path.join(_state.profile_dir, f"profile_{self.name}.prof"))
+
+        mem_delta = mem_peak = None
+        if self._mem_start is not None and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, self._child_peak)
+            mem_delta = current - self._mem_start
+            mem_peak = peak - self._mem_start
+        _state.stack.pop()
+        if mem_peak is not None and _state.stack:
+            parent = _state.stack[-1]
+            parent._child_peak = max(parent._child_peak, peak)
+
+        _state.records.append({
+            "stage": self.name,
+            "parent": self.parent,
+            "seconds": round(seconds, 6),
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "rows_per_sec": round(self.rows_in / seconds, 1) if self.rows_in and seconds > 0 else None,
+            "peak_rss_kb": _peak_rss_kb(),
+            "tracemalloc_delta_bytes": mem_delta,
+            "tracemalloc_peak_bytes": mem_peak,
+            "error": exc_type.__name__ if exc_type else None,
+        })
+        return False
+
+
+def stage(name, rows_in=None):
+    """
+    Context manager timing one stage:
+
+        with stage("parse", rows_in=len(lines)) as s:
+            rows = parse(lines)
+            s.rows_out = len(rows)
+
+    Costs one attribute check when instrumentation is off.
+    """
+    if not _state.enabled:
+        return _NULL_STAGE
+    return Stage(name, rows_in)
+
+
+def instrumented(name, count_input=True):
+    """
+    Decorator recording every call of a function as stage `name`, with
+    rows in/out taken from its first argument (unless count_input is
+    False, e.g. when it is a file path) and its result (see count_rows).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled:
+                return func(*args, **kwargs)
+            rows_in = count_rows(args[0]) if count_input and args else None
+            with Stage(name, rows_in) as s:
+                result = func(*args, **kwargs)
+                s.rows_out = count_rows(result)
+            return result
+        return wrapper
+    return decorator
+
+
+def record_latency(name, seconds):
+    """
+    Adds one observation to the latency histogram `name`.
+    """
+    if not _state.enabled:
+        return
+    histogram = _state.latencies.get(name)
+    if histogram is None:
+        histogram = _state.latencies[name] = {
+            "counts": [0] * (len(LATENCY_BUCKETS_MS) + 1), "total": 0.0, "max": 0.0, "n": 0,
+        }
+    ms = seconds * 1000.0
+    histogram["counts"][bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+    histogram["total"] += ms
+    histogram["n"] += 1
+    if ms > histogram["max"]:
+        histogram["max"] = ms
+
+
+def _bucket_labels():
+    return [f"<={b}ms" for b in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+
+
+def latency_summary():
+    """
+    Returns: dict name -> {count, mean_ms, max_ms, buckets{label: count}}
+    """
+    labels = _bucket_labels()
+    return {
+        name: {
+            "count": h["n"],
+            "mean_ms": round(h["total"] / h["n"], 3) if h["n"] else None,
+            "max_ms": round(h["max"], 3),
+            "buckets": dict(zip(labels, h["counts"])),
+        }
+        for name, h in _state.latencies.items()
+    }
+
+
+def records():
+    """
+    Returns: list of stage records, in completion order.
+    """
+    return list(_state.records)
+
+
+def _format_table():
+    lines = [
+        f"{'stage':<32} {'seconds':>10} {'rows in':>10} {'rows out':>10} "
+        f"{'rows/sec':>12} {'peak RSS KB':>12} {'mem delta KB':>13}"
+    ]
+    parents = {record["stage"]: record["parent"] for record in _state.records}
+    for record in _state.records:
+        depth, parent = 0, record["parent"]
+        while parent is not None and depth < len(parents):
+            depth, parent = depth + 1, parents.get(parent)
+        name = "  " * depth + record["stage"]
+        delta = record["tracemalloc_delta_bytes"]
+        lines.append(
+            f"{name:<32} {record['seconds']:>10.4f} {_fmt(record['rows_in']):>10} "
+            f"{_fmt(record['rows_out']):>10} {_fmt(record['rows_per_sec']):>12} "
+            f"{_fmt(record['peak_rss_kb']):>12} {_fmt(delta // 1024 if delta is not None else None):>13}"
+        )
+    for name, summary in latency_summary().items():
+        lines.append("")
+        lines.append(f"{name} latency: {summary['count']} calls, "
+                     f"mean {summary['mean_ms']} ms, max {summary['max_ms']} ms")
+        for label, count in summary["buckets"].items():
+            if count:
+                lines.append(f"  {label:>10} {count:>6}")
+    return "\n".join(lines) + "\n"
+
+
+def _fmt(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:,.0f}"
+    return f"{value:,}"
+
+
+def _format_jsonl():
+    lines = [json.dumps(record) for record in _state.records]
+    for name, summary in latency_summary().items():
+        lines.append(json.dumps(dict(histogram=name, **summary)))
+    return "".join(line + "\n" for line in lines)
+
+
+def report(fmt=None, output=None):
+    """
+    Writes the recorded stages and latency histograms as a summary table
+    or JSON lines, to `output` (a path) or stderr.
+    """
+    if not _state.enabled or _state.reported:
+        return
+    _state.reported = True
+    fmt = fmt or _state.fmt
+    output = output or _state.output
+    text = _format_jsonl() if fmt == "jsonl" else _format_table()
+    if output:
+        directory = os.path.dirname(output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(output, "a" if fmt == "jsonl" else "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        sys.stderr.write(text)
+
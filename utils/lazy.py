@@ -0,0 +1,29 @@
+import importlib.util
+import sys
+
+
+def lazy_import(name, optional=False):
+    """
+    Returns module `name` without executing it yet: the real import runs
+    on first attribute access (importlib.util.LazyLoader). Keeps heavy
+    dependencies such as requests or NumPy off the startup path of
+    commands that never use them.
+
+    Whether the module is installed is still checked up front (a cheap
+    finder lookup): a missing module raises ImportError, or returns None
+    when optional=True.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        if optional:
+            return None
+        raise ImportError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,191 @@
+"""
+Optional NumPy implementation of the SalesAggregate build and views.
+
+Select it at runtime with utils.aggregator.set_backend("numpy") or the
+SALES_ANALYTICS_BACKEND=numpy environment variable. When NumPy is not
+installed the pure-Python path is used instead.
+
+Every result matches the pure-Python backend exactly:
+- keys are factorized in first-seen order, so dictionary order and
+  tie-breaking are unchanged;
+- np.bincount / np.add.at accumulate sequentially in row order, so float
+  totals are bit-for-bit the same as the Python loops.
+"""
+
+from utils.lazy import lazy_import
+from utils.transaction_table import TransactionTable
+
+# NumPy is optional (None when not installed) and only really imported
+# when the numpy backend first runs
+np = lazy_import("numpy", optional=True)
+
+
+def is_available():
+    """
+    Returns: True if NumPy could be imported.
+    """
+    return np is not None
+
+
+def factorize(values):
+    """
+    Maps each value to an integer code in first-seen order.
+
+    Returns: tuple (codes ndarray, list of unique values)
+    """
+    lookup = {}
+    codes = np.fromiter(
+        (lookup.setdefault(v, len(lookup)) for v in values),
+        dtype=np.int64, count=len(values)
+    )
+    return codes, list(lookup)
+
+
+def factorize_codes(column):
+    """
+    Re-codes a CategoricalColumn so codes follow first-seen order within
+    this column (its Dictionary may be shared with a larger table), without
+    touching the strings.
+
+    Returns: tuple (codes ndarray, list of unique values), like factorize
+    """
+    codes = np.frombuffer(column.codes, dtype=np.uint32) if len(column) else np.zeros(0, np.uint32)
+    present, first = np.unique(codes, return_index=True)
+    present = present[np.argsort(first, kind="stable")]
+    remap = np.zeros(len(column.dictionary), dtype=np.int64)
+    remap[present] = np.arange(len(present))
+    by_code = column.dictionary.by_code
+    return remap[codes], [by_code[c] for c in present.tolist()]
+
+
+def _columns(transactions):
+    """
+    Extracts the columns needed for aggregation as NumPy arrays / lists.
+    Categorical columns of a TransactionTable are returned already
+    factorized (codes, values); see factorize_codes.
+    Rows with non-numeric Quantity/UnitPrice are dropped, like the Python path.
+    """
+    if isinstance(transactions, TransactionTable):
+        qty = np.frombuffer(transactions.quantity, dtype=np.int64) if len(transactions) else np.zeros(0, np.int64)
+        price = np.frombuffer(transactions.unit_price, dtype=np.float64) if len(transactions) else np.zeros(0)
+        return (qty, price) + tuple(
+            factorize_codes(transactions.column(name))
+            for name in ("Region", "ProductName", "CustomerID", "Date"))
+
+    qty, price, regions, products, customers, dates = [], [], [], [], [], []
+    for t in transactions:
+        try:
+            q = int(t.get("Quantity", 0))
+            p = float(t.get("UnitPrice", 0.0))
+        except (ValueError, TypeError):
+            continue
+        qty.append(q)
+        price.append(p)
+        regions.append(t.get("Region", "Unknown"))
+        products.append(t.get("ProductName", "Unknown"))
+        customers.append(t.get("CustomerID", "Unknown"))
+        dates.append(t.get("Date", "Unknown"))
+    return (np.array(qty, dtype=np.int64), np.array(price, dtype=np.float64),
+            factorize(regions), factorize(products), factorize(customers), factorize(dates))
+
+
+# Largest int64, the bound for a combined (key, member) pair code
+_MAX_PAIR_CODE = 2 ** 63 - 1
+
+
+def _group_sets(key_codes, member_codes, n_keys, n_members, members):
+    """
+    Builds {key_code: set(members)} from two parallel code arrays using
+    only the distinct (key, member) pairs.
+
+    Pairs are combined into one int64 (key * n_members + member) when that
+    cannot overflow, and deduplicated as stacked rows otherwise.
+    """
+    if n_keys * n_members <= _MAX_PAIR_CODE:
+        pairs = np.unique(key_codes * n_members + member_codes)
+        keys, member_codes = (pairs // n_members).tolist(), (pairs % n_members).tolist()
+    else:
+        pairs = np.unique(np.stack((key_codes, member_codes), axis=1), axis=0)
+        keys, member_codes = pairs[:, 0].tolist(), pairs[:, 1].tolist()
+    sets = [set() for _ in range(n_keys)]
+    for key, member in zip(keys, member_codes):
+        sets[key].add(members[member])
+    return sets
+
+
+def aggregate_into(aggregate, transactions):
+    """
+    Fills an empty SalesAggregate from transactions with array operations.
+    Returns: aggregate
+    """
+    qty, price, regions, products, customers, dates = _columns(transactions)
+    n = len(qty)
+    if n == 0:
+        return aggregate
+
+    revenue = qty.astype(np.float64) * price
+
+    region_codes, region_keys = regions
+    product_codes, product_keys = products
+    customer_codes, customer_keys = customers
+    date_codes, date_keys = dates
+
+    aggregate.total_revenue += float(np.bincount(np.zeros(n, dtype=np.int64), weights=revenue)[0])
+    aggregate.transaction_count += n
+
+    # Region totals
+    sales = np.bincount(region_codes, weights=revenue, minlength=len(region_keys)).tolist()
+    counts = np.bincount(region_codes, minlength=len(region_keys)).tolist()
+    for key, s, c in zip(region_keys, sales, counts):
+        aggregate.region_stats[key] = [s, c]
+
+    # Product totals
+    total_qty = np.zeros(len(product_keys), dtype=np.int64)
+    np.add.at(total_qty, product_codes, qty)
+    product_revenue = np.bincount(product_codes, weights=revenue, minlength=len(product_keys)).tolist()
+    for key, q, r in zip(product_keys, total_qty.tolist(), product_revenue):
+        aggregate.product_stats[key] = [q, r]
+
+    # Customer totals
+    spent = np.bincount(customer_codes, weights=revenue, minlength=len(customer_keys)).tolist()
+    counts = np.bincount(customer_codes, minlength=len(customer_keys)).tolist()
+    bought = _group_sets(customer_codes, product_codes, len(customer_keys), len(product_keys), product_keys)
+    for key, s, c, b in zip(customer_keys, spent, counts, bought):
+        aggregate.customer_stats[key] = [s, c, b]
+
+    # Daily totals
+    daily = np.bincount(date_codes, weights=revenue, minlength=len(date_keys)).tolist()
+    counts = np.bincount(date_codes, minlength=len(date_keys)).tolist()
+    seen = _group_sets(date_codes, customer_codes, len(date_keys), len(customer_keys), customer_keys)
+    for key, r, c, s in zip(date_keys, daily, counts, seen):
+        aggregate.daily_stats[key] = [r, c, s]
+
+    return aggregate
+
+
+def top_n_indices(values, n):
+    """
+    Indices of the n largest values, largest first. Ties keep their
+    original (first-seen) order, matching sorted(..., reverse=True)[:n].
+    Uses argpartition-style selection so only the candidates are sorted.
+    """
+    values = np.asarray(values)
+    k = len(values)
+    if n < k:
+        kth = np.partition(values, k - n)[k - n]
+        candidates = np.flatnonzero(values >= kth)
+    else:
+        candidates = np.arange(k)
+    order = np.lexsort((candidates, -values[candidates]))
+    return candidates[order][:n].tolist()
+
+
+def below_threshold_indices(values, threshold):
+    """
+    Indices of values strictly below threshold, sorted by value ascending
+    with ties in original order (a stable sort).
+    """
+    values = np.asarray(values)
+    candidates = np.flatnonzero(values < threshold)
+    order = np.argsort(values[candidates], kind="stable")
+    return candidates[order].tolist()
@@ -0,0 +1,118 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.aggregator import SalesAggregate
+from utils.file_handler import decode_line, sniff_encoding
+from utils.instrumentation import instrumented
+from utils.parser import add_pushdown_counts, iter_transactions
+from utils.validator import iter_valid_transactions, merge_filter_summaries
+
+# Chunks per worker; a few more chunks than workers keeps every core busy
+# when some chunks parse slower than others.
+CHUNKS_PER_WORKER = 4
+
+
+def split_file_ranges(filepath, n_chunks):
+    """
+    Splits a file into at most n_chunks byte ranges whose boundaries fall
+    on line starts, so no line is split between two chunks.
+
+    Returns: list of (start, end) byte offsets covering the whole file
+    """
+    size = os.path.getsize(filepath)
+    if size == 0:
+        return []
+
+    n_chunks = max(1, n_chunks)
+    boundaries = [0]
+    with open(filepath, "rb") as f:
+        for i in range(1, n_chunks):
+            target = size * i // n_chunks
+            if target <= boundaries[-1]:
+                continue
+            # Move to the first line start at or after target
+            f.seek(target - 1)
+            f.readline()
+            pos = f.tell()
+            if boundaries[-1] < pos < size:
+                boundaries.append(pos)
+    boundaries.append(size)
+
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def iter_range_lines(filepath, start, end, encoding="utf-8", errors="strict"):
+    """
+    Lazily yield the decoded lines that start inside [start, end).
+    Undecodable bytes are handled as in read_sales_data (see decode_line).
+    """
+    with open(filepath, "rb") as f:
+        f.seek(start)
+        pos = start
+        for line in f:
+            if pos >= end:
+                break
+            pos += len(line)
+            yield decode_line(line, encoding, errors)
+
+
+def aggregate_range(filepath, start, end, region=None, min_amount=None, max_amount=None,
+                    encoding="utf-8", errors="strict", top_k_capacity=None, unique_precision=None):
+    """
+    Parses, validates and aggregates one byte range of a sales file.
+    Runs inside a worker process; `encoding` and `errors` are picked once
+    for the whole file by the caller (see sniff_encoding), and the approximation
+    settings are passed in too (see SalesAggregate), since a spawned
+    worker does not inherit the caller's set_top_k_capacity /
+    set_unique_precision.
+
+    Returns: tuple (SalesAggregate, filter_summary) for the range
+    """
+    summary = {}
+    pushdown = {}
+    filters = {"region": region, "min_amount": min_amount, "max_amount": max_amount}
+    transactions = iter_transactions(iter_range_lines(filepath, start, end, encoding, errors), stats=pushdown,
+                                     **filters)
+    valid = iter_valid_transactions(transactions, summary=summary, **filters)
+    aggregate = SalesAggregate(top_k_capacity, unique_precision)
+    return aggregate.update(valid), add_pushdown_counts(summary, pushdown)
+
+
+@instrumented("parallel_sales_aggregate", count_input=False)
+def parallel_sales_aggregate(filepath, workers=None, region=None, min_amount=None, max_amount=None):
+    """
+    Runs the streaming pipeline over line-aligned chunks of a file in a
+    process pool and merges the partial aggregates.
+
+    Partial results are merged in file order, so dictionary ordering (and
+    therefore tie-breaking in the views) matches a single-process run.
+    Float totals may differ from a serial run in the last few bits because
+    they are summed per chunk first.
+
+    Returns: tuple (SalesAggregate, filter_summary)
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = split_file_ranges(filepath, workers * CHUNKS_PER_WORKER)
+
+    aggregate = SalesAggregate()
+    summary = {}
+    if not ranges:
+        return aggregate, merge_filter_summaries(summary, {})
+
+    n = len(ranges)
+    encoding, errors = sniff_encoding(filepath)
+    # 0 keeps a partial exact, None would pick up the worker's own default
+    top_k_capacity = aggregate.customer_sketch.capacity if aggregate.approximate else 0
+    unique_precision = aggregate.unique_precision or 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(
+            aggregate_range,
+            [filepath] * n, [start for start, _ in ranges], [end for _, end in ranges],
+            [region] * n, [min_amount] * n, [max_amount] * n, [encoding] * n, [errors] * n,
+            [top_k_capacity] * n, [unique_precision] * n,
+        )
+        for partial, partial_summary in results:
+            aggregate.merge(partial)
+            merge_filter_summaries(summary, partial_summary)
+
+    return aggregate, summary
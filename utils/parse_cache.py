@@ -0,0 +1,292 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+from array import array
+
+from utils.transaction_table import (COLUMNS, NUMERIC_TYPECODES, CategoricalColumn, Dictionary,
+                                     TransactionTable)
+
+# Binary cache of parsed transactions, stored next to the source file in
+# CACHE_DIRNAME (or in a directory the caller passes as cache_dir). Layout of one cache file:
+#
+#   MAGIC | uint64 header length | JSON header | padding | column sections
+#
+# Numeric columns are raw int64/float64 arrays; string columns are a
+# newline-joined dictionary of distinct values plus a uint32 code per row,
+# i.e. the table's own dictionary encoding. Sections are 8-byte aligned so
+# numeric columns and codes can be memory-mapped and used in place.
+
+MAGIC = b"SALESTC1"
+CACHE_DIRNAME = ".parse_cache"
+CACHE_SUFFIX = ".tcache"
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+HASH_BLOCK = 1024 * 1024
+
+
+def cache_enabled():
+    """
+    The cache is on unless SALES_PARSE_CACHE is set to 0/false/off.
+    """
+    return os.environ.get("SALES_PARSE_CACHE", "1").lower() not in ("0", "false", "off")
+
+
+def max_cache_bytes():
+    """
+    Size limit for one cache directory (SALES_PARSE_CACHE_MAX_BYTES).
+    """
+    try:
+        return int(os.environ.get("SALES_PARSE_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+    except ValueError:
+        return DEFAULT_MAX_BYTES
+
+
+def cache_path_for(source, cache_dir=None):
+    """
+    Returns: path of the cache file for a source file, in cache_dir or by
+    default in CACHE_DIRNAME next to the source.
+    """
+    source = os.path.abspath(source)
+    name = hashlib.blake2b(source.encode("utf-8"), digest_size=16).hexdigest()
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(source), CACHE_DIRNAME)
+    return os.path.join(cache_dir, name + CACHE_SUFFIX)
+
+
+def new_digest():
+    """
+    Returns: an empty hash object of the kind content_hash uses.
+    """
+    return hashlib.blake2b(digest_size=16)
+
+
+def content_hash(source):
+    """
+    Returns: hex digest of the full contents of a file.
+    """
+    digest = new_digest()
+    with open(source, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_key(source):
+    """
+    Returns: dict identifying the current version of a source file.
+    """
+    st = os.stat(source)
+    return {"path": os.path.abspath(source), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _pad(n):
+    return (-n) % 8
+
+
+def write_cache(cache_file, key, table):
+    """
+    Writes a TransactionTable to cache_file in the binary columnar format.
+    The file is written to a temporary name and renamed into place.
+    """
+    sections = []
+    columns = {}
+    offset = 0
+    for name in COLUMNS:
+        column = table.column(name)
+        if name in NUMERIC_TYPECODES:
+            data = array(NUMERIC_TYPECODES[name], column).tobytes()
+            columns[name] = {"kind": "numeric", "offset": offset, "length": len(data)}
+        else:
+            if isinstance(column, CategoricalColumn):
+                lookup = column.dictionary.by_code
+                codes_bytes = column.codes.tobytes()
+            else:
+                lookup = {}
+                codes_bytes = array("I", (lookup.setdefault(v, len(lookup)) for v in column)).tobytes()
+            values = "\n".join(lookup).encode("utf-8")
+            data = values + b"\0" * _pad(len(values)) + codes_bytes
+            columns[name] = {
+                "kind": "dictionary", "offset": offset,
+                "values_length": len(values), "codes_offset": offset + len(values) + _pad(len(values)),
+                "count": len(lookup), "length": len(data),
+            }
+        sections.append(data + b"\0" * _pad(len(data)))
+        offset += len(data) + _pad(len(data))
+
+    header = json.dumps({"source": key, "rows": len(table), "columns": columns}).encode("utf-8")
+    prefix = MAGIC + struct.pack("<Q", len(header)) + header
+    prefix += b"\0" * _pad(len(prefix))
+
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    tmp_file = cache_file + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(prefix)
+        for data in sections:
+            f.write(data)
+    os.replace(tmp_file, cache_file)
+
+
+def read_header(cache_file):
+    """
+    Returns: (header dict, data start offset), or (None, 0) if the file is
+    missing or not a valid cache file.
+    """
+    try:
+        with open(cache_file, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None, 0
+            (length,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(length))
+    except (OSError, ValueError, struct.error):
+        return None, 0
+    start = len(MAGIC) + 8 + length
+    return header, start + _pad(start)
+
+
+def load_cache(cache_file):
+    """
+    Memory-maps a cache file and returns it as a TransactionTable. Numeric
+    columns and categorical codes are zero-copy views into the mapping;
+    only the dictionaries (one string per distinct value) are decoded.
+    """
+    header, start = read_header(cache_file)
+    if header is None:
+        return None
+
+    rows = header["rows"]
+    columns = {}
+    with open(cache_file, "rb") as f:
+        if rows == 0:
+            return TransactionTable()
+        buf = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    for name, meta in header["columns"].items():
+        base = start + meta["offset"]
+        if meta["kind"] == "numeric":
+            columns[name] = buf[base:base + meta["length"]].cast(NUMERIC_TYPECODES[name])
+        else:
+            raw = bytes(buf[base:base + meta["values_length"]]).decode("utf-8")
+            values = raw.split("\n") if meta["count"] else []
+            codes = buf[start + meta["codes_offset"]:start + meta["codes_offset"] + 4 * rows].cast("I")
+            if name == "TransactionID":
+                columns[name] = [values[c] for c in codes]
+            else:
+                columns[name] = CategoricalColumn(codes, Dictionary(values))
+
+    return TransactionTable(columns)
+
+
+def lookup(source, cache_dir=None):
+    """
+    Returns the cached TransactionTable for a source file, or None when
+    there is no valid entry.
+
+    An entry is valid when path, size and mtime match. If only the mtime
+    differs (e.g. the file was touched or copied), the stored content hash
+    decides.
+    """
+    cache_file = cache_path_for(source, cache_dir)
+    header, _ = read_header(cache_file)
+    if header is None:
+        return None
+
+    key = source_key(source)
+    cached = header["source"]
+    if cached["path"] != key["path"] or cached["size"] != key["size"]:
+        return None
+    if cached["mtime_ns"] != key["mtime_ns"] and cached.get("content_hash") != content_hash(source):
+        return None
+
+    # Mark as recently used for eviction
+    os.utime(cache_file)
+    return load_cache(cache_file)
+
+
+def store(source, table, key=None, cache_dir=None, digest=None):
+    """
+    Writes the cache entry for a source file, then evicts old entries.
+
+    `key` is the source_key of the file version `table` was parsed from
+    (default: the file as it is now) and `digest` its content_hash, when
+    the caller hashed the file while reading it (otherwise the file is
+    hashed here). Nothing is stored if the file no longer matches `key`,
+    so a table is never cached under a newer version.
+    Returns: True if the entry was written
+    """
+    if key is None:
+        key = source_key(source)
+    if digest is None:
+        digest = content_hash(source)
+    if source_key(source) != key:
+        return False
+    cache_file = cache_path_for(source, cache_dir)
+    write_cache(cache_file, dict(key, content_hash=digest), table)
+    evict(os.path.dirname(cache_file), max_cache_bytes(), keep=cache_file)
+    return True
+
+
+def evict(cache_dir, max_bytes, keep=None):
+    """
+    Deletes least recently used cache files until the directory fits in
+    max_bytes. `keep` is never deleted.
+    """
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(CACHE_SUFFIX):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if keep is not None and os.path.abspath(path) == os.path.abspath(keep):
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def invalidate(source, cache_dir=None):
+    """
+    Removes the cache entry for a source file, if any.
+    """
+    try:
+        os.remove(cache_path_for(source, cache_dir))
+    except FileNotFoundError:
+        pass
+
+
+def cached_parse(source, read_and_parse, cache_dir=None):
+    """
+    Returns the parsed TransactionTable for `source`, from the cache when
+    possible. The cache is checked by source_key before the file is read.
+
+    On a miss, read_and_parse(digest) must read and parse the file once,
+    feeding its raw bytes to `digest` (see new_digest); the table is then
+    stored under the source_key taken before reading, so a file changed
+    while being read is not cached. Cache I/O errors never fail the parse.
+    """
+    try:
+        table = lookup(source, cache_dir)
+    except OSError:
+        table = None
+    if table is not None:
+        return table
+
+    key = source_key(source)
+    digest = new_digest()
+    table = read_and_parse(digest)
+    try:
+        store(source, table, key, cache_dir, digest.hexdigest())
+    except OSError:
+        pass
+    return table
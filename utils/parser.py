@@ -1,4 +1,163 @@
-def parse_transactions(raw_lines):
+from utils import parse_cache
+from utils.file_handler import read_sales_data
+from utils.instrumentation import instrumented
+from utils.transaction_table import COLUMNS, TransactionTable
+
+
+def _parse_line(line):
+    """
+    Parses a single pipe-delimited line into a tuple of field values
+    (in COLUMNS order), or None if the row is malformed.
+    """
+    return _parse_parts(line.strip().split("|"))
+
+
+def _parse_parts(parts):
+    """
+    Converts the split fields of one line (see _parse_line).
+    """
+    # Skip malformed rows
+    if len(parts) < 8:
+        return None
+
+    # Clean product name (remove commas if present)
+    product_name = parts[3].replace(",", "")
+
+    # Convert numeric fields safely
+    try:
+        quantity = int(parts[4].replace(",", "")) if parts[4] else 0
+    except ValueError:
+        quantity = 0
+
+    try:
+        unit_price = float(parts[5].replace(",", "")) if parts[5] else 0.0
+    except ValueError:
+        unit_price = 0.0
+
+    return (parts[0], parts[1], parts[2], product_name,
+            quantity, unit_price, parts[6], parts[7])
+
+
+def _amount_outside(min_amount, max_amount):
+    """
+    Returns: predicate amount -> True when validate_and_filter's amount
+    filter would drop it, or None without amount bounds.
+    """
+    if min_amount is None and max_amount is None:
+        return None
+    if max_amount is None:
+        return lambda amount: amount < min_amount
+    if min_amount is None:
+        return lambda amount: amount > max_amount
+    return lambda amount: amount < min_amount or amount > max_amount
+
+
+def _make_line_parser(region=None, stats=None, min_amount=None, max_amount=None):
+    """
+    Returns a line parser with the validate_and_filter region and amount
+    filters pushed down into it.
+
+    Rows from other regions are rejected as early as possible: by a raw
+    substring test before the line is even split, then by an exact
+    comparison before any numeric conversion or row object is built.
+    Rows whose Quantity * UnitPrice is outside [min_amount, max_amount]
+    are rejected right after the numeric conversion, before the row dict
+    or table row is built.
+
+    validate_and_filter would have dropped every rejected row anyway (as
+    invalid or filtered), so the surviving rows are unchanged; the
+    rejected rows are never validated, though, so they are counted
+    separately (see add_pushdown_counts).
+
+    Rejections are counted in `stats` under "skipped_by_region" and
+    "skipped_by_amount".
+    """
+    outside = _amount_outside(min_amount, max_amount)
+    if not region and outside is None:
+        return _parse_line
+
+    if stats is None:
+        stats = {}
+    stats.setdefault("skipped_by_region", 0)
+    stats.setdefault("skipped_by_amount", 0)
+
+    def parse_line(line):
+        if region and region not in line:
+            # Only count lines that would have parsed as a row
+            if line.count("|") >= 7:
+                stats["skipped_by_region"] += 1
+            return None
+        parts = line.strip().split("|")
+        if len(parts) < 8:
+            return None
+        if region and parts[7] != region:
+            stats["skipped_by_region"] += 1
+            return None
+        fields = _parse_parts(parts)
+        if outside is not None and outside(fields[4] * fields[5]):
+            stats["skipped_by_amount"] += 1
+            return None
+        return fields
+
+    return parse_line
+
+
+def add_pushdown_counts(summary, stats):
+    """
+    Folds parser pushdown counters into a validate_and_filter summary, in
+    place, so total_input still counts every row of the input.
+
+    Rows skipped by the parser were never validated, so they go to their
+    own "skipped_by_region_pushdown" and "skipped_by_amount_pushdown"
+    counters. "invalid", "filtered_by_region", "filtered_by_amount", the
+    per-rule counts, "regions" and the amount range only describe the
+    rows that reached validation.
+    Returns: summary
+    """
+    region = stats.get("skipped_by_region", 0)
+    amount = stats.get("skipped_by_amount", 0)
+    summary["total_input"] = summary.get("total_input", 0) + region + amount
+    summary["skipped_by_region_pushdown"] = summary.get("skipped_by_region_pushdown", 0) + region
+    summary["skipped_by_amount_pushdown"] = summary.get("skipped_by_amount_pushdown", 0) + amount
+    return summary
+
+
+def _filter_table(table, region=None, stats=None, min_amount=None, max_amount=None):
+    """
+    Applies the pushed-down region and amount filters to an already
+    parsed (e.g. cached) table, counting like _make_line_parser.
+    """
+    outside = _amount_outside(min_amount, max_amount)
+    if not region and outside is None:
+        return table
+    keep = range(len(table))
+    if region:
+        code = table.dictionary("Region").get(region)
+        keep = [i for i, row_code in enumerate(table.codes("Region")) if row_code == code]
+        stats["skipped_by_region"] = stats.get("skipped_by_region", 0) + len(table) - len(keep)
+    if outside is not None:
+        quantity, unit_price = table.quantity, table.unit_price
+        inside = [i for i in keep if not outside(quantity[i] * unit_price[i])]
+        stats["skipped_by_amount"] = stats.get("skipped_by_amount", 0) + len(keep) - len(inside)
+        keep = inside
+    return table.take(keep)
+
+
+def _parse_table(raw_lines, parse_line=_parse_line):
+    """
+    Parses raw lines straight into a TransactionTable.
+    """
+    table = TransactionTable()
+    for line in raw_lines:
+        fields = parse_line(line)
+        if fields is not None:
+            table.append(*fields)
+    return table
+
+
+@instrumented("parse_transactions")
+def parse_transactions(raw_lines, columnar=False, region=None, min_amount=None, max_amount=None,
+                       stats=None):
     """
     Parses raw sales data lines into a list of transaction dictionaries.
 
@@ -8,42 +167,74 @@ def parse_transactions(raw_lines):
     Returns: list of dictionaries with keys:
     ['TransactionID', 'Date', 'ProductID', 'ProductName',
      'Quantity', 'UnitPrice', 'CustomerID', 'Region']
+
+    With columnar=True a TransactionTable is returned instead, which stores
+    the same data column-wise and yields dict-like rows when iterated.
+
+    region, min_amount and max_amount are validate_and_filter's filters:
+    rows they exclude are skipped while parsing (see _make_line_parser)
+    and counted in the `stats` dict. Fold the counts into the later
+    validate_and_filter summary with add_pushdown_counts.
+
+    To parse a whole file through the parse cache, use parse_sales_file.
     """
 
+    if stats is None:
+        stats = {}
+    parse_line = _make_line_parser(region, stats, min_amount, max_amount)
+
+    if columnar:
+        return _parse_table(raw_lines, parse_line)
+
     transactions = []
 
     for line in raw_lines:
-        parts = line.strip().split("|")
+        fields = parse_line(line)
+        if fields is not None:
+            transactions.append(dict(zip(COLUMNS, fields)))
 
-        # Skip malformed rows
-        if len(parts) < 8:
-            continue
-
-        # Clean product name (remove commas if present)
-        product_name = parts[3].replace(",", "")
-
-        # Convert numeric fields safely
-        try:
-            quantity = int(parts[4].replace(",", "")) if parts[4] else 0
-        except ValueError:
-            quantity = 0
-
-        try:
-            unit_price = float(parts[5].replace(",", "")) if parts[5] else 0.0
-        except ValueError:
-            unit_price = 0.0
-
-        transaction = {
-            "TransactionID": parts[0],
-            "Date": parts[1],
-            "ProductID": parts[2],
-            "ProductName": product_name,
-            "Quantity": quantity,
-            "UnitPrice": unit_price,
-            "CustomerID": parts[6],
-            "Region": parts[7]
-        }
-
-        transactions.append(transaction)
-
-    return transactions   # <-- CRUCIAL
\ No newline at end of file
+    return transactions   # <-- CRUCIAL
+
+
+@instrumented("parse_sales_file", count_input=False)
+def parse_sales_file(filepath, columnar=False, region=None, min_amount=None, max_amount=None,
+                     stats=None, cache=True, cache_dir=None):
+    """
+    read_sales_data + parse_transactions for a whole file, through the
+    on-disk parse cache (see utils/parse_cache.py).
+
+    The cache is checked by the file's path, size and mtime before it is
+    read, so a hit costs no reading or decoding at all. On a miss the
+    file is read, hashed and parsed in one pass and the full table is
+    cached. The filters are applied to the table afterwards, with the same
+    stats as parse_transactions.
+
+    cache_dir puts the cache files in that directory instead of next to
+    the file; cache=False (or SALES_PARSE_CACHE=0) disables the cache.
+    Returns: list of transaction dicts, or a TransactionTable with columnar=True
+    """
+    if not (cache and parse_cache.cache_enabled()):
+        return parse_transactions(read_sales_data(filepath), columnar, region, min_amount,
+                                  max_amount, stats)
+
+    if stats is None:
+        stats = {}
+    table = parse_cache.cached_parse(
+        filepath, lambda digest: _parse_table(read_sales_data(filepath, digest=digest)), cache_dir
+    )
+    table = _filter_table(table, region, stats, min_amount, max_amount)
+    return table if columnar else table.to_dicts()
+
+
+def iter_transactions(raw_lines, region=None, min_amount=None, max_amount=None, stats=None):
+    """
+    Lazily parses raw sales data lines, yielding one transaction
+    dictionary at a time (same format as parse_transactions).
+    Malformed rows are skipped; optional region/amount filters are pushed
+    down exactly as in parse_transactions.
+    """
+    parse_line = _make_line_parser(region, stats, min_amount, max_amount)
+    for line in raw_lines:
+        fields = parse_line(line)
+        if fields is not None:
+            yield dict(zip(COLUMNS, fields))
@@ -0,0 +1,230 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.aggregator import SalesAggregate, aggregate_transactions
+from utils.file_handler import iter_sales_data
+from utils.instrumentation import instrumented
+from utils.parser import add_pushdown_counts, parse_sales_file
+from utils.validator import merge_filter_summaries, validate_and_filter
+
+# Partition directories are Hive-style key=value segments, e.g.
+#   root/date=2024-12-01/region=South/part-0.txt
+# Keys are matched case-insensitively; files outside any partition
+# directory are always read.
+DATE_KEY = "date"
+REGION_KEY = "region"
+PARTITION_SUFFIXES = (".txt",)
+# Lines buffered by partition_sales_file before writing them out
+FLUSH_LINES = 100000
+
+# Partition values must be safe as a single path segment
+_SAFE_VALUE = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+class Partition:
+    """
+    One data file of a PartitionedDataset and the partition values parsed
+    from its directory names ({"date": ..., "region": ...}).
+    """
+
+    __slots__ = ("path", "values")
+
+    def __init__(self, path, values):
+        self.path = path
+        self.values = values
+
+    def matches(self, date_from=None, date_to=None, region=None):
+        """
+        Returns: False if the partition values rule out every row for the
+        given filters (unknown values never rule a file out).
+        """
+        date = self.values.get(DATE_KEY)
+        if date is not None:
+            if date_from is not None and date < date_from:
+                return False
+            if date_to is not None and date > date_to:
+                return False
+        value = self.values.get(REGION_KEY)
+        if region and value is not None and value != region:
+            return False
+        return True
+
+    def __repr__(self):
+        return f"Partition({self.path!r}, {self.values})"
+
+
+def partition_values(relpath):
+    """
+    Returns: dict of the key=value directory segments of a path relative
+    to the dataset root, keys lowercased.
+    """
+    values = {}
+    for segment in os.path.dirname(relpath).split(os.sep):
+        key, sep, value = segment.partition("=")
+        if sep:
+            values[key.lower()] = value
+    return values
+
+
+def _filter_dates(table, date_from, date_to):
+    """
+    Keeps the rows of a parsed table whose Date is in [date_from, date_to],
+    testing each distinct date once.
+    """
+    in_range = {code for code, date in enumerate(table.dictionary("Date").by_code)
+                if (date_from is None or date >= date_from) and (date_to is None or date <= date_to)}
+    return table.take([i for i, code in enumerate(table.codes("Date")) if code in in_range])
+
+
+def aggregate_partition(path, values, region=None, min_amount=None, max_amount=None,
+                        date_from=None, date_to=None, cache_dir=None):
+    """
+    Parses, validates and aggregates one partition file. Runs inside a
+    worker process when the dataset is read in parallel.
+
+    The parse cache is only used when a cache_dir is given (then unchanged
+    partitions are not parsed again): by default it would write a
+    .parse_cache directory into every partition directory.
+
+    Rows are only checked against the date range when the file is not
+    already in a date partition; rows outside it are dropped before
+    validation and, like skipped files, not counted in the summary.
+
+    Returns: tuple (SalesAggregate, filter_summary) for the file
+    """
+    pushdown = {}
+    table = parse_sales_file(path, columnar=True, region=region, min_amount=min_amount,
+                             max_amount=max_amount, stats=pushdown,
+                             cache=cache_dir is not None, cache_dir=cache_dir)
+    if DATE_KEY not in values and (date_from is not None or date_to is not None):
+        table = _filter_dates(table, date_from, date_to)
+    valid, _, summary = validate_and_filter(table, region=region, min_amount=min_amount,
+                                            max_amount=max_amount, log=lambda message: None)
+    add_pushdown_counts(summary, pushdown)
+    return aggregate_transactions(valid), summary
+
+
+class PartitionedDataset:
+    """
+    Sales data stored as one file per partition under a root directory,
+    e.g. one file per day per region:
+
+        root/date=2024-12-01/region=South/sales.txt
+
+    Queries name a date range and/or region; files whose partition values
+    exclude them are skipped without being opened, so a one-week report
+    over a year of history only reads that week's files. The remaining
+    files go through the usual parser, validator and SalesAggregate, one
+    file per task, in parallel when workers > 1.
+
+    Parsed partitions are cached in cache_dir when one is given (one
+    directory for the whole dataset); without it they are parsed on every
+    query and nothing is written under root.
+    """
+
+    def __init__(self, root, suffixes=PARTITION_SUFFIXES, cache_dir=None):
+        if not os.path.isdir(root):
+            raise FileNotFoundError(f"{root} is not a directory.")
+        self.root = root
+        self.cache_dir = cache_dir
+        self.partitions = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            # Hidden directories hold caches (e.g. a parse cache kept in root)
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+            for name in sorted(filenames):
+                if name.endswith(suffixes):
+                    path = os.path.join(dirpath, name)
+                    values = partition_values(os.path.relpath(path, root))
+                    self.partitions.append(Partition(path, values))
+
+    def __len__(self):
+        return len(self.partitions)
+
+    def __repr__(self):
+        return f"PartitionedDataset({self.root!r}, {len(self)} files)"
+
+    def select(self, date_from=None, date_to=None, region=None):
+        """
+        Returns: the partitions that may hold rows for the filters, in path order.
+        """
+        return [p for p in self.partitions if p.matches(date_from, date_to, region)]
+
+    def iter_lines(self, date_from=None, date_to=None, region=None):
+        """
+        Lazily yields the raw lines of the selected partitions, for the
+        streaming parser (iter_transactions). Rows are not filtered by date.
+        """
+        for partition in self.select(date_from, date_to, region):
+            yield from iter_sales_data(partition.path)
+
+    @instrumented("partitioned_sales_aggregate", count_input=False)
+    def aggregate(self, region=None, min_amount=None, max_amount=None,
+                  date_from=None, date_to=None, workers=1):
+        """
+        Aggregates the rows matching the filters (same filters as
+        validate_and_filter, plus an inclusive ISO date range).
+
+        Partial results are merged in path order, so the dictionary order
+        of the aggregate does not depend on which worker finished first.
+        Rows of skipped files are not counted in the filter summary.
+
+        Returns: tuple (SalesAggregate, filter_summary, info) where info
+        holds the number of partition files "read" and "skipped".
+        """
+        selected = self.select(date_from, date_to, region)
+        info = {"read": len(selected), "skipped": len(self.partitions) - len(selected)}
+        args = [(p.path, p.values, region, min_amount, max_amount, date_from, date_to,
+                 self.cache_dir) for p in selected]
+
+        aggregate = SalesAggregate()
+        summary = {}
+        if workers > 1 and len(args) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(aggregate_partition, *zip(*args)))
+        else:
+            results = (aggregate_partition(*a) for a in args)
+        for partial, partial_summary in results:
+            aggregate.merge(partial)
+            merge_filter_summaries(summary, partial_summary)
+        return aggregate, merge_filter_summaries(summary, {}), info
+
+
+def partition_sales_file(filepath, root):
+    """
+    Splits a single sales file into root/date=.../region=.../<name> files.
+    Lines without a usable date/region (header, malformed rows) go to
+    root/<name>, which every query reads.
+    Returns: number of partition files written
+    """
+    name = os.path.basename(filepath)
+    buffers = {}
+    created = set()
+    pending = 0
+
+    def flush():
+        for key, lines in buffers.items():
+            directory = root if key is None else os.path.join(
+                root, f"{DATE_KEY}={key[0]}", f"{REGION_KEY}={key[1]}")
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, name), "a" if key in created else "w",
+                      encoding="utf-8") as f:
+                f.writelines(lines)
+            created.add(key)
+        buffers.clear()
+
+    for i, line in enumerate(iter_sales_data(filepath)):
+        parts = line.strip().split("|")
+        if i == 0 and "TransactionID" in line:
+            key = None
+        elif len(parts) >= 8 and _SAFE_VALUE.match(parts[1]) and _SAFE_VALUE.match(parts[7]):
+            key = (parts[1], parts[7])
+        else:
+            key = None
+        buffers.setdefault(key, []).append(line if line.endswith("\n") else line + "\n")
+        pending += 1
+        if pending >= FLUSH_LINES:
+            flush()
+            pending = 0
+    flush()
+    return sum(1 for key in created if key is not None)
@@ -0,0 +1,29 @@
+from utils.aggregator import SalesAggregate
+from utils.file_handler import iter_sales_data
+from utils.instrumentation import instrumented
+from utils.parser import add_pushdown_counts, iter_transactions
+from utils.validator import iter_valid_transactions
+
+
+@instrumented("stream_sales_aggregate", count_input=False)
+def stream_sales_aggregate(filepath, region=None, min_amount=None, max_amount=None):
+    """
+    Runs the whole pipeline as chained generators:
+
+        iter_sales_data -> iter_transactions -> iter_valid_transactions -> SalesAggregate
+
+    No stage builds a list, so memory depends only on the number of distinct
+    regions/products/customers/dates, not on the size of the input file.
+    The region and amount filters are also pushed down into the parser,
+    so rows they exclude are dropped before a row dict is built.
+
+    Returns: tuple (SalesAggregate, filter_summary)
+    """
+    summary = {}
+    pushdown = {}
+    filters = {"region": region, "min_amount": min_amount, "max_amount": max_amount}
+    lines = iter_sales_data(filepath)
+    transactions = iter_transactions(lines, stats=pushdown, **filters)
+    valid = iter_valid_transactions(transactions, summary=summary, **filters)
+    aggregate = SalesAggregate().update(valid)
+    return aggregate, add_pushdown_counts(summary, pushdown)
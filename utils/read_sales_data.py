@@ -1,3 +1,6 @@
+from utils.file_handler import read_sales_data_with_fallback
+
+
 def read_sales_data(filename):
     """
     Reads sales data from file handling encoding issues.
@@ -13,34 +16,7 @@ def read_sales_data(filename):
     - Handle FileNotFoundError with appropriate error message
     - Skip the header row
     - Remove empty lines
-    """
-
-    encodings_to_try = ["utf-8", "latin-1", "cp1252"]
 
-    for enc in encodings_to_try:
-        try:
-            with open(filename, "r", encoding=enc) as f:
-                lines = f.readlines()
-                break  # stop once file is successfully read
-        except UnicodeDecodeError:
-            continue
-        except FileNotFoundError:
-            print(f"Error: File '{filename}' not found.")
-            return []
-
-    else:
-        # If all encodings failed
-        print(f"Error: Could not decode file '{filename}' with supported encodings.")
-        return []
-
-    # Clean lines: strip whitespace, skip empty, skip header
-    cleaned_lines = []
-    for i, line in enumerate(lines):
-        line = line.strip()
-        if not line:  # skip empty lines
-            continue
-        if i == 0 and "TransactionID" in line:  # skip header row
-            continue
-        cleaned_lines.append(line)
-
-    return cleaned_lines
\ No newline at end of file
+    Same as utils.file_handler.read_sales_data_with_fallback.
+    """
+    return read_sales_data_with_fallback(filename)
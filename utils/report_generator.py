@@ -1,132 +1,355 @@
+import csv
+import json
 import os
 from datetime import datetime
-from collections import defaultdict
+from utils.aggregator import SalesAggregate, aggregate_transactions
+from utils.enrichment import EnrichmentResult
+from utils.instrumentation import instrumented
 
-def generate_sales_report(transactions, enriched_transactions, output_file='output/sales_report.txt'):
+REPORT_FORMATS = ("txt", "json", "csv")
+
+# Output files are opened with a large buffer and each writer hands them
+# a joined chunk per section (or per FLUSH_ROWS rows of a long section),
+# so the report costs a handful of write calls instead of one per line.
+WRITE_BUFFER = 1 << 20
+FLUSH_ROWS = 10000
+
+RULE = "--------------------------------------------\n"
+
+
+def report_sections(agg, enriched_transactions, total_records=None, include_customers=False):
+    """
+    Describes the report as a sequence of (name, info, rows) sections:
+    `info` is a dict of scalar values and `rows` an iterable of dicts.
+
+    Everything is read from the SalesAggregate. Row iterables are lazy, so
+    long sections (e.g. the per-customer table enabled by
+    include_customers) are streamed to the writers rather than built in
+    memory.
+    """
+    if total_records is None:
+        total_records = agg.transaction_count
+
+    yield "header", {
+        "generated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "records_processed": total_records,
+    }, ()
+
+    total_revenue = agg.total_revenue
+    total_transactions = agg.transaction_count
+    dates = sorted(agg.daily_stats)
+    yield "overall_summary", {
+        "total_revenue": total_revenue,
+        "total_transactions": total_transactions,
+        "average_order_value": total_revenue / total_transactions if total_transactions else 0,
+        "date_range": f"{dates[0]} to {dates[-1]}" if dates else "N/A",
+    }, ()
+
+    total_sales = sum(sales for sales, _ in agg.region_stats.values())
+    regions = sorted(agg.region_stats.items(), key=lambda x: x[1][0], reverse=True)
+    yield "region_performance", {"total_sales": total_sales}, (
+        {"region": region, "sales": sales, "transactions": n,
+         "percent_of_total": (sales / total_sales) * 100 if total_sales else 0}
+        for region, (sales, n) in regions
+    )
+
+    yield "top_products", {"n": 5}, (
+        {"rank": i, "product": product, "quantity": qty, "revenue": revenue}
+        for i, (product, qty, revenue) in enumerate(agg.top_products(5), 1)
+    )
+
+    yield "top_customers", {
+        "n": 5, "approximate": agg.approximate, "error_bound": agg.top_customers_error_bound(),
+    }, (
+        {"rank": i, "customer_id": cust, "total_spent": spent, "orders": orders}
+        for i, (cust, spent, orders) in enumerate(agg.top_customers(5), 1)
+    )
+
+    yield "daily_trend", {}, (
+        {"date": date, "revenue": revenue, "transactions": n, "unique_customers": len(customers)}
+        for date, (revenue, n, customers) in ((d, agg.daily_stats[d]) for d in dates)
+    )
+
+    best_day = max(dates, key=lambda d: agg.daily_stats[d][0]) if dates else "N/A"
+    yield "product_performance", {"best_selling_day": best_day}, ()
+    yield "low_products", {"threshold": 10}, (
+        {"product": p, "quantity": qty, "revenue": revenue}
+        for p, (qty, revenue) in agg.product_stats.items() if qty < 10
+    )
+    yield "region_averages", {}, (
+        {"region": region, "average_transaction_value": sales / n if n else 0}
+        for region, (sales, n) in agg.region_stats.items()
+    )
+
+    if isinstance(enriched_transactions, EnrichmentResult):
+        enriched_names = enriched_transactions.matched
+    else:
+        enriched_names = set(enriched_transactions)
+    enriched_count = len(enriched_transactions)
+    product_count = len(agg.product_stats)
+    yield "api_enrichment", {
+        "products_enriched": enriched_count,
+        "success_rate": (enriched_count / product_count) * 100 if product_count else 0,
+    }, (
+        {"product": p} for p in agg.product_stats if p not in enriched_names
+    )
+
+    if include_customers and agg.approximate:
+        yield "customers", {"count": len(agg.customer_sketch), "approximate": True}, (
+            {"customer_id": cust, "total_spent": spent, "orders": hits, "products": None}
+            for cust, spent, _, hits in agg.customer_sketch.top(len(agg.customer_sketch))
+        )
+    elif include_customers:
+        yield "customers", {"count": len(agg.customer_stats), "approximate": False}, (
+            {"customer_id": cust, "total_spent": spent, "orders": orders,
+             "products": len(products)}
+            for cust, (spent, orders, products) in agg.customer_stats.items()
+        )
+
+
+class _ChunkedWriter:
+    """
+    Collects output strings and writes them to the file in chunks.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.parts = []
+
+    def flush(self):
+        if self.parts:
+            self.f.write("".join(self.parts))
+            self.parts = []
+
+
+class TextReportWriter(_ChunkedWriter):
+    """
+    Renders report sections in the fixed-width text layout.
+    """
+
+    TITLES = {
+        "overall_summary": "OVERALL SUMMARY",
+        "region_performance": "REGION-WISE PERFORMANCE",
+        "top_products": "TOP 5 PRODUCTS",
+        "top_customers": "TOP 5 CUSTOMERS",
+        "daily_trend": "DAILY SALES TREND",
+        "product_performance": "PRODUCT PERFORMANCE ANALYSIS",
+        "api_enrichment": "API ENRICHMENT SUMMARY",
+        "customers": "ALL CUSTOMERS",
+    }
+    COLUMNS = {
+        "region_performance": "Region    Sales         % of Total  Transactions\n",
+        "top_products": "Rank  Product Name        Quantity  Revenue\n",
+        "top_customers": "Rank  Customer ID   Total Spent   Orders\n",
+        "daily_trend": "Date        Revenue       Transactions   Unique Customers\n",
+        "customers": "Customer ID   Total Spent   Orders   Products\n",
+    }
+
+    def start(self, name, info):
+        out = self.parts.append
+        self.rows = 0
+        if name == "header":
+            out("============================================\n")
+            out("           SALES ANALYTICS REPORT\n")
+            out(f"         Generated: {info['generated']}\n")
+            out(f"         Records Processed: {info['records_processed']}\n")
+            out("============================================\n\n")
+            return
+        if name == "customers":
+            out("\n")
+        if name in self.TITLES:
+            out(self.TITLES[name] + "\n")
+            out(RULE)
+        if name in self.COLUMNS:
+            out(self.COLUMNS[name])
+        if name == "overall_summary":
+            out(f"Total Revenue:        ₹{info['total_revenue']:,.2f}\n")
+            out(f"Total Transactions:   {info['total_transactions']}\n")
+            out(f"Average Order Value:  ₹{info['average_order_value']:,.2f}\n")
+            out(f"Date Range:           {info['date_range']}\n\n")
+        elif name == "product_performance":
+            out(f"Best Selling Day: {info['best_selling_day']}\n")
+        elif name == "region_averages":
+            out("Average Transaction Value per Region:\n")
+        elif name == "api_enrichment":
+            out(f"Total Products Enriched: {info['products_enriched']}\n")
+            out(f"Success Rate: {info['success_rate']:.2f}%\n")
+
+    def row(self, name, row):
+        out = self.parts.append
+        self.rows += 1
+        if name == "region_performance":
+            out(f"{row['region']:<8} ₹{row['sales']:,.0f}   {row['percent_of_total']:5.2f}%      "
+                f"{row['transactions']}\n")
+        elif name == "top_products":
+            out(f"{row['rank']:<5} {row['product']:<18} {row['quantity']:<8} ₹{row['revenue']:,.0f}\n")
+        elif name == "top_customers":
+            out(f"{row['rank']:<5} {row['customer_id']:<12} ₹{row['total_spent']:,.0f}   {row['orders']}\n")
+        elif name == "daily_trend":
+            out(f"{row['date']:<10} ₹{row['revenue']:,.0f}   {row['transactions']:<12} "
+                f"{row['unique_customers']}\n")
+        elif name == "low_products":
+            if self.rows == 1:
+                out("Low Performing Products:\n")
+            out(f"  {row['product']}: Quantity={row['quantity']}, Revenue=₹{row['revenue']:,.0f}\n")
+        elif name == "region_averages":
+            out(f"  {row['region']}: ₹{row['average_transaction_value']:,.2f}\n")
+        elif name == "api_enrichment":
+            if self.rows == 1:
+                out("Products not enriched:\n")
+            out(f"  {row['product']}\n")
+        elif name == "customers":
+            out(f"{row['customer_id']:<13} ₹{row['total_spent']:,.0f}   {row['orders']:<8} "
+                f"{'-' if row['products'] is None else row['products']}\n")
+        if self.rows % FLUSH_ROWS == 0:
+            self.flush()
+
+    def end(self, name, info):
+        out = self.parts.append
+        if name == "top_customers" and info["approximate"]:
+            out(f"(approximate: spend overstated by at most ₹{info['error_bound']:,.0f})\n")
+        if name in ("region_performance", "top_products", "top_customers", "daily_trend",
+                    "region_averages"):
+            out("\n")
+        elif name == "low_products" and not self.rows:
+            out("No low performing products.\n")
+        elif name == "api_enrichment" and not self.rows:
+            out("All products enriched successfully.\n")
+        self.flush()
+
+    def close(self):
+        self.flush()
+
+
+class JsonReportWriter(_ChunkedWriter):
+    """
+    Renders the report as one JSON object: {section: {info..., "rows": [...]}}.
+    Rows are serialized one at a time, so long sections are never held
+    in memory as a whole.
+    """
+
+    def __init__(self, f):
+        super().__init__(f)
+        self.sections = 0
+        self.parts.append("{")
+
+    def start(self, name, info):
+        self.rows = 0
+        body = json.dumps(info)[1:-1]
+        sep = ",\n" if self.sections else "\n"
+        self.parts.append(f'{sep}  {json.dumps(name)}: {{{body}{", " if body else ""}"rows": [')
+        self.sections += 1
+
+    def row(self, name, row):
+        self.parts.append((",\n    " if self.rows else "\n    ") + json.dumps(row))
+        self.rows += 1
+        if self.rows % FLUSH_ROWS == 0:
+            self.flush()
+
+    def end(self, name, info):
+        self.parts.append("\n  ]}" if self.rows else "]}")
+        self.flush()
+
+    def close(self):
+        self.parts.append("\n}\n")
+        self.flush()
+
+
+class CsvReportWriter:
+    """
+    Renders the report in long format with columns section, row, field,
+    value. Section info values have an empty row number; table rows are
+    numbered from 1.
+    """
+
+    def __init__(self, f):
+        self.csv = csv.writer(f, lineterminator="\n")
+        self.csv.writerow(["section", "row", "field", "value"])
+
+    def start(self, name, info):
+        self.rows = 0
+        self.csv.writerows([name, "", field, value] for field, value in info.items())
+
+    def row(self, name, row):
+        self.rows += 1
+        self.csv.writerows([name, self.rows, field, value] for field, value in row.items())
+
+    def end(self, name, info):
+        pass
+
+    def close(self):
+        pass
+
+
+WRITERS = {"txt": TextReportWriter, "json": JsonReportWriter, "csv": CsvReportWriter}
+
+
+def report_paths(output_file, formats):
+    """
+    Returns: {format: path}; every format shares output_file's name with
+    its own extension (output/sales_report.txt -> output/sales_report.json).
+    """
+    stem, ext = os.path.splitext(output_file)
+    paths = {}
+    for fmt in formats:
+        if fmt not in WRITERS:
+            raise ValueError(f"Unknown report format '{fmt}' (expected one of {REPORT_FORMATS})")
+        paths[fmt] = output_file if ext == f".{fmt}" else f"{stem}.{fmt}"
+    return paths
+
+
+@instrumented("generate_sales_report")
+def generate_sales_report(transactions, enriched_transactions, output_file='output/sales_report.txt',
+                          formats=("txt",), include_customers=False):
     """
     Generates a comprehensive formatted text report.
+
+    `transactions` may be a list of transactions, a TransactionTable or an
+    already computed SalesAggregate (preferred: nothing is recomputed).
+    `enriched_transactions` is either an EnrichmentResult or a list of
+    enriched product titles.
+
+    `formats` selects any of "txt", "json" and "csv"; all of them are
+    rendered together in one pass over the report sections (see
+    report_sections). include_customers adds a streamed per-customer table.
+
+    Returns: {format: path written}
     """
 
     # Ensure output directory exists
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-
-    # HEADER
-    generation_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    total_records = len(transactions)
-
-    # OVERALL SUMMARY
-    total_revenue = sum(t['Quantity'] * t['UnitPrice'] for t in transactions)
-    total_transactions = len(transactions)
-    avg_order_value = total_revenue / total_transactions if total_transactions else 0
-    dates = sorted(set(t['Date'] for t in transactions))
-    date_range = f"{dates[0]} to {dates[-1]}" if dates else "N/A"
-
-    # REGION-WISE PERFORMANCE
-    region_stats = defaultdict(lambda: {"sales": 0, "count": 0})
-    for t in transactions:
-        region_stats[t['Region']]["sales"] += t['Quantity'] * t['UnitPrice']
-        region_stats[t['Region']]["count"] += 1
-    total_sales = sum(r["sales"] for r in region_stats.values())
-    region_summary = sorted(region_stats.items(), key=lambda x: x[1]["sales"], reverse=True)
-
-    # TOP 5 PRODUCTS
-    product_stats = defaultdict(lambda: {"qty": 0, "revenue": 0})
-    for t in transactions:
-        product_stats[t['ProductName']]["qty"] += t['Quantity']
-        product_stats[t['ProductName']]["revenue"] += t['Quantity'] * t['UnitPrice']
-    top_products = sorted(product_stats.items(), key=lambda x: x[1]["qty"], reverse=True)[:5]
-
-    # TOP 5 CUSTOMERS
-    customer_stats = defaultdict(lambda: {"spent": 0, "orders": 0})
-    for t in transactions:
-        customer_stats[t['CustomerID']]["spent"] += t['Quantity'] * t['UnitPrice']
-        customer_stats[t['CustomerID']]["orders"] += 1
-    top_customers = sorted(customer_stats.items(), key=lambda x: x[1]["spent"], reverse=True)[:5]
-
-    # DAILY SALES TREND
-    daily_stats = defaultdict(lambda: {"revenue": 0, "transactions": 0, "customers": set()})
-    for t in transactions:
-        daily_stats[t['Date']]["revenue"] += t['Quantity'] * t['UnitPrice']
-        daily_stats[t['Date']]["transactions"] += 1
-        daily_stats[t['Date']]["customers"].add(t['CustomerID'])
-    daily_summary = sorted(daily_stats.items())
-
-    # PRODUCT PERFORMANCE ANALYSIS
-    best_day = max(daily_summary, key=lambda x: x[1]["revenue"])[0] if daily_summary else "N/A"
-    low_products = [(p, stats["qty"], stats["revenue"]) for p, stats in product_stats.items() if stats["qty"] < 10]
-    avg_txn_per_region = {region: stats["sales"]/stats["count"] if stats["count"] else 0 for region, stats in region_stats.items()}
-
-    # API ENRICHMENT SUMMARY
-    enriched_count = len(enriched_transactions)
-    success_rate = (enriched_count / len(product_stats)) * 100 if product_stats else 0
-    failed_products = [p for p in product_stats.keys() if p not in enriched_transactions]
-
-    # WRITE REPORT
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write("============================================\n")
-        f.write("           SALES ANALYTICS REPORT\n")
-        f.write(f"         Generated: {generation_time}\n")
-        f.write(f"         Records Processed: {total_records}\n")
-        f.write("============================================\n\n")
-
-        f.write("OVERALL SUMMARY\n")
-        f.write("--------------------------------------------\n")
-        f.write(f"Total Revenue:        ₹{total_revenue:,.2f}\n")
-        f.write(f"Total Transactions:   {total_transactions}\n")
-        f.write(f"Average Order Value:  ₹{avg_order_value:,.2f}\n")
-        f.write(f"Date Range:           {date_range}\n\n")
-
-        f.write("REGION-WISE PERFORMANCE\n")
-        f.write("--------------------------------------------\n")
-        f.write("Region    Sales         % of Total  Transactions\n")
-        for region, stats in region_summary:
-            pct = (stats["sales"]/total_sales)*100 if total_sales else 0
-            f.write(f"{region:<8} ₹{stats['sales']:,.0f}   {pct:5.2f}%      {stats['count']}\n")
-        f.write("\n")
-
-        f.write("TOP 5 PRODUCTS\n")
-        f.write("--------------------------------------------\n")
-        f.write("Rank  Product Name        Quantity  Revenue\n")
-        for i, (product, stats) in enumerate(top_products, 1):
-            f.write(f"{i:<5} {product:<18} {stats['qty']:<8} ₹{stats['revenue']:,.0f}\n")
-        f.write("\n")
-
-        f.write("TOP 5 CUSTOMERS\n")
-        f.write("--------------------------------------------\n")
-        f.write("Rank  Customer ID   Total Spent   Orders\n")
-        for i, (cust, stats) in enumerate(top_customers, 1):
-            f.write(f"{i:<5} {cust:<12} ₹{stats['spent']:,.0f}   {stats['orders']}\n")
-        f.write("\n")
-
-        f.write("DAILY SALES TREND\n")
-        f.write("--------------------------------------------\n")
-        f.write("Date        Revenue       Transactions   Unique Customers\n")
-        for date, stats in daily_summary:
-            f.write(f"{date:<10} ₹{stats['revenue']:,.0f}   {stats['transactions']:<12} {len(stats['customers'])}\n")
-        f.write("\n")
-
-        f.write("PRODUCT PERFORMANCE ANALYSIS\n")
-        f.write("--------------------------------------------\n")
-        f.write(f"Best Selling Day: {best_day}\n")
-        if low_products:
-            f.write("Low Performing Products:\n")
-            for p, qty, rev in low_products:
-                f.write(f"  {p}: Quantity={qty}, Revenue=₹{rev:,.0f}\n")
-        else:
-            f.write("No low performing products.\n")
-        f.write("Average Transaction Value per Region:\n")
-        for region, avg in avg_txn_per_region.items():
-            f.write(f"  {region}: ₹{avg:,.2f}\n")
-        f.write("\n")
-
-        f.write("API ENRICHMENT SUMMARY\n")
-        f.write("--------------------------------------------\n")
-        f.write(f"Total Products Enriched: {enriched_count}\n")
-        f.write(f"Success Rate: {success_rate:.2f}%\n")
-        if failed_products:
-            f.write("Products not enriched:\n")
-            for p in failed_products:
-                f.write(f"  {p}\n")
-        else:
-            f.write("All products enriched successfully.\n")
-            
\ No newline at end of file
+    directory = os.path.dirname(output_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # Build every statistic in a single pass over the transactions
+    agg = aggregate_transactions(transactions)
+    if isinstance(transactions, SalesAggregate):
+        total_records = agg.transaction_count
+    else:
+        total_records = len(transactions)
+
+    paths = report_paths(output_file, formats)
+    files = []
+    try:
+        writers = []
+        for fmt, path in paths.items():
+            f = open(path, "w", encoding="utf-8", newline="" if fmt == "csv" else None,
+                     buffering=WRITE_BUFFER)
+            files.append(f)
+            writers.append(WRITERS[fmt](f))
+
+        for name, info, rows in report_sections(agg, enriched_transactions, total_records,
+                                                include_customers):
+            for writer in writers:
+                writer.start(name, info)
+            for row in rows:
+                for writer in writers:
+                    writer.row(name, row)
+            for writer in writers:
+                writer.end(name, info)
+        for writer in writers:
+            writer.close()
+    finally:
+        for f in files:
+            f.close()
+    return paths
@@ -0,0 +1,287 @@
+import json
+
+from utils.aggregator import SalesAggregate, get_unique_precision
+from utils.file_handler import iter_sales_data
+from utils.hyperloglog import HyperLogLog
+from utils.incremental import save_state
+from utils.parser import add_pushdown_counts, iter_transactions
+from utils.transaction_table import TransactionTable
+from utils.validator import iter_valid_transactions
+
+CUBE_VERSION = 1
+
+# ProductName is kept next to ProductID because one ProductID can appear
+# under several names in the raw data, and the product views key on names.
+DIMENSIONS = ("Date", "Region", "ProductID", "ProductName")
+MEASURES = ("revenue", "quantity", "transactions")
+
+_DIM_INDEX = {name: i for i, name in enumerate(DIMENSIONS)}
+
+
+class RollupCube:
+    """
+    Materialized rollup of the sales data:
+
+        cells: (Date, Region, ProductID, ProductName) -> [revenue, quantity, transactions]
+
+    plus the customers seen on each date (a set, or a HyperLogLog sketch
+    when unique_precision is set), so daily unique-customer counts can
+    also be answered.
+
+    Build it once (update / build_rollup_cube), save() it, and answer
+    questions with query() in time proportional to the number of cells
+    rather than the number of transactions. Cells keep first-seen order,
+    so views built from the cube tie-break like SalesAggregate.
+    """
+
+    def __init__(self, unique_precision=None):
+        if unique_precision is None:
+            unique_precision = get_unique_precision()
+        self.unique_precision = unique_precision or None
+        self.cells = {}
+        self.customers_by_date = {}
+
+    def __len__(self):
+        return len(self.cells)
+
+    def _add(self, date, region, product_id, product_name, qty, revenue, customer_id):
+        key = (date, region, product_id, product_name)
+        cell = self.cells.get(key)
+        if cell is None:
+            self.cells[key] = [revenue, qty, 1]
+        else:
+            cell[0] += revenue
+            cell[1] += qty
+            cell[2] += 1
+        customers = self.customers_by_date.get(date)
+        if customers is None:
+            customers = self.customers_by_date[date] = (
+                HyperLogLog(self.unique_precision) if self.unique_precision else set())
+        customers.add(customer_id)
+
+    def update(self, transactions):
+        """
+        Adds transactions (dicts or a TransactionTable) to the cube. Rows
+        with non-numeric Quantity/UnitPrice are skipped.
+        Returns: self
+        """
+        add = self._add
+        if isinstance(transactions, TransactionTable):
+            for date, region, product_id, name, qty, price, customer_id in zip(
+                    transactions.date, transactions.region, transactions.product_id,
+                    transactions.product_name, transactions.quantity,
+                    transactions.unit_price, transactions.customer_id):
+                add(date, region, product_id, name, qty, qty * price, customer_id)
+            return self
+
+        for t in transactions:
+            try:
+                qty = int(t.get("Quantity", 0))
+                price = float(t.get("UnitPrice", 0.0))
+            except (ValueError, TypeError):
+                continue
+            add(t.get("Date", "Unknown"), t.get("Region", "Unknown"),
+                t.get("ProductID", "Unknown"), t.get("ProductName", "Unknown"),
+                qty, qty * price, t.get("CustomerID", "Unknown"))
+        return self
+
+    def merge(self, other):
+        """
+        Merges another cube (e.g. built from another file or chunk) into this one.
+        Returns: self
+        """
+        for key, (revenue, qty, n) in other.cells.items():
+            cell = self.cells.get(key)
+            if cell is None:
+                self.cells[key] = [revenue, qty, n]
+            else:
+                cell[0] += revenue
+                cell[1] += qty
+                cell[2] += n
+        for date, customers in other.customers_by_date.items():
+            mine = self.customers_by_date.get(date)
+            if mine is None:
+                mine = self.customers_by_date[date] = (
+                    HyperLogLog(self.unique_precision) if self.unique_precision else set())
+            if isinstance(customers, HyperLogLog) and not isinstance(mine, HyperLogLog):
+                raise ValueError("cannot merge HyperLogLog customer counts into an exact cube")
+            mine.update(customers)
+        return self
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _matcher(self, where, date_from, date_to):
+        """
+        Returns: a predicate over cell keys for the given filters.
+        """
+        tests = []
+        for dim, wanted in (where or {}).items():
+            if dim not in _DIM_INDEX:
+                raise ValueError(f"Unknown dimension '{dim}'. Choose from: {', '.join(DIMENSIONS)}")
+            i = _DIM_INDEX[dim]
+            if callable(wanted):
+                tests.append(lambda key, i=i, f=wanted: f(key[i]))
+            elif isinstance(wanted, (list, tuple, set, frozenset)):
+                tests.append(lambda key, i=i, s=frozenset(wanted): key[i] in s)
+            else:
+                tests.append(lambda key, i=i, v=wanted: key[i] == v)
+        if date_from is not None:
+            tests.append(lambda key: key[0] >= date_from)
+        if date_to is not None:
+            tests.append(lambda key: key[0] <= date_to)
+        return lambda key: all(test(key) for test in tests)
+
+    def query(self, group_by=(), where=None, date_from=None, date_to=None):
+        """
+        Slices, dices and rolls up the cube in one pass over its cells.
+
+        group_by:  dimensions to keep (any subset of DIMENSIONS, in the
+                   order given); the others are rolled up. Empty = grand total.
+        where:     {dimension: value | list/set of values | predicate}
+        date_from, date_to: inclusive ISO date bounds
+
+        Returns: dictionary {group key tuple: {revenue, quantity, transactions}}
+        in first-seen order, e.g.
+            cube.query(["ProductID"], where={"Region": "South"},
+                       date_from="2024-12-01", date_to="2024-12-07")
+        """
+        for dim in group_by:
+            if dim not in _DIM_INDEX:
+                raise ValueError(f"Unknown dimension '{dim}'. Choose from: {', '.join(DIMENSIONS)}")
+        indexes = [_DIM_INDEX[dim] for dim in group_by]
+        matches = self._matcher(where, date_from, date_to) \
+            if where or date_from is not None or date_to is not None else None
+
+        groups = {}
+        for key, (revenue, qty, n) in self.cells.items():
+            if matches is not None and not matches(key):
+                continue
+            group = tuple(key[i] for i in indexes)
+            totals = groups.get(group)
+            if totals is None:
+                groups[group] = [revenue, qty, n]
+            else:
+                totals[0] += revenue
+                totals[1] += qty
+                totals[2] += n
+        return {group: dict(zip(MEASURES, totals)) for group, totals in groups.items()}
+
+    def slice(self, where=None, date_from=None, date_to=None):
+        """
+        Returns: a new RollupCube holding only the matching cells (and the
+        customers of the matching dates), for chained queries.
+        """
+        matches = self._matcher(where, date_from, date_to)
+        cube = RollupCube(unique_precision=self.unique_precision or 0)
+        for key, cell in self.cells.items():
+            if matches(key):
+                cube.cells[key] = list(cell)
+                if key[0] not in cube.customers_by_date:
+                    cube.customers_by_date[key[0]] = self.customers_by_date[key[0]].copy()
+        return cube
+
+    def rollup(self, *dims):
+        """
+        Returns: query(group_by=dims), e.g. cube.rollup("Region").
+        """
+        return self.query(group_by=dims)
+
+    def to_aggregate(self):
+        """
+        Returns: a SalesAggregate with the region, product and daily totals
+        taken from the cube, so the region/product/daily views of
+        utils/data_processor.py run in time proportional to the cube size.
+        Per-customer stats are not part of the cube and stay empty.
+        """
+        agg = SalesAggregate(top_k_capacity=0, unique_precision=self.unique_precision or 0)
+        for (date, region, _, product), (revenue, qty, n) in self.cells.items():
+            agg.total_revenue += revenue
+            agg.transaction_count += n
+            stats = agg.region_stats.get(region)
+            if stats is None:
+                agg.region_stats[region] = [revenue, n]
+            else:
+                stats[0] += revenue
+                stats[1] += n
+            stats = agg.product_stats.get(product)
+            if stats is None:
+                agg.product_stats[product] = [qty, revenue]
+            else:
+                stats[0] += qty
+                stats[1] += revenue
+            stats = agg.daily_stats.get(date)
+            if stats is None:
+                # A copy: merging into the aggregate must not change the cube
+                customers = self.customers_by_date.get(date)
+                agg.daily_stats[date] = [revenue, n, set() if customers is None else customers.copy()]
+            else:
+                stats[0] += revenue
+                stats[1] += n
+        return agg
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def to_dict(self):
+        return {
+            "version": CUBE_VERSION,
+            "dimensions": list(DIMENSIONS),
+            "unique_precision": self.unique_precision,
+            "cells": [list(key) + cell for key, cell in self.cells.items()],
+            "customers_by_date": [
+                [date, c.to_dict() if isinstance(c, HyperLogLog) else sorted(c)]
+                for date, c in self.customers_by_date.items()
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != CUBE_VERSION or data.get("dimensions") != list(DIMENSIONS):
+            raise ValueError("Unsupported rollup cube format")
+        cube = cls(unique_precision=data.get("unique_precision") or 0)
+        n = len(DIMENSIONS)
+        cube.cells = {tuple(row[:n]): row[n:] for row in data["cells"]}
+        cube.customers_by_date = {
+            date: HyperLogLog.from_dict(c) if isinstance(c, dict) else set(c)
+            for date, c in data["customers_by_date"]
+        }
+        return cube
+
+    def save(self, path):
+        """
+        Writes the cube to `path` as JSON (atomically).
+        """
+        save_state(path, self.to_dict())
+
+    @classmethod
+    def load(cls, path):
+        """
+        Returns: the cube saved at `path`, or None if there is none.
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        return cls.from_dict(data)
+
+
+def build_rollup_cube(filepath, region=None, min_amount=None, max_amount=None, cube_file=None):
+    """
+    Streams a sales file through parsing and validation into a RollupCube,
+    optionally saving it to cube_file.
+    Returns: tuple (RollupCube, filter_summary)
+    """
+    summary = {}
+    pushdown = {}
+    transactions = iter_transactions(iter_sales_data(filepath), region=region, min_amount=min_amount,
+                                     max_amount=max_amount, stats=pushdown)
+    valid = iter_valid_transactions(transactions, region=region, min_amount=min_amount,
+                                    max_amount=max_amount, summary=summary)
+    cube = RollupCube().update(valid)
+    if cube_file:
+        cube.save(cube_file)
+    return cube, add_pushdown_counts(summary, pushdown)
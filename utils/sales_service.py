@@ -0,0 +1,350 @@
+import json
+import os
+import signal
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+from utils.aggregator import SalesAggregate
+from utils.incremental import (aggregate_appended_lines, aggregate_tail, fingerprint_matches,
+                               prefix_fingerprint)
+from utils.validator import merge_filter_summaries
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8766
+# Seconds between checks of the source file for changes
+DEFAULT_POLL_INTERVAL = 1.0
+# Distinct (path, query) responses kept per data version
+MAX_CACHED_RESPONSES = 1024
+
+
+class QueryError(Exception):
+    """
+    A request the service cannot answer; carries the HTTP status.
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _int_param(params, name, default):
+    values = params.get(name)
+    if not values:
+        return default
+    try:
+        return int(values[0])
+    except ValueError:
+        raise QueryError(400, f"'{name}' must be an integer") from None
+
+
+class SalesService:
+    """
+    Keeps the SalesAggregate of one sales file in memory and answers view
+    queries from it.
+
+    The file is parsed once at startup. reload() then only reads the lines
+    appended since the last load (same checks as incremental_sales_aggregate:
+    a rewritten or truncated file is rebuilt from byte zero), so polling a
+    growing file costs little. Each rendered JSON response is cached until
+    the data changes; repeated queries are a dict lookup.
+    """
+
+    def __init__(self, filepath, region=None, min_amount=None, max_amount=None):
+        self.filepath = filepath
+        self.filters = {"region": region, "min_amount": min_amount, "max_amount": max_amount}
+        self.reloads = {"full": 0, "incremental": 0}
+        self.loaded_at = None
+        self.last_error = None
+
+        # Lines up to `offset` (all newline-terminated) are in _committed;
+        # the published snapshot is what queries see (the committed state
+        # plus an unterminated last line, if any). Neither is ever modified
+        # once published: reload() merges the new lines into a
+        # copy-on-write copy (SalesAggregate.merged_copy) and swaps it in.
+        self._committed = None
+        self._committed_summary = None
+        self._offset = 0
+        self._fingerprint = None
+        self._file_key = None
+        # (aggregate, summary, view cache, response cache) of one data version
+        self._snapshot = None
+
+        # _reload_lock serializes reloads; _lock guards the published
+        # snapshot, and is only held to swap it or take a reference to it
+        self._reload_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.reload()
+
+    @property
+    def aggregate(self):
+        return self._snapshot[0]
+
+    @property
+    def summary(self):
+        return self._snapshot[1]
+
+    def reload(self):
+        """
+        Picks up changes to the source file.
+
+        The new lines are read without blocking queries, into a separate
+        delta that is then merged into a copy-on-write copy of the current
+        state, so a reload costs O(new lines), not O(state). If reading
+        fails (e.g. OSError) nothing is applied and the next call starts
+        again from the same offset.
+
+        Returns: "full", "incremental", or None when the file is unchanged.
+        """
+        with self._reload_lock:
+            st = os.stat(self.filepath)
+            file_key = (st.st_size, st.st_mtime_ns)
+            if file_key == self._file_key:
+                return None
+
+            if (self._committed is not None and self._offset <= st.st_size
+                    and fingerprint_matches(self.filepath, self._offset, self._fingerprint)):
+                mode = "incremental"
+                start = self._offset
+                previous = self._fingerprint
+            else:
+                mode = "full"
+                start = 0
+                previous = None
+
+            delta = _delta_aggregate(self._committed) if mode == "incremental" else SalesAggregate()
+            delta_summary = merge_filter_summaries({}, {})
+            end, tail = aggregate_appended_lines(self.filepath, start, delta, delta_summary,
+                                                 **self.filters)
+            if mode == "incremental":
+                committed = self._committed.merged_copy(delta)
+                summary = merge_filter_summaries(
+                    merge_filter_summaries({}, self._committed_summary), delta_summary)
+            else:
+                committed, summary = delta, delta_summary
+
+            aggregate = committed
+            current_summary = summary
+            if tail:
+                # Served now, re-read from `end` once it is complete
+                tail_delta = _delta_aggregate(committed)
+                tail_summary = merge_filter_summaries({}, {})
+                aggregate_tail(tail, tail_delta, tail_summary, **self.filters)
+                aggregate = committed.merged_copy(tail_delta)
+                current_summary = merge_filter_summaries(
+                    merge_filter_summaries({}, summary), tail_summary)
+            fingerprint = prefix_fingerprint(self.filepath, end, previous)
+
+            with self._lock:
+                self._committed, self._committed_summary = committed, summary
+                self._offset = end
+                self._fingerprint = fingerprint
+                self._file_key = file_key
+                self._snapshot = (aggregate, current_summary, {}, {})
+                self.reloads[mode] += 1
+                self.loaded_at = time.time()
+        return mode
+
+    def watch(self, stop, interval=DEFAULT_POLL_INTERVAL):
+        """
+        Calls reload() every `interval` seconds until the `stop` event is
+        set. Errors (e.g. the file briefly missing while it is replaced)
+        are kept in last_error and the previous data stays served.
+        """
+        while not stop.wait(interval):
+            try:
+                self.reload()
+                self.last_error = None
+            except (OSError, UnicodeDecodeError) as e:
+                self.last_error = str(e)
+
+    def status(self):
+        with self._lock:
+            aggregate = self.aggregate
+            offset = self._offset
+        return {
+            "source": os.path.abspath(self.filepath),
+            "filters": self.filters,
+            "offset": offset,
+            "transactions": aggregate.transaction_count,
+            "reloads": dict(self.reloads),
+            "loaded_at": self.loaded_at,
+            "last_error": self.last_error,
+        }
+
+    def query(self, path, params, snapshot=None):
+        """
+        Answers one query against the in-memory aggregate (by default the
+        current snapshot).
+
+            /summary                    totals and the filter summary
+            /regions                    region_summary()
+            /products[?top=N]           every product, or the top N by quantity
+            /products/low[?threshold=T] products sold less than T times (default 10)
+            /customers[?top=N]          customer_summary(), or the top N by spend
+            /customers/<CustomerID>     one customer's statistics
+            /daily                      daily_summary()
+            /peak-day                   peak_day()
+
+        Returns: JSON-serializable result. Raises QueryError.
+        """
+        if snapshot is None:
+            with self._lock:
+                snapshot = self._snapshot
+        aggregate, summary, views, _ = snapshot
+
+        def view(name):
+            # Computed once per data version
+            result = views.get(name)
+            if result is None:
+                result = views[name] = getattr(aggregate, name)()
+            return result
+
+        path = path.rstrip("/") or "/"
+        if path == "/summary":
+            return {
+                "total_revenue": aggregate.total_revenue,
+                "transaction_count": aggregate.transaction_count,
+                "unique_customers": aggregate.unique_customers(),
+                "filter_summary": summary,
+            }
+        if path == "/regions":
+            return view("region_summary")
+        if path == "/products":
+            if "top" in params:
+                return aggregate.top_products(_int_param(params, "top", 5))
+            return view("product_summary")
+        if path == "/products/low":
+            return aggregate.low_products(_int_param(params, "threshold", 10))
+        if path == "/customers":
+            if "top" in params:
+                return aggregate.top_customers(_int_param(params, "top", 5))
+            return view("customer_summary")
+        if path.startswith("/customers/"):
+            customer_id = unquote(path[len("/customers/"):])
+            customer = view("customer_summary").get(customer_id)
+            if customer is None:
+                raise QueryError(404, f"Customer '{customer_id}' not found")
+            return customer
+        if path == "/daily":
+            return view("daily_summary")
+        if path == "/peak-day":
+            return aggregate.peak_day()
+        raise QueryError(404, f"Unknown query '{path}'")
+
+    def respond(self, target):
+        """
+        Answers a request target (path and query string).
+
+        Only taking a reference to the current snapshot holds the lock; the
+        query runs outside it, so a slow view does not block other queries,
+        and its result is cached with the data version it was computed from.
+
+        Returns: tuple (HTTP status, JSON body bytes)
+        """
+        with self._lock:
+            snapshot = self._snapshot
+        responses = snapshot[3]
+        cached = responses.get(target)
+        if cached is not None:
+            return cached
+
+        url = urlparse(target)
+        if url.path.rstrip("/") == "/status":
+            return 200, json.dumps(self.status()).encode("utf-8")
+
+        try:
+            response = 200, json.dumps(
+                self.query(url.path, parse_qs(url.query), snapshot)).encode("utf-8")
+        except QueryError as e:
+            response = e.status, json.dumps({"error": str(e)}).encode("utf-8")
+        if len(responses) < MAX_CACHED_RESPONSES:
+            responses[target] = response
+        return response
+
+
+def _delta_aggregate(aggregate):
+    """
+    Returns: an empty SalesAggregate for rows to be merged into
+    `aggregate`. Customers are kept exact (merge() feeds them to the
+    sketch per customer) and unique counts use the same precision.
+    """
+    return SalesAggregate(top_k_capacity=0, unique_precision=aggregate.unique_precision or 0)
+
+
+class SalesServiceHandler(BaseHTTPRequestHandler):
+    """
+    Serves SalesService.respond over HTTP/1.1 with keep-alive, so a
+    polling dashboard reuses one connection.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; with Nagle on, each response
+    # on a kept-alive connection would wait for a delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+    service = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        status, body = self.service.respond(self.path)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None):
+    """
+    Creates the HTTP server for a service, on host:port or, when
+    socket_path is given, on a Unix socket (a stale socket file is replaced).
+    Returns: server (call serve_forever())
+    """
+    if socket_path is None:
+        handler = type("Handler", (SalesServiceHandler,), {"service": service})
+        return ThreadingHTTPServer((host, port), handler)
+    # TCP_NODELAY does not apply to Unix sockets
+    handler = type("Handler", (SalesServiceHandler,),
+                   {"service": service, "disable_nagle_algorithm": False})
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    return ThreadingUnixHTTPServer(socket_path, handler)
+
+
+def serve(filepath, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None,
+          poll_interval=DEFAULT_POLL_INTERVAL, log=print, **filters):
+    """
+    Loads `filepath`, then serves queries until interrupted, reloading
+    whenever the file changes.
+    """
+    service = SalesService(filepath, **filters)
+    server = make_server(service, host, port, socket_path)
+    stop = threading.Event()
+    threading.Thread(target=service.watch, args=(stop, poll_interval), daemon=True).start()
+
+    def terminate(signum, frame):
+        raise KeyboardInterrupt
+
+    # Stop cleanly (and remove the socket file) on SIGTERM as well as Ctrl-C
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, terminate)
+
+    where = socket_path if socket_path is not None else f"http://{host}:{server.server_address[1]}"
+    log(f"Serving {service.aggregate.transaction_count} transactions from {filepath} on {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        if socket_path is not None and os.path.exists(socket_path):
+            os.remove(socket_path)
@@ -0,0 +1,173 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from operator import mul
+
+from utils.aggregator import aggregate_transactions
+from utils.transaction_table import TransactionTable
+
+# Columns with a hash index: value -> row ids
+HASH_INDEXES = ("Region", "CustomerID", "ProductID")
+
+
+class IndexedTransactions:
+    """
+    Read-only transaction store with secondary indexes, for running many
+    filtered reports against the same (already validated) dataset.
+
+    Indexes, all built once in the constructor:
+      - hash indexes on Region, CustomerID and ProductID: value -> row ids
+      - a sorted Date index (ISO dates sort as strings) for date ranges
+      - a sorted amount (Quantity * UnitPrice) index for min/max filters
+
+    Row ids are kept in typed arrays ('q'), so each index costs 8 bytes per
+    row. A query starts from the most selective index (hash lookups and
+    bisected ranges are sized without scanning) and checks the remaining
+    filters only on those candidates, so filtered analytics and per-customer
+    drill-downs cost time proportional to the candidate set, not the table.
+    """
+
+    def __init__(self, transactions):
+        if not isinstance(transactions, TransactionTable):
+            transactions = TransactionTable.from_dicts(transactions)
+        self.table = transactions
+        n = len(transactions)
+
+        self.amounts = array("d", map(mul, transactions.quantity, transactions.unit_price))
+
+        # Hash indexes are built on the dictionary codes and decoded once
+        # per distinct value
+        self.hash_indexes = {}
+        for name in HASH_INDEXES:
+            index = {}
+            for row, code in enumerate(transactions.codes(name)):
+                rows = index.get(code)
+                if rows is None:
+                    rows = index[code] = array("q")
+                rows.append(row)
+            by_code = transactions.dictionary(name).by_code
+            self.hash_indexes[name] = {by_code[code]: rows for code, rows in index.items()}
+
+        dates = list(transactions.date)
+        by_date = sorted(range(n), key=dates.__getitem__)
+        self._date_rows = array("q", by_date)
+        self._date_keys = [dates[row] for row in by_date]
+
+        amounts = self.amounts
+        by_amount = sorted(range(n), key=amounts.__getitem__)
+        self._amount_rows = array("q", by_amount)
+        self._amount_keys = array("d", (amounts[row] for row in by_amount))
+
+    def __len__(self):
+        return len(self.table)
+
+    def __repr__(self):
+        return f"IndexedTransactions({len(self)} rows)"
+
+    def values(self, column):
+        """
+        Returns: the distinct values of a hash-indexed column, in first-seen order.
+        """
+        return list(self.hash_indexes[column])
+
+    # ------------------------------------------------------------------
+    # Index lookups (row ids, not materialized)
+    # ------------------------------------------------------------------
+
+    def _range(self, keys, rows, low, high):
+        start = 0 if low is None else bisect_left(keys, low)
+        stop = len(keys) if high is None else bisect_right(keys, high)
+        return rows[start:stop] if start < stop else array("q")
+
+    def date_rows(self, date_from=None, date_to=None):
+        """
+        Returns: row ids with date_from <= Date <= date_to (inclusive ISO dates), by date.
+        """
+        return self._range(self._date_keys, self._date_rows, date_from, date_to)
+
+    def amount_rows(self, min_amount=None, max_amount=None):
+        """
+        Returns: row ids with min_amount <= Quantity * UnitPrice <= max_amount, by amount.
+        """
+        return self._range(self._amount_keys, self._amount_rows, min_amount, max_amount)
+
+    def lookup(self, column, value):
+        """
+        Returns: row ids whose `column` equals `value` (in table order).
+        """
+        return self.hash_indexes[column].get(value, array("q"))
+
+    def select(self, region=None, customer_id=None, product_id=None,
+               date_from=None, date_to=None, min_amount=None, max_amount=None):
+        """
+        Finds the rows matching every given filter (None = no filter).
+        Amount bounds are inclusive, like validate_and_filter's.
+        Returns: sorted array of row ids
+        """
+        candidates = []
+        for column, value in (("Region", region), ("CustomerID", customer_id),
+                              ("ProductID", product_id)):
+            if value is not None:
+                candidates.append((column, self.lookup(column, value)))
+        if date_from is not None or date_to is not None:
+            candidates.append(("Date", self.date_rows(date_from, date_to)))
+        if min_amount is not None or max_amount is not None:
+            candidates.append(("amount", self.amount_rows(min_amount, max_amount)))
+        if not candidates:
+            return array("q", range(len(self.table)))
+
+        # Step 1: Start from the smallest candidate list
+        candidates.sort(key=lambda c: len(c[1]))
+        driver, rows = candidates[0]
+        if not rows:
+            return array("q")
+
+        # Step 2: Check the other filters against the column values of
+        # those candidates only (equality filters compare codes)
+        table = self.table
+        wanted = {"Region": region, "CustomerID": customer_id, "ProductID": product_id}
+        checks = []
+        for column, _ in candidates[1:]:
+            if column in wanted:
+                code = table.dictionary(column).get(wanted[column])
+                checks.append((table.codes(column), lambda c, code=code: c == code))
+            elif column == "Date":
+                dates = table.dictionary("Date").by_code
+                checks.append((table.codes("Date"), lambda c: (date_from is None or dates[c] >= date_from)
+                               and (date_to is None or dates[c] <= date_to)))
+            else:
+                checks.append((self.amounts, lambda v: (min_amount is None or v >= min_amount)
+                               and (max_amount is None or v <= max_amount)))
+        for values, test in checks:
+            rows = [row for row in rows if test(values[row])]
+
+        # Step 3: Return rows in table order (hash index lists already are)
+        if driver in HASH_INDEXES:
+            return array("q", rows)
+        return array("q", sorted(rows))
+
+    # ------------------------------------------------------------------
+    # Materialized results
+    # ------------------------------------------------------------------
+
+    def filter(self, region=None, customer_id=None, product_id=None,
+               date_from=None, date_to=None, min_amount=None, max_amount=None):
+        """
+        Returns: a TransactionTable with the matching rows, in original order.
+        On validated transactions, filter(region=r, min_amount=a, max_amount=b)
+        holds the same rows as validate_and_filter(..., r, a, b).
+        """
+        return self.table.take(self.select(region, customer_id, product_id,
+                                           date_from, date_to, min_amount, max_amount))
+
+    def customer_transactions(self, customer_id, date_from=None, date_to=None):
+        """
+        Returns: a TransactionTable with one customer's transactions (drill-down).
+        """
+        return self.filter(customer_id=customer_id, date_from=date_from, date_to=date_to)
+
+    def aggregate(self, **filters):
+        """
+        Returns: a SalesAggregate over the rows matching `filters` (see select),
+        ready for the analytics views in utils/data_processor.py.
+        """
+        return aggregate_transactions(self.filter(**filters))
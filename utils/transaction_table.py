@@ -0,0 +1,278 @@
+from array import array
+
+COLUMNS = ["TransactionID", "Date", "ProductID", "ProductName",
+           "Quantity", "UnitPrice", "CustomerID", "Region"]
+
+# String columns with few distinct values; they are dictionary-encoded into
+# integer codes (see CategoricalColumn).
+CATEGORICAL_COLUMNS = ["Date", "ProductID", "ProductName", "CustomerID", "Region"]
+
+NUMERIC_TYPECODES = {"Quantity": "q", "UnitPrice": "d"}
+
+# Typecode of the per-row codes of a categorical column (uint32)
+CODE_TYPECODE = "I"
+
+
+class Dictionary(dict):
+    """
+    Lookup table for one categorical column, mapping value -> code, with
+    `by_code[code]` giving the value back. Looking up an unknown value
+    assigns it the next code, so dictionary[value] always returns a code.
+    Codes are assigned in first-seen order and never change, so tables
+    derived from each other (take, filters) share one Dictionary and can
+    compare codes directly.
+    """
+
+    __slots__ = ("by_code",)
+
+    def __init__(self, values=()):
+        super().__init__()
+        self.by_code = []
+        for value in values:
+            self[value]
+
+    def __missing__(self, value):
+        code = self[value] = len(self.by_code)
+        self.by_code.append(value)
+        return code
+
+
+class CategoricalColumn:
+    """
+    Dictionary-encoded string column: one integer code per row (4 bytes in
+    a typed array) plus a shared Dictionary holding each distinct value once.
+
+    Reads like a list of strings (indexing, iteration, len), decoding on
+    the fly, so code that zips table columns keeps working. Group-bys can
+    work on `codes` directly and decode only once per distinct value.
+    """
+
+    __slots__ = ("codes", "dictionary")
+
+    def __init__(self, codes=None, dictionary=None):
+        self.codes = array(CODE_TYPECODE) if codes is None else codes
+        self.dictionary = Dictionary() if dictionary is None else dictionary
+
+    def append(self, value):
+        self.codes.append(self.dictionary[value])
+
+    def extend(self, values):
+        self.codes.extend(map(self.dictionary.__getitem__, values))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.dictionary.by_code[c] for c in self.codes[index]]
+        return self.dictionary.by_code[self.codes[index]]
+
+    def __iter__(self):
+        return map(self.dictionary.by_code.__getitem__, self.codes)
+
+    def take(self, indices):
+        """
+        Returns: a new column with the given rows, sharing this dictionary.
+        """
+        codes = self.codes
+        return CategoricalColumn(array(CODE_TYPECODE, (codes[i] for i in indices)),
+                                 self.dictionary)
+
+    def __repr__(self):
+        return f"CategoricalColumn({len(self)} rows, {len(self.dictionary)} values)"
+
+
+class TransactionRow:
+    """
+    Lightweight read-only view of one row of a TransactionTable.
+
+    Behaves like the transaction dictionaries returned by
+    parse_transactions (supports t["Quantity"], t.get(...), "key" in t,
+    keys/items) without copying any data out of the table.
+    """
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, key):
+        return self._table._columns[key][self._index]
+
+    def get(self, key, default=None):
+        column = self._table._columns.get(key)
+        if column is None:
+            return default
+        return column[self._index]
+
+    def __contains__(self, key):
+        return key in self._table._columns
+
+    def __iter__(self):
+        return iter(COLUMNS)
+
+    def __len__(self):
+        return len(COLUMNS)
+
+    def keys(self):
+        return list(COLUMNS)
+
+    def values(self):
+        return [self[k] for k in COLUMNS]
+
+    def items(self):
+        return [(k, self[k]) for k in COLUMNS]
+
+    def to_dict(self):
+        """
+        Returns: a plain transaction dictionary for this row.
+        """
+        return {k: self[k] for k in COLUMNS}
+
+    def __eq__(self, other):
+        if isinstance(other, (TransactionRow, dict)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+class TransactionTable:
+    """
+    Columnar store for parsed transactions.
+
+    Quantity and UnitPrice are kept in typed arrays ('q' and 'd'), so they
+    cost 8 bytes per row each and can be handed to NumPy without copying.
+    TransactionID is a plain list. Categorical columns are dictionary-encoded
+    at append time (CategoricalColumn): 4 bytes of code per row, and each
+    distinct string is stored once in a lookup table shared with every
+    table taken from this one.
+
+    Iterating over the table yields TransactionRow views, so code written
+    for the list-of-dicts format keeps working unchanged.
+
+    `columns` optionally supplies prebuilt column storage keyed by column
+    name (e.g. memory-mapped columns loaded from the parse cache).
+    Categorical columns may be given as CategoricalColumn or as a list of
+    strings (encoded here). Tables are read-only if the storage does not
+    support append.
+    """
+
+    def __init__(self, columns=None):
+        if columns is None:
+            columns = {}
+        categorical = {}
+        for name in CATEGORICAL_COLUMNS:
+            column = columns.get(name)
+            if not isinstance(column, CategoricalColumn):
+                values, column = column, CategoricalColumn()
+                if values:
+                    column.extend(values)
+            categorical[name] = column
+        self.transaction_id = columns.get("TransactionID", [])
+        self.date = categorical["Date"]
+        self.product_id = categorical["ProductID"]
+        self.product_name = categorical["ProductName"]
+        self.quantity = columns.get("Quantity", array("q"))
+        self.unit_price = columns.get("UnitPrice", array("d"))
+        self.customer_id = categorical["CustomerID"]
+        self.region = categorical["Region"]
+        self._columns = {
+            "TransactionID": self.transaction_id,
+            "Date": self.date,
+            "ProductID": self.product_id,
+            "ProductName": self.product_name,
+            "Quantity": self.quantity,
+            "UnitPrice": self.unit_price,
+            "CustomerID": self.customer_id,
+            "Region": self.region,
+        }
+
+    def append(self, transaction_id, date, product_id, product_name,
+               quantity, unit_price, customer_id, region):
+        """
+        Append a single parsed row to the table.
+        """
+        self.transaction_id.append(transaction_id)
+        self.date.codes.append(self.date.dictionary[date])
+        self.product_id.codes.append(self.product_id.dictionary[product_id])
+        self.product_name.codes.append(self.product_name.dictionary[product_name])
+        self.quantity.append(quantity)
+        self.unit_price.append(unit_price)
+        self.customer_id.codes.append(self.customer_id.dictionary[customer_id])
+        self.region.codes.append(self.region.dictionary[region])
+
+    def column(self, name):
+        """
+        Returns: the storage for one column (list or typed array).
+        """
+        return self._columns[name]
+
+    def codes(self, name):
+        """
+        Returns: the integer codes of a categorical column (typed array or
+        memoryview), without decoding.
+        """
+        return self._columns[name].codes
+
+    def dictionary(self, name):
+        """
+        Returns: the Dictionary (code <-> value lookup) of a categorical column.
+        """
+        return self._columns[name].dictionary
+
+    def __len__(self):
+        return len(self.quantity)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("TransactionTable index out of range")
+        return TransactionRow(self, index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield TransactionRow(self, i)
+
+    def take(self, indices):
+        """
+        Builds a new table containing only the given row indices.
+        """
+        if not isinstance(indices, (list, array, range)):
+            indices = list(indices)
+        columns = {}
+        for name, column in self._columns.items():
+            if isinstance(column, CategoricalColumn):
+                columns[name] = column.take(indices)
+            elif name == "TransactionID":
+                columns[name] = [column[i] for i in indices]
+            else:
+                columns[name] = array(NUMERIC_TYPECODES[name], (column[i] for i in indices))
+        return TransactionTable(columns)
+
+    @classmethod
+    def from_dicts(cls, transactions):
+        """
+        Builds a table from transaction dictionaries (or row views).
+        """
+        table = cls()
+        for t in transactions:
+            table.append(t["TransactionID"], t["Date"], t["ProductID"], t["ProductName"],
+                         t["Quantity"], t["UnitPrice"], t["CustomerID"], t["Region"])
+        return table
+
+    def to_dicts(self):
+        """
+        Returns: list of transaction dictionaries (same format as parse_transactions).
+        """
+        return [dict(zip(COLUMNS, row)) for row in zip(
+            self.transaction_id, self.date, self.product_id, self.product_name,
+            self.quantity, self.unit_price, self.customer_id, self.region)]
+
+    def __repr__(self):
+        return f"TransactionTable({len(self)} rows)"
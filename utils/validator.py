@@ -1,73 +1,362 @@
-def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
+import logging
+from functools import lru_cache
+from operator import itemgetter
+
+from utils.instrumentation import instrumented
+from utils.transaction_table import COLUMNS, TransactionTable
+
+logger = logging.getLogger(__name__)
+
+# Declarative validation rules, applied in order. Every transaction must
+# also contain all COLUMNS (the implicit "required_fields" rule, checked
+# first). Supported kinds:
+#   prefix        field value must start with `value`
+#   positive      numeric field must be > 0
+#   equals        field must equal `value`
+#   amount_range  Quantity * UnitPrice within [`min`, `max`] (either optional)
+#   predicate     custom callable `func(transaction)` must return True
+# Rules with "stage": "filter" run after validation; rows they reject are
+# counted as filtered rather than invalid.
+DEFAULT_RULES = (
+    {"name": "transaction_id_prefix", "kind": "prefix", "field": "TransactionID", "value": "T"},
+    {"name": "product_id_prefix", "kind": "prefix", "field": "ProductID", "value": "P"},
+    {"name": "customer_id_prefix", "kind": "prefix", "field": "CustomerID", "value": "C"},
+    {"name": "positive_quantity", "kind": "positive", "field": "Quantity"},
+    {"name": "positive_price", "kind": "positive", "field": "UnitPrice"},
+)
+
+REQUIRED_RULE = "required_fields"
+REGION_RULE = "region"
+AMOUNT_RULE = "amount"
+
+# Positions in a row's field tuple (COLUMNS order)
+_FIELD_INDEX = {name: i for i, name in enumerate(COLUMNS)}
+_QUANTITY, _UNIT_PRICE, _REGION = (_FIELD_INDEX[name] for name in ("Quantity", "UnitPrice", "Region"))
+_row_fields = itemgetter(*COLUMNS)
+
+
+def build_rules(region=None, min_amount=None, max_amount=None, extra_rules=()):
     """
-    Validates transactions and applies optional filters
+    Returns: the full rule list for a validate_and_filter call: the default
+    validation rules, any extra rules, then the region and amount filters.
     """
+    rules = list(DEFAULT_RULES) + list(extra_rules or ())
+    if region:
+        rules.append({"name": REGION_RULE, "kind": "equals", "field": "Region",
+                      "value": region, "stage": "filter"})
+    if min_amount is not None or max_amount is not None:
+        rules.append({"name": AMOUNT_RULE, "kind": "amount_range", "min": min_amount,
+                      "max": max_amount, "stage": "filter"})
+    return rules
 
-    total_input = len(transactions)
-    invalid_count = 0
-    valid_transactions = []
 
-    # Step 1: Validation
-    for t in transactions:
-        required_keys = ["TransactionID", "Date", "ProductID", "ProductName",
-                         "Quantity", "UnitPrice", "CustomerID", "Region"]
-        if not all(k in t for k in required_keys):
-            invalid_count += 1
-            continue
+def _rule_check(rule):
+    """
+    Returns: a function(fields, amount, row) that is True when a row fails
+    `rule`, with the rule's constants bound once (None for a rule that
+    cannot fail). `fields` is the row's value tuple in COLUMNS order,
+    `amount` its Quantity * UnitPrice (None before validation has passed)
+    and `row` the transaction dictionary (only built for predicates).
+    """
+    kind = rule["kind"]
+    if kind in ("prefix", "positive", "equals"):
+        i = _FIELD_INDEX[rule["field"]]
+        value = rule.get("value")
+        if kind == "prefix":
+            return lambda fields, amount, row: not fields[i].startswith(value)
+        if kind == "positive":
+            return lambda fields, amount, row: fields[i] <= 0
+        return lambda fields, amount, row: fields[i] != value
+    if kind == "amount_range":
+        low, high = rule.get("min"), rule.get("max")
+        if low is None and high is None:
+            return None
+        if high is None:
+            return lambda fields, amount, row: amount < low
+        if low is None:
+            return lambda fields, amount, row: amount > high
+        return lambda fields, amount, row: amount < low or amount > high
+    if kind == "predicate":
+        func = rule["func"]
+        return lambda fields, amount, row: not func(row)
+    raise ValueError(f"Unknown validation rule kind '{kind}' in rule '{rule['name']}'")
+
 
-        if not (t["TransactionID"].startswith("T") and
-                t["ProductID"].startswith("P") and
-                t["CustomerID"].startswith("C")):
-            invalid_count += 1
-            continue
+class CompiledRules:
+    """
+    A rule list compiled into a list of checks.
 
-        if t["Quantity"] <= 0 or t["UnitPrice"] <= 0:
-            invalid_count += 1
-            continue
+    Each rule becomes one small closure over the row's field tuple with its
+    constants already bound (see _rule_check), so a row is checked by one
+    loop over the list, with no per-row rule lookups. A RuleRun's checker:
+      - returns -1 when a row passes every rule, otherwise the index (into
+        self.names) of the first rule it failed;
+      - records the regions and amount range of rows that pass validation,
+        before any filter rule runs (needed for the filter summary).
+    """
 
-        valid_transactions.append(t)
+    def __init__(self, rules):
+        validate = [r for r in rules if r.get("stage", "validate") == "validate"]
+        filters = [r for r in rules if r.get("stage", "validate") == "filter"]
+        ordered = [{"name": REQUIRED_RULE, "kind": "required"}] + validate + filters
 
-    # Step 2: Print available regions
-    regions = sorted(set(t["Region"] for t in valid_transactions))
-    print(f"Available regions: {', '.join(regions)}")
+        self.names = [r["name"] for r in ordered]
+        self.is_filter = [r.get("stage", "validate") == "filter" for r in ordered]
+        self.uses_predicates = any(r["kind"] == "predicate" for r in ordered)
+        # (index into names, check) pairs; the required-fields rule is
+        # checked by the row lookup itself
+        checks = [(i, _rule_check(rule)) for i, rule in enumerate(ordered) if i > 0]
+        first_filter = len(validate) + 1
+        self.validate_checks = [(i, c) for i, c in checks if c is not None and i < first_filter]
+        self.filter_checks = [(i, c) for i, c in checks if c is not None and i >= first_filter]
 
-    # Step 3: Print transaction amount range
-    amounts = [t["Quantity"] * t["UnitPrice"] for t in valid_transactions]
-    if amounts:
-        print(f"Transaction amount range: min={min(amounts)}, max={max(amounts)}")
+    def new_run(self):
+        """
+        Returns: a RuleRun with fresh counters for one validation pass.
+        """
+        return RuleRun(self)
 
-    # Step 4: Apply filters
-    filtered_by_region = 0
-    filtered_by_amount = 0
 
-    if region:
-        before = len(valid_transactions)
-        valid_transactions = [t for t in valid_transactions if t["Region"] == region]
-        filtered_by_region = before - len(valid_transactions)
-        print(f"Records after region filter ({region}): {len(valid_transactions)}")
+class RuleRun:
+    """
+    Per-pass state for a CompiledRules: the check functions plus the
+    counters they feed.
+    """
+
+    def __init__(self, compiled):
+        self.compiled = compiled
+        self.counts = [0] * len(compiled.names)
+        self.regions = set()
+        self.bounds = [float("inf"), float("-inf")]
+        self.total_input = 0
+        self.accepted = 0
+        self.check, self.check_fields = self._make_checkers()
+
+    def _make_checkers(self):
+        """
+        Returns: (check(transaction dict), check_fields(*values in COLUMNS order))
+        """
+        validate_checks = self.compiled.validate_checks
+        filter_checks = self.compiled.filter_checks
+        uses_predicates = self.compiled.uses_predicates
+        regions_add = self.regions.add
+        bounds = self.bounds
+
+        def evaluate(fields, row):
+            for i, failed in validate_checks:
+                if failed(fields, None, row):
+                    return i
+            amount = fields[_QUANTITY] * fields[_UNIT_PRICE]
+            regions_add(fields[_REGION])
+            if amount < bounds[0]:
+                bounds[0] = amount
+            if amount > bounds[1]:
+                bounds[1] = amount
+            for i, failed in filter_checks:
+                if failed(fields, amount, row):
+                    return i
+            return -1
+
+        def check(t):
+            try:
+                fields = _row_fields(t)
+            except KeyError:
+                return 0
+            return evaluate(fields, t)
+
+        def check_fields(*fields):
+            return evaluate(fields, dict(zip(COLUMNS, fields)) if uses_predicates else None)
+
+        return check, check_fields
+
+    def summary(self):
+        """
+        Returns: the filter summary dictionary for this pass.
+        """
+        compiled = self.compiled
+        by_rule = dict(zip(compiled.names, self.counts))
+        invalid = sum(c for c, f in zip(self.counts, compiled.is_filter) if not f)
+        has_amounts = self.bounds[0] <= self.bounds[1]
+        return {
+            "total_input": self.total_input,
+            "invalid": invalid,
+            "filtered_by_region": by_rule.get(REGION_RULE, 0),
+            "filtered_by_amount": by_rule.get(AMOUNT_RULE, 0),
+            "final_count": self.accepted,
+            "rejected_by_rule": by_rule,
+            "regions": sorted(self.regions),
+            "min_amount": self.bounds[0] if has_amounts else None,
+            "max_amount": self.bounds[1] if has_amounts else None,
+        }
+
+
+def compile_rules(rules):
+    """
+    Compiles a rule list (see DEFAULT_RULES) into a CompiledRules.
+    """
+    return CompiledRules(rules)
+
+
+@lru_cache(maxsize=32)
+def _compile_builtin(region, min_amount, max_amount):
+    return compile_rules(build_rules(region, min_amount, max_amount))
+
 
+def _rules_for(region, min_amount, max_amount, extra_rules):
+    if extra_rules:
+        return compile_rules(build_rules(region, min_amount, max_amount, extra_rules))
+    return _compile_builtin(region, min_amount, max_amount)
+
+
+def log_filter_summary(summary, region=None, min_amount=None, max_amount=None, log=None):
+    """
+    Reports the available regions, amount range and per-filter record
+    counts through the `log` hook (default: this module's logger at INFO).
+
+    When filters were pushed down into the parser, the regions and amount
+    range only cover the rows that reached validation, and the lines say
+    which. Rows skipped by the amount pushdown already passed the region
+    filter, so they are still counted (unvalidated) after it.
+    """
+    if log is None:
+        log = logger.info
+    skipped_region = summary.get("skipped_by_region_pushdown", 0)
+    skipped_amount = summary.get("skipped_by_amount_pushdown", 0)
+    scope = ""
+    if (skipped_region and region) or skipped_amount:
+        rows = f"{region} rows" if skipped_region and region else "rows"
+        if skipped_amount:
+            rows += " within the amount filter"
+        scope = f" ({rows} only)"
+    log(f"Available regions{scope}: {', '.join(summary['regions'])}")
+    if summary["min_amount"] is not None:
+        log(f"Transaction amount range{scope}: min={summary['min_amount']}, max={summary['max_amount']}")
+    remaining = summary["total_input"] - summary["invalid"] - skipped_region
+    if skipped_region:
+        log(f"Records skipped by region pushdown (not validated): {skipped_region}")
+    if skipped_amount:
+        log(f"Records skipped by amount pushdown (not validated): {skipped_amount}")
+    if region:
+        remaining -= summary["filtered_by_region"]
+        unvalidated = f" (incl. {skipped_amount} not validated)" if skipped_amount else ""
+        log(f"Records after region filter ({region}): {remaining}{unvalidated}")
     if min_amount is not None or max_amount is not None:
-        before = len(valid_transactions)
-
-        def amount_ok(t):
-            amt = t["Quantity"] * t["UnitPrice"]
-            if min_amount is not None and amt < min_amount:
-                return False
-            if max_amount is not None and amt > max_amount:
-                return False
-            return True
-
-        valid_transactions = [t for t in valid_transactions if amount_ok(t)]
-        filtered_by_amount = before - len(valid_transactions)
-        print(f"Records after amount filter: {len(valid_transactions)}")
-
-    # Step 5: Summary
-    filter_summary = {
-        "total_input": total_input,
-        "invalid": invalid_count,
-        "filtered_by_region": filtered_by_region,
-        "filtered_by_amount": filtered_by_amount,
-        "final_count": len(valid_transactions)
-    }
-
-    return valid_transactions, invalid_count, filter_summary
+        remaining -= skipped_amount + summary["filtered_by_amount"]
+        log(f"Records after amount filter: {remaining}")
+
+
+@instrumented("validate_and_filter")
+def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None,
+                        extra_rules=None, log=None):
+    """
+    Validates transactions and applies optional filters
+
+    Accepts a list of transaction dictionaries or a TransactionTable; a
+    table input returns the valid rows as a new TransactionTable.
+
+    All rules (see DEFAULT_RULES, plus any `extra_rules`) and the
+    region/amount filters are compiled into one check and applied in a
+    single pass. Progress messages go to the `log` hook (default: the
+    module logger); pass log=print to echo them to stdout.
+
+    Returns: (valid transactions, invalid count, filter summary). The
+    summary also holds per-rule rejection counts under "rejected_by_rule".
+    """
+
+    run = _rules_for(region, min_amount, max_amount, extra_rules).new_run()
+
+    if isinstance(transactions, TransactionTable):
+        table = transactions
+        check_fields = run.check_fields
+        counts = run.counts
+        valid_idx = []
+        for i, fields in enumerate(zip(
+                table.transaction_id, table.date, table.product_id, table.product_name,
+                table.quantity, table.unit_price, table.customer_id, table.region)):
+            failed = check_fields(*fields)
+            if failed < 0:
+                valid_idx.append(i)
+            else:
+                counts[failed] += 1
+        run.total_input = len(table)
+        run.accepted = len(valid_idx)
+        valid_transactions = table.take(valid_idx)
+    else:
+        check = run.check
+        counts = run.counts
+        valid_transactions = []
+        append = valid_transactions.append
+        for t in transactions:
+            failed = check(t)
+            if failed < 0:
+                append(t)
+            else:
+                counts[failed] += 1
+        run.total_input = len(transactions)
+        run.accepted = len(valid_transactions)
+
+    filter_summary = run.summary()
+    log_filter_summary(filter_summary, region, min_amount, max_amount, log)
+
+    return valid_transactions, filter_summary["invalid"], filter_summary
+
+
+def iter_valid_transactions(transactions, region=None, min_amount=None, max_amount=None,
+                            summary=None, extra_rules=None):
+    """
+    Streaming version of validate_and_filter.
+
+    Lazily yields the transactions that pass validation and the optional
+    region/amount filters, so only one row is held at a time. Counters are
+    accumulated into `summary` (a dict, updated in place) with the same keys
+    as validate_and_filter's filter summary, including:
+        regions:    sorted list of regions seen among valid transactions
+        min_amount: smallest valid transaction amount (None if no rows)
+        max_amount: largest valid transaction amount (None if no rows)
+    The counters are complete once the generator is exhausted.
+    """
+
+    if summary is None:
+        summary = {}
+    run = _rules_for(region, min_amount, max_amount, extra_rules).new_run()
+    summary.update(run.summary())
+
+    check = run.check
+    counts = run.counts
+    total = accepted = 0
+    try:
+        for t in transactions:
+            total += 1
+            failed = check(t)
+            if failed < 0:
+                accepted += 1
+                yield t
+            else:
+                counts[failed] += 1
+    finally:
+        run.total_input = total
+        run.accepted = accepted
+        summary.update(run.summary())
+
+
+def merge_filter_summaries(summary, other):
+    """
+    Merges the counters of a filter summary (see iter_valid_transactions)
+    into `summary`, in place.
+    Returns: summary
+    """
+    for key in ("total_input", "invalid", "filtered_by_region", "skipped_by_region_pushdown",
+                "filtered_by_amount", "skipped_by_amount_pushdown", "final_count"):
+        summary[key] = summary.get(key, 0) + other.get(key, 0)
+
+    by_rule = summary.setdefault("rejected_by_rule", {})
+    for name, count in other.get("rejected_by_rule", {}).items():
+        by_rule[name] = by_rule.get(name, 0) + count
+
+    summary["regions"] = sorted(set(summary.get("regions", ())).union(other.get("regions", ())))
+
+    low = [v for v in (summary.get("min_amount"), other.get("min_amount")) if v is not None]
+    high = [v for v in (summary.get("max_amount"), other.get("max_amount")) if v is not None]
+    summary["min_amount"] = min(low) if low else None
+    summary["max_amount"] = max(high) if high else None
+    return summary